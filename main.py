@@ -6,10 +6,29 @@ import logging
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from src.bot.handlers import add_record, menu, start
-from src.bot.services.excel import ensure_workbook_ready
+from src.bot.handlers import add_record, feed, menu, perf, search, start, temperatures
+from src.bot.services.admission import get_import_admission
+from src.bot.services.change_feed import get_change_feed
+from src.bot.services.compaction import get_compactor
+from src.bot.services.excel import (
+    add_commit_listener,
+    ensure_workbook_ready,
+    is_workbook_unchanged,
+    migrate_legacy_journal,
+    remove_commit_listener,
+)
+from src.bot.services.outbound import bulk_priority, get_outbound_scheduler
+from src.bot.services.perf import get_perf_counters
+from src.bot.services.reconcile import get_edit_watcher
+from src.bot.services.reference_store import learn_committed_rows, load_references, save_references
+from src.bot.services.search_index import get_search_index
+from src.bot.services.temperatures import get_temperature_series
+from src.bot.services.workers import get_parse_pool, stop_committers
+from src.bot.webhook import run_webhook
 from src.core.config import get_settings
 
 LOG_FORMAT = (
@@ -21,14 +40,116 @@ def setup_logging() -> None:
     logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, datefmt="%Y-%m-%dT%H:%M:%S%z", force=True)
 
 
-async def on_startup(dispatcher: Dispatcher) -> None:
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def _check_workbook_in_background() -> None:
+    logger = logging.getLogger(__name__)
+    try:
+        await asyncio.to_thread(ensure_workbook_ready)
+        logger.info("Background check of the Excel workbook finished.")
+    except Exception as exc:  # pragma: no cover - reported, the bot keeps running
+        logger.exception("Background check of the Excel workbook failed: %s", exc)
+
+
+async def _start_search_index() -> None:
+    logger = logging.getLogger(__name__)
+    try:
+        await asyncio.to_thread(get_search_index().start)
+    except Exception as exc:  # pragma: no cover - /search reports the index as not ready
+        logger.exception("Failed to start the search index: %s", exc)
+
+
+async def _start_temperature_series() -> None:
+    logger = logging.getLogger(__name__)
+    try:
+        await asyncio.to_thread(get_temperature_series().start)
+    except Exception as exc:  # pragma: no cover - /temperatures reports the series as not ready
+        logger.exception("Failed to start the temperature series: %s", exc)
+
+
+def _spawn(coroutine) -> None:
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def on_startup(dispatcher: Dispatcher, bot: Bot) -> None:
     logger = logging.getLogger(__name__)
+    settings = get_settings()
+
+    if migrate_legacy_journal():
+        logger.info("Free-text notes moved from %s to %s.", settings.xlsx_path, settings.journal_path)
+
+    if is_workbook_unchanged():
+        logger.info("Excel workbook is unchanged since the last check, skipping the full check.")
+    elif settings.xlsx_path.exists():
+        logger.info("Excel workbook changed since the last check, reconciling it in the background.")
+        _spawn(_check_workbook_in_background())
+    else:
+        try:
+            ensure_workbook_ready()
+            logger.info("Excel workbook is ready for use.")
+        except Exception as exc:  # pragma: no cover - startup safety
+            logger.exception("Failed to prepare Excel workbook: %s", exc)
+            raise
+
     try:
-        ensure_workbook_ready()
-        logger.info("Excel workbook is ready for use.")
-    except Exception as exc:  # pragma: no cover - startup safety
-        logger.exception("Failed to prepare Excel workbook: %s", exc)
-        raise
+        await asyncio.to_thread(load_references)
+    except Exception as exc:  # pragma: no cover - reports are parsed without the dictionary
+        logger.exception("Failed to load the reference dictionary: %s", exc)
+    add_commit_listener(learn_committed_rows)
+
+    get_parse_pool().start()
+    get_perf_counters().start_loop_monitor()
+
+    async def send_feed_message(chat_id: int, text: str) -> None:
+        with bulk_priority():
+            await bot.send_message(chat_id, text)
+
+    change_feed = get_change_feed()
+    change_feed.start(send=send_feed_message)
+    add_commit_listener(change_feed.publish_rows_threadsafe)
+
+    _spawn(_start_search_index())
+    _spawn(_start_temperature_series())
+    get_edit_watcher().start()
+    if settings.hot_months:
+        get_compactor().start()
+
+
+async def on_shutdown(dispatcher: Dispatcher) -> None:
+    await get_compactor().stop()
+    await get_edit_watcher().stop()
+    await stop_committers()
+    get_parse_pool().shutdown()
+    remove_commit_listener(learn_committed_rows)
+    await asyncio.to_thread(save_references)
+
+    change_feed = get_change_feed()
+    remove_commit_listener(change_feed.publish_rows_threadsafe)
+    await change_feed.stop()
+    get_search_index().stop()
+    get_temperature_series().stop()
+    await get_outbound_scheduler().stop()
+    await get_perf_counters().stop_loop_monitor()
+
+
+def build_dispatcher() -> Dispatcher:
+    dispatcher = Dispatcher(storage=MemoryStorage())
+    dispatcher.message.middleware(get_import_admission())
+
+    dispatcher.include_router(start.router)
+    dispatcher.include_router(menu.router)
+    dispatcher.include_router(feed.router)
+    dispatcher.include_router(search.router)
+    dispatcher.include_router(temperatures.router)
+    dispatcher.include_router(perf.router)
+    dispatcher.include_router(add_record.router)
+
+    dispatcher.startup.register(on_startup)
+    dispatcher.shutdown.register(on_shutdown)
+    return dispatcher
 
 
 async def run_bot() -> None:
@@ -40,16 +161,22 @@ async def run_bot() -> None:
     except locale.Error:
         logging.getLogger(__name__).warning("Locale '%s' is not available on this system.", settings.locale)
 
-    bot = Bot(token=settings.bot_token, default=DefaultBotProperties(parse_mode=None))
-    dispatcher = Dispatcher(storage=MemoryStorage())
+    session = None
+    if settings.telegram_api_url:
+        # A self-hosted Bot API server, or the local stand-in used by tests/load_harness.py.
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.telegram_api_url))
 
-    dispatcher.include_router(start.router)
-    dispatcher.include_router(menu.router)
-    dispatcher.include_router(add_record.router)
+    bot = Bot(token=settings.bot_token, session=session, default=DefaultBotProperties(parse_mode=None))
+    bot.session.middleware(get_outbound_scheduler())
+    dispatcher = build_dispatcher()
 
-    dispatcher.startup.register(on_startup)
+    if settings.webhook_url:
+        logging.getLogger(__name__).info("Starting Telegram bot in webhook mode.")
+        await run_webhook(dispatcher, bot, settings)
+        return
 
     logging.getLogger(__name__).info("Starting Telegram bot polling.")
+    await bot.delete_webhook()
     await dispatcher.start_polling(bot)
 
 
@@ -30,7 +30,199 @@ fi
 TOTAL_TESTS=$((TOTAL_TESTS + 1))
 
 echo -e "\n======================================"
-echo "3. Docker Configuration Tests"
+echo "3. Multi-worker Load Tests"
+echo "======================================"
+if python tests/test_workers.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "4. Webhook Replay Tests"
+echo "======================================"
+if python tests/test_webhook.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "5. Document Ingestion Tests"
+echo "======================================"
+if python tests/test_ingest.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "6. Batch Normalization Tests"
+echo "======================================"
+if python tests/test_normalize.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "7. Startup Manifest Benchmark"
+echo "======================================"
+if python tests/test_manifest.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "8. Cache Tests"
+echo "======================================"
+if python tests/test_caches.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "9. Snapshot Read Tests"
+echo "======================================"
+if python tests/test_snapshot_reads.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "10. Change Feed Tests"
+echo "======================================"
+if python tests/test_change_feed.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "11. Outbound Scheduler Tests"
+echo "======================================"
+if python tests/test_outbound.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "12. Search Index Tests"
+echo "======================================"
+if python tests/test_search_index.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "13. Separate Stores Tests"
+echo "======================================"
+if python tests/test_stores.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "14. Load Harness Smoke Test"
+echo "======================================"
+if python tests/test_load_harness.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "15. Shards Tests"
+echo "======================================"
+if python tests/test_shards.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "16. Reconcile Tests"
+echo "======================================"
+if python tests/test_reconcile.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "17. Interning Tests"
+echo "======================================"
+if python tests/test_interning.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "18. Archive Tests"
+echo "======================================"
+if python tests/test_archive.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "19. Perf Tests"
+echo "======================================"
+if python tests/test_perf.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "20. Admission Tests"
+echo "======================================"
+if python tests/test_admission.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "21. Reference Dictionary Tests"
+echo "======================================"
+if python tests/test_references.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "22. Rebuild Tests"
+echo "======================================"
+if python tests/test_rebuild.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "23. Temperature Series Tests"
+echo "======================================"
+if python tests/test_temperatures.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "24. Import Time Tests"
+echo "======================================"
+if python tests/test_import_time.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "25. Document Cache Tests"
+echo "======================================"
+if python tests/test_document_cache.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "26. Download Watermark Tests"
+echo "======================================"
+if python tests/test_watermarks.py; then
+    PASSED_TESTS=$((PASSED_TESTS + 1))
+fi
+TOTAL_TESTS=$((TOTAL_TESTS + 1))
+
+echo -e "\n======================================"
+echo "27. Docker Configuration Tests"
 echo "======================================"
 if bash tests/test_docker.sh; then
     PASSED_TESTS=$((PASSED_TESTS + 1))
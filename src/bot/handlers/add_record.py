@@ -1,21 +1,33 @@
 from __future__ import annotations
 
 import logging
+import tempfile
+import time
+from pathlib import Path
 
-from aiogram import Router
+from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message
 
 from src.bot.keyboards.main_menu import build_main_menu
-from src.bot.services.excel import ExcelServiceError, ExcelValidationError, append_message_row, append_plavka_rows
-from src.bot.services.parser import ParserError, parse_shift_report
+from src.bot.services.admission import IMPORT_FLAG
+from src.bot.services.excel import ExcelServiceError, ExcelValidationError, append_message_row
+from src.bot.services.ingest import SUPPORTED_DOCUMENT_SUFFIXES, IngestProgress, ingest_document
+from src.bot.services.parser import ParserError
+from src.bot.services.perf import get_perf_counters
+from src.bot.services.shards import shard_for_chat
+from src.bot.services.workers import get_committer, get_parse_pool
 
 logger = logging.getLogger(__name__)
 
 router = Router()
 
+MAX_DOCUMENT_SIZE = 20 * 1024 * 1024  # Bot API download limit
+PROGRESS_EDIT_INTERVAL = 3  # seconds
+
 
 class AddRecordState(StatesGroup):
     waiting_for_text = State()
@@ -24,13 +36,102 @@ class AddRecordState(StatesGroup):
 @router.message(Command("cancel"), AddRecordState.waiting_for_text)
 async def cancel_add_record(message: Message, state: FSMContext) -> None:
     await state.clear()
-    await message.answer("Добавление записи отменено.", reply_markup=build_main_menu())
+    await message.answer("Добавление записи отменено.", reply_markup=build_main_menu(message.from_user))
+
+
+def _format_ingest_progress(progress: IngestProgress, done: bool) -> str:
+    title = "✅ Файл обработан." if done else "⏳ Импорт отчётов из файла…"
+    text = (
+        f"{title}\n\n"
+        f"Отчётов прочитано: {progress.reports}\n"
+        f"Плавок найдено: {progress.plavki}\n"
+        f"Записано в Excel: {progress.rows_committed}"
+    )
+    if progress.failed_reports:
+        text += f"\nОтчётов с ошибками: {progress.failed_reports}"
+        if done:
+            text += "\n\n" + "\n".join(progress.errors[:5])
+    return text
+
+
+async def _edit_status(status: Message, text: str) -> None:
+    # The status message may have been deleted, or already show this text.
+    try:
+        await status.edit_text(text)
+    except TelegramBadRequest:
+        pass
+
+
+@router.message(AddRecordState.waiting_for_text, F.document, flags={IMPORT_FLAG: True})
+async def process_add_document(message: Message, state: FSMContext) -> None:
+    document = message.document
+    suffix = Path(document.file_name or "").suffix.lower()
+    if suffix not in SUPPORTED_DOCUMENT_SUFFIXES:
+        await message.answer(
+            f"Поддерживаются файлы {', '.join(SUPPORTED_DOCUMENT_SUFFIXES)} с отчётами о смене."
+        )
+        return
+    if document.file_size and document.file_size > MAX_DOCUMENT_SIZE:
+        await message.answer("Файл слишком большой. Максимальный размер — 20 МБ.")
+        return
+
+    started = time.perf_counter()
+    status = await message.answer("⏳ Загружаю файл…")
+    last_edit = 0.0
+
+    async def report_progress(progress: IngestProgress) -> None:
+        nonlocal last_edit
+        now = time.monotonic()
+        if now - last_edit < PROGRESS_EDIT_INTERVAL:
+            return
+        last_edit = now
+        await _edit_status(status, _format_ingest_progress(progress, done=False))
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            document_path = Path(tmp_dir) / f"reports{suffix}"
+            await message.bot.download(document, destination=document_path)
+            progress = await ingest_document(
+                document_path,
+                commit=get_committer(shard_for_chat(message.chat.id)).commit,
+                on_progress=report_progress,
+            )
+    except ParserError as exc:
+        await _edit_status(status, f"⚠️ {exc}")
+        return
+    except ExcelValidationError as exc:
+        logger.exception("Excel validation error while importing a document: %s", exc)
+        await _edit_status(
+            status,
+            "⚠️ Не удалось сохранить плавки: структура plavka.xlsx отличается от ожидаемой. "
+            "Обратитесь к администратору."
+        )
+        return
+    except ExcelServiceError as exc:
+        logger.exception("Excel service error while importing a document: %s", exc)
+        await _edit_status(status, str(exc))
+        return
+
+    get_perf_counters().import_latency.record(time.perf_counter() - started)
+    logger.info(
+        "Imported document %s: %d reports, %d rows, %d failed",
+        document.file_name,
+        progress.reports,
+        progress.rows_committed,
+        progress.failed_reports,
+    )
+    await _edit_status(status, _format_ingest_progress(progress, done=True))
+    await state.clear()
+    await message.answer("Выберите действие:", reply_markup=build_main_menu(message.from_user))
 
 
-@router.message(AddRecordState.waiting_for_text)
+@router.message(AddRecordState.waiting_for_text, flags={IMPORT_FLAG: True})
 async def process_add_record(message: Message, state: FSMContext) -> None:
     if not message.text or not message.text.strip():
-        await message.answer("Пожалуйста, отправьте текстовое сообщение для записи в журнал.")
+        await message.answer(
+            "Пожалуйста, отправьте текстовое сообщение для записи в журнал "
+            "или файл .txt/.csv/.xlsx с отчётами о смене."
+        )
         return
 
     record_text = message.text.strip()
@@ -41,8 +142,9 @@ async def process_add_record(message: Message, state: FSMContext) -> None:
         logger.warning("Received message without sender data. message_id=%s", message.message_id)
         return
 
+    started = time.perf_counter()
     try:
-        report = parse_shift_report(record_text)
+        report = await get_parse_pool().parse(record_text)
         logger.info("Parsed shift report with %d plavok", len(report.plavki))
         
         rows = []
@@ -51,7 +153,8 @@ async def process_add_record(message: Message, state: FSMContext) -> None:
             rows.append(plavka.to_excel_row(next_id))
             next_id += 1
         
-        rows_added = append_plavka_rows(rows)
+        rows_added = await get_committer(shard_for_chat(message.chat.id)).commit(rows)
+        get_perf_counters().import_latency.record(time.perf_counter() - started)
         await state.clear()
         await message.answer(
             f"✅ Отчёт о смене успешно импортирован!\n\n"
@@ -59,7 +162,7 @@ async def process_add_record(message: Message, state: FSMContext) -> None:
             f"Записано в Excel: {rows_added}\n"
             f"Дата: {report.header.get('Дата', 'не указана')}\n"
             f"Старший смены: {report.header.get('Старший_смены', 'не указан')}",
-            reply_markup=build_main_menu()
+            reply_markup=build_main_menu(message.from_user)
         )
         return
     except ParserError as exc:
@@ -76,7 +179,7 @@ async def process_add_record(message: Message, state: FSMContext) -> None:
     except ExcelValidationError as exc:
         logger.exception("Excel validation error while appending a row: %s", exc)
         await message.answer(
-            "⚠️ Не удалось сохранить запись: структура plavka.xlsx отличается от ожидаемой. "
+            "⚠️ Не удалось сохранить запись: структура журнала заметок отличается от ожидаемой. "
             "Обратитесь к администратору."
         )
         return
@@ -90,4 +193,4 @@ async def process_add_record(message: Message, state: FSMContext) -> None:
         return
 
     await state.clear()
-    await message.answer("✅ Запись сохранена в plavka.xlsx.", reply_markup=build_main_menu())
+    await message.answer("✅ Заметка сохранена в журнал.", reply_markup=build_main_menu(message.from_user))
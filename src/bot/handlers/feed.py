@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from src.bot.services.change_feed import get_change_feed
+
+router = Router()
+
+
+@router.message(Command("subscribe"))
+async def handle_subscribe(message: Message) -> None:
+    if get_change_feed().subscriptions.add(message.chat.id):
+        await message.answer(
+            "🔔 Чат подписан на новые плавки. Уведомления приходят пакетами по мере импорта. "
+            "Отписаться: /unsubscribe"
+        )
+    else:
+        await message.answer("Чат уже подписан на новые плавки. Отписаться: /unsubscribe")
+
+
+@router.message(Command("unsubscribe"))
+async def handle_unsubscribe(message: Message) -> None:
+    if get_change_feed().subscriptions.discard(message.chat.id):
+        await message.answer("Подписка на новые плавки отключена.")
+    else:
+        await message.answer("Чат не подписан на новые плавки. Подписаться: /subscribe")
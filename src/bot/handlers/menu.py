@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import tempfile
 from pathlib import Path
 
 from aiogram import F, Router
@@ -11,11 +13,30 @@ from src.bot.handlers.add_record import AddRecordState
 from src.bot.keyboards.main_menu import (
     MENU_ADD_RECORD,
     MENU_DOWNLOAD,
+    MENU_DOWNLOAD_DELTA,
     MENU_HELP,
     MENU_LAST_RECORDS,
     build_main_menu,
+    is_admin,
 )
-from src.bot.services.excel import ExcelServiceError, ExcelValidationError, get_last_rows
+from src.bot.services.archive import archive_dir
+from src.bot.services.document_cache import get_document_cache
+from src.bot.services.excel import (
+    ExcelServiceError,
+    ExcelValidationError,
+    export_rows_since,
+    get_last_rows,
+)
+from src.bot.services.manifest import current_manifest, file_fingerprint
+from src.bot.services.render_cache import get_render_cache
+from src.bot.services.shards import (
+    export_merged,
+    shard_for_chat,
+    store_path,
+    store_paths,
+    stores_version,
+)
+from src.bot.services.watermarks import get_watermarks
 from src.core.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -23,6 +44,7 @@ logger = logging.getLogger(__name__)
 router = Router()
 
 RECENT_RECORDS_LIMIT = 10
+RECENT_NOTES_LIMIT = 5
 
 
 def _format_last_rows(rows: list[list[str | int | None]]) -> str:
@@ -66,7 +88,8 @@ async def menu_add_record(callback: CallbackQuery, state: FSMContext) -> None:
     await callback.answer()
     await state.set_state(AddRecordState.waiting_for_text)
     await message.answer(
-        "Отправьте текст сообщения, который необходимо добавить в plavka.xlsx."
+        "Отправьте отчёт о смене или файл .txt/.csv/.xlsx с отчётами — плавки попадут в plavka.xlsx. "
+        "Любой другой текст сохранится как заметка в журнале."
     )
 
 
@@ -79,8 +102,19 @@ async def menu_last_records(callback: CallbackQuery) -> None:
 
     await callback.answer()
 
+    # Each chat sees the plavki of its own store, in commit order.
+    shard = shard_for_chat(message.chat.id)
+    cache_key = (MENU_LAST_RECORDS, shard)
+    render_cache = get_render_cache()
+    version = stores_version(get_settings().journal_path)
+    formatted_rows = render_cache.get(cache_key, version)
+    if formatted_rows is not None:
+        await message.answer(formatted_rows, reply_markup=build_main_menu(callback.from_user))
+        return
+
     try:
-        rows = get_last_rows(RECENT_RECORDS_LIMIT)
+        rows = get_last_rows(RECENT_RECORDS_LIMIT, xlsx_path=store_path(shard))
+        notes = get_last_rows(RECENT_NOTES_LIMIT, xlsx_path=get_settings().journal_path)
     except ExcelValidationError as exc:
         logger.exception("Validation error while reading recent rows: %s", exc)
         await message.answer(
@@ -97,7 +131,10 @@ async def menu_last_records(callback: CallbackQuery) -> None:
         return
 
     formatted_rows = _format_last_rows(rows)
-    await message.answer(formatted_rows, reply_markup=build_main_menu())
+    if notes:
+        formatted_rows = f"{formatted_rows}\n\n📝 Последние заметки:\n\n{_format_last_rows(notes)}"
+    render_cache.put(cache_key, version, formatted_rows)
+    await message.answer(formatted_rows, reply_markup=build_main_menu(callback.from_user))
 
 
 @router.callback_query(F.data == MENU_DOWNLOAD)
@@ -109,16 +146,99 @@ async def menu_download(callback: CallbackQuery) -> None:
 
     await callback.answer()
 
-    settings = get_settings()
-    xlsx_path: Path = settings.xlsx_path
-    if not xlsx_path.exists():
+    paths = store_paths()
+    if not paths:
         await message.answer(
             "Файл plavka.xlsx пока не создан. Добавьте запись, чтобы создать файл автоматически."
         )
         return
 
-    document = FSInputFile(xlsx_path)
-    await message.answer_document(document)
+    async def upload() -> str | None:
+        if len(paths) == 1 and not archive_dir(next(iter(paths.values()))).exists():
+            sent = await message.answer_document(FSInputFile(next(iter(paths.values()))))
+        else:
+            # Shards and archived months are merged into one consolidated workbook on demand.
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                export_path = Path(tmp_dir) / "plavka.xlsx"
+                await asyncio.to_thread(export_merged, export_path, list(paths.values()))
+                sent = await message.answer_document(FSInputFile(export_path))
+        return sent.document.file_id if sent.document else None
+
+    async def send_cached(file_id: str) -> None:
+        await message.answer_document(file_id)
+
+    # Row counts are taken before the upload, from the same manifests as the
+    # version: rows committed while the file is sent stay above the watermark.
+    manifests = {shard: current_manifest(path) for shard, path in paths.items()}
+    version = tuple(
+        (shard, *(manifests[shard].fingerprint if manifests[shard] else file_fingerprint(path) or ()))
+        for shard, path in paths.items()
+    )
+    try:
+        await get_document_cache().send(version, upload, send_cached)
+    except ExcelValidationError as exc:
+        logger.exception("Validation error while merging plavka stores: %s", exc)
+        await message.answer(
+            "⚠️ Не удалось прочитать plavka.xlsx: структура файла отличается от ожидаемой."
+        )
+        return
+
+    watermarks = get_watermarks()
+    for shard, manifest in manifests.items():
+        if manifest is not None:
+            watermarks.set(callback.from_user.id, manifest.row_count, shard)
+
+
+@router.callback_query(F.data == MENU_DOWNLOAD_DELTA)
+async def menu_download_delta(callback: CallbackQuery) -> None:
+    message = callback.message
+    if message is None:
+        await callback.answer("Сообщение недоступно.", show_alert=True)
+        return
+
+    await callback.answer()
+
+    shard = shard_for_chat(message.chat.id)
+    xlsx_path = store_path(shard)
+    if not xlsx_path.exists():
+        await message.answer(
+            f"Файл {xlsx_path.name} пока не создан. Добавьте запись, чтобы создать файл автоматически."
+        )
+        return
+
+    watermarks = get_watermarks()
+    since_row = watermarks.get(callback.from_user.id, shard)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        export_path = Path(tmp_dir) / "plavka_delta.xlsx"
+        try:
+            rows_written, row_count = await asyncio.to_thread(
+                export_rows_since, since_row, export_path, xlsx_path=xlsx_path
+            )
+        except ExcelValidationError as exc:
+            logger.exception("Validation error while exporting new rows: %s", exc)
+            await message.answer(
+                "⚠️ Не удалось прочитать plavka.xlsx: структура файла отличается от ожидаемой."
+            )
+            return
+        except ExcelServiceError as exc:
+            logger.exception("Service error while exporting new rows: %s", exc)
+            await message.answer(str(exc))
+            return
+
+        if not rows_written:
+            watermarks.set(callback.from_user.id, row_count, shard)
+            await message.answer(
+                "Новых записей с момента вашей последней выгрузки нет.", reply_markup=build_main_menu(callback.from_user)
+            )
+            return
+
+        filename = f"{xlsx_path.stem}_{since_row + 1}-{row_count}.xlsx"
+        await message.answer_document(
+            FSInputFile(export_path, filename=filename),
+            caption=f"Новых записей: {rows_written}",
+        )
+    watermarks.set(callback.from_user.id, row_count, shard)
 
 
 @router.callback_query(F.data == MENU_HELP)
@@ -132,9 +252,15 @@ async def menu_help(callback: CallbackQuery) -> None:
 
     help_text = (
         "ℹ️ Журнал смен — управление через меню:\n\n"
-        "• «Добавить запись» — отправьте текст, и он попадёт в plavka.xlsx.\n"
-        "• «Последние записи» — покажет последние 10 записей из журнала.\n"
+        "• «Добавить запись» — отчёт о смене попадёт в plavka.xlsx, обычный текст — в журнал заметок.\n"
+        "• «Последние записи» — покажет последние 10 плавок и 5 заметок.\n"
         "• «Скачать plavka.xlsx» — получите актуальный файл.\n"
-        "• «Справка» — это сообщение."
+        "• «Скачать новые записи» — только строки, добавленные после вашей последней выгрузки.\n"
+        "• «Справка» — это сообщение.\n\n"
+        "Команды: /search <слова> — поиск по комментариям и заметкам, "
+        "/temperatures — температура заливки по секторам и месяцам, "
+        "/subscribe и /unsubscribe — уведомления о новых плавках."
     )
-    await message.answer(help_text, reply_markup=build_main_menu())
+    if is_admin(callback.from_user):
+        help_text += "\n/perf — задержки импорта, очереди и кэши бота."
+    await message.answer(help_text, reply_markup=build_main_menu(callback.from_user))
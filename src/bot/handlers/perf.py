@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from aiogram import F, Router
+from aiogram.filters import Command
+from aiogram.types import CallbackQuery, Message
+
+from src.bot.keyboards.main_menu import MENU_PERF, build_main_menu, is_admin
+from src.bot.services.admission import get_import_admission
+from src.bot.services.document_cache import get_document_cache
+from src.bot.services.manifest import current_manifest
+from src.bot.services.outbound import get_outbound_scheduler
+from src.bot.services.perf import LatencySamples, get_perf_counters
+from src.bot.services.reconcile import watched_stores
+from src.bot.services.render_cache import get_render_cache
+from src.bot.services.workers import pending_commits
+
+router = Router()
+
+ADMINS_ONLY = "Команда доступна только администраторам."
+
+
+def _format_samples(samples: LatencySamples, scale: float = 1.0, unit: str = "с") -> str:
+    if not len(samples):
+        return "нет данных"
+    return (
+        f"p50 {samples.percentile(0.5) * scale:.2f} {unit}, "
+        f"p99 {samples.percentile(0.99) * scale:.2f} {unit} "
+        f"(последние {len(samples)})"
+    )
+
+
+def _format_hit_rate(hits: int, misses: int) -> str:
+    total = hits + misses
+    if not total:
+        return "нет обращений"
+    return f"{hits / total:.0%} ({hits} из {total})"
+
+
+def format_perf_report() -> str:
+    """Counters of this process, as the admin ``/perf`` command shows them."""
+    counters = get_perf_counters()
+    render_cache = get_render_cache()
+    document_cache = get_document_cache()
+    outbound = get_outbound_scheduler().stats()
+    pending = pending_commits()
+    admission = get_import_admission().stats()
+
+    lines = [
+        "📊 Производительность",
+        "",
+        f"Импорт отчёта: {_format_samples(counters.import_latency)}",
+        f"Ожидание блокировки Excel: {_format_samples(counters.lock_wait)}",
+        f"Задержка event loop: {_format_samples(counters.loop_lag, 1000, 'мс')}, "
+        f"макс {counters.loop_lag.maximum() * 1000:.0f} мс",
+        "",
+        f"Импорты: {admission['active']} выполняются, {admission['queued']} ждут; "
+        f"принято {admission['admitted']}, отклонено {admission['rejected']}",
+        f"Очередь записи: {sum(pending.values())} отчётов",
+        f"Исходящие сообщения: ответы {outbound['ack']['queued']:.0f}, рассылка {outbound['bulk']['queued']:.0f} "
+        f"в очереди; задержка рассылки p95 {outbound['bulk']['delay_p95']:.2f} с",
+        f"Кэш «Последние записи»: {_format_hit_rate(render_cache.hits, render_cache.misses)}",
+        f"Кэш выгрузок: {_format_hit_rate(document_cache.hits, document_cache.misses)}",
+        "",
+        "Книги:",
+    ]
+    for path, _kind in watched_stores():
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            continue
+        manifest = current_manifest(path)
+        rows = f"{manifest.row_count} строк" if manifest is not None else "строки не пересчитаны"
+        lines.append(f"• {path.name} — {size / 2**20:.1f} МБ, {rows}")
+    return "\n".join(lines)
+
+
+@router.message(Command("perf"))
+async def handle_perf(message: Message) -> None:
+    if not is_admin(message.from_user):
+        await message.answer(ADMINS_ONLY)
+        return
+    await message.answer(format_perf_report(), reply_markup=build_main_menu(message.from_user))
+
+
+@router.callback_query(F.data == MENU_PERF)
+async def menu_perf(callback: CallbackQuery) -> None:
+    message = callback.message
+    if message is None:
+        await callback.answer("Сообщение недоступно.", show_alert=True)
+        return
+    if not is_admin(callback.from_user):
+        await callback.answer(ADMINS_ONLY, show_alert=True)
+        return
+
+    await callback.answer()
+    await message.answer(format_perf_report(), reply_markup=build_main_menu(callback.from_user))
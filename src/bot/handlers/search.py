@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from src.bot.services.search_index import SearchHit, get_search_index
+
+router = Router()
+
+MAX_SNIPPET_LENGTH = 200
+
+
+def _format_hits(query: str, hits: list[SearchHit], total: int) -> str:
+    lines = [f"🔎 «{query}»: найдено {total}"]
+    if total > len(hits):
+        lines[0] += f", показаны последние {len(hits)}"
+    for hit in hits:
+        text = hit.text if len(hit.text) <= MAX_SNIPPET_LENGTH else hit.text[:MAX_SNIPPET_LENGTH] + "…"
+        lines.append(f"\n• {hit.label}\n{text}")
+    return "\n".join(lines)
+
+
+@router.message(Command("search"))
+async def handle_search(message: Message, command: CommandObject) -> None:
+    query = (command.args or "").strip()
+    if not query:
+        await message.answer(
+            "Использование: /search <слова>\n"
+            "Ищет по комментариям плавок и заметкам журнала; слова можно сокращать: /search трещ"
+        )
+        return
+
+    index = get_search_index()
+    if not index.ready:
+        await message.answer("Поисковый индекс ещё строится. Попробуйте через минуту.")
+        return
+
+    hits, total = index.search(query)
+    if not hits:
+        await message.answer(f"По запросу «{query}» ничего не найдено.")
+        return
+    await message.answer(_format_hits(query, hits, total))
@@ -11,5 +11,5 @@ router = Router()
 async def handle_start(message: Message) -> None:
     await message.answer(
         "Привет! Это журнал смен. Используйте меню, чтобы добавить запись или посмотреть последние события.",
-        reply_markup=build_main_menu(),
+        reply_markup=build_main_menu(message.from_user),
     )
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from src.bot.services.temperatures import (
+    SECTORS,
+    TemperatureHistory,
+    TemperatureSeries,
+    epoch_day,
+    get_temperature_series,
+)
+
+router = Router()
+
+DEFAULT_DAYS = 365
+TREND_MONTHS = 12
+USAGE = (
+    "Использование: /temperatures [с ДД.ММ.ГГГГ] [по ДД.ММ.ГГГГ]\n"
+    "Средняя, минимальная и максимальная температура заливки по секторам, "
+    f"средние по месяцам и распределение; по умолчанию за последние {DEFAULT_DAYS} дней."
+)
+
+
+def _parse_day(text: str) -> Optional[date]:
+    try:
+        return datetime.strptime(text, "%d.%m.%Y").date()
+    except ValueError:
+        return None
+
+
+def _format_degrees(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value:.0f}"
+
+
+def format_temperature_report(series: TemperatureHistory | TemperatureSeries, first: date, last: date) -> str:
+    first_day, last_day = epoch_day(first), epoch_day(last)
+    summary = series.summary(first_day, last_day)
+    lines = [f"🌡 Температура заливки, {first:%d.%m.%Y} — {last:%d.%m.%Y}", ""]
+    for sector in SECTORS:
+        stats = summary[sector]
+        if not stats.count:
+            lines.append(f"Сектор {sector}: нет данных")
+            continue
+        lines.append(
+            f"Сектор {sector}: в среднем {stats.mean:.0f} °C "
+            f"({stats.minimum:.0f}–{stats.maximum:.0f}), плавок {stats.count}"
+        )
+    if not any(stats.count for stats in summary.values()):
+        return "\n".join(lines)
+
+    trend = series.trend(first_day, last_day)
+    lines += ["", "По месяцам, " + " / ".join(SECTORS) + ":"]
+    if len(trend) > TREND_MONTHS:
+        lines.append(f"(последние {TREND_MONTHS} из {len(trend)})")
+    for month, means in trend[-TREND_MONTHS:]:
+        lines.append(f"{month:%m.%Y}: " + " / ".join(_format_degrees(means[sector]) for sector in SECTORS))
+
+    histogram = series.histogram(first_day, last_day)
+    total = sum(histogram.values())
+    lines += ["", "Распределение, все секторы:"]
+    for edge, count in histogram.items():
+        lines.append(f"{edge:.0f}–{edge + 10:.0f} °C: {count} ({count / total:.0%})")
+    return "\n".join(lines)
+
+
+@router.message(Command("temperatures"))
+async def handle_temperatures(message: Message, command: CommandObject) -> None:
+    args: List[str] = (command.args or "").split()
+    days = [_parse_day(arg) for arg in args]
+    if len(args) > 2 or None in days:
+        await message.answer(USAGE)
+        return
+
+    series = get_temperature_series()
+    if not series.ready:
+        await message.answer("Температуры ещё загружаются. Попробуйте через минуту.")
+        return
+
+    last = days[1] if len(days) > 1 else date.today()
+    first = days[0] if days else last - timedelta(days=DEFAULT_DAYS - 1)
+    if first > last:
+        first, last = last, first
+    await message.answer(await asyncio.to_thread(format_temperature_report, series, first, last))
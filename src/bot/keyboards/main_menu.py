@@ -1,17 +1,31 @@
-from aiogram.types import InlineKeyboardMarkup
+from typing import Optional
+
+from aiogram.types import InlineKeyboardMarkup, User
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from src.core.config import get_settings
+
 MENU_ADD_RECORD = "menu:add_record"
 MENU_LAST_RECORDS = "menu:last_records"
 MENU_DOWNLOAD = "menu:download"
+MENU_DOWNLOAD_DELTA = "menu:download_delta"
 MENU_HELP = "menu:help"
+MENU_PERF = "menu:perf"
+
+
+def is_admin(user: Optional[User]) -> bool:
+    return user is not None and user.id in get_settings().admin_ids
 
 
-def build_main_menu() -> InlineKeyboardMarkup:
+def build_main_menu(user: Optional[User] = None) -> InlineKeyboardMarkup:
+    """Main menu; administrators listed in ``ADMIN_IDS`` also get «Производительность»."""
     builder = InlineKeyboardBuilder()
     builder.button(text="Добавить запись", callback_data=MENU_ADD_RECORD)
     builder.button(text="Последние записи", callback_data=MENU_LAST_RECORDS)
     builder.button(text="Скачать plavka.xlsx", callback_data=MENU_DOWNLOAD)
+    builder.button(text="Скачать новые записи", callback_data=MENU_DOWNLOAD_DELTA)
     builder.button(text="Справка", callback_data=MENU_HELP)
+    if is_admin(user):
+        builder.button(text="Производительность", callback_data=MENU_PERF)
     builder.adjust(1)
     return builder.as_markup()
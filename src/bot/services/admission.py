@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter, deque
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import Message, TelegramObject
+
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FLAG = "import"
+QUEUE_TIMEOUT = 10  # seconds, below the Excel LOCK_TIMEOUT
+
+USER_BUSY = "⏳ Предыдущий отчёт ещё записывается. Отправьте этот, когда придёт ответ."
+SATURATED = "⏳ Сейчас импортируется слишком много отчётов. Повторите попытку через минуту."
+
+
+class ImportAdmission(BaseMiddleware):
+    """Message middleware that admits imports into a bounded number of slots.
+
+    Handlers flagged with ``import`` run at most ``concurrency`` at a time and
+    at most ``per_user`` per sender, queued ones included. Up to
+    ``queue_size`` more wait for a slot in arrival order, each for at most
+    ``queue_timeout`` seconds; anything beyond that is answered right away,
+    so a burst of reports costs a short reply instead of a minute behind the
+    workbook lock.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        per_user: int,
+        queue_size: int,
+        queue_timeout: float = QUEUE_TIMEOUT,
+    ) -> None:
+        self.concurrency = concurrency
+        self.per_user = per_user
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._by_user: Counter[int] = Counter()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not get_flag(data, IMPORT_FLAG):
+            return await handler(event, data)
+
+        user = data.get("event_from_user")
+        user_id = user.id if user is not None else 0
+        if self._by_user[user_id] >= self.per_user:
+            return await self._reject(event, USER_BUSY)
+
+        self._by_user[user_id] += 1
+        try:
+            if not await self._acquire():
+                return await self._reject(event, SATURATED)
+            self.admitted += 1
+            try:
+                return await handler(event, data)
+            finally:
+                self._release()
+        finally:
+            self._by_user[user_id] -= 1
+            if not self._by_user[user_id]:
+                del self._by_user[user_id]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self._active,
+            "queued": sum(1 for waiter in self._waiters if not waiter.done()),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    async def _acquire(self) -> bool:
+        if self._active < self.concurrency and not self._waiters:
+            self._active += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Since Python 3.12 ``wait_for`` may time out after ``_release``
+            # already handed this waiter the slot; pass it on.
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        return True
+
+    def _release(self) -> None:
+        # Hand the slot straight to the oldest waiter still waiting.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    async def _reject(self, event: TelegramObject, text: str) -> None:
+        self.rejected += 1
+        logger.info("Import rejected (%s active, %s queued): %s", self._active, len(self._waiters), text)
+        if isinstance(event, Message):
+            await event.answer(text)
+
+
+@lru_cache(maxsize=1)
+def get_import_admission() -> ImportAdmission:
+    settings = get_settings()
+    return ImportAdmission(
+        concurrency=settings.import_concurrency,
+        per_user=settings.import_per_user,
+        queue_size=settings.import_queue,
+    )
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import gzip
+import heapq
+import json
+import logging
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.bot.services.manifest import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 1
+MEMBER_ROWS = 1000
+
+_DAY_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+@dataclass
+class ArchiveSegment:
+    """One immutable ``.jsonl.gz`` file holding the archived rows of a month.
+
+    The file is a series of gzip members of ``MEMBER_ROWS`` lines each;
+    ``index`` lists ``[first_row, offset]`` of every member, so a read that
+    starts at some row skips straight to the member holding it. ``summary``
+    holds aggregates that can be read without opening the file.
+    """
+
+    name: str
+    month: str
+    first_row: int
+    last_row: int
+    rows: int
+    index: List[List[int]]
+    summary: Dict[str, object]
+
+
+@dataclass
+class ArchiveCatalog:
+    """The archive of a store, kept in ``<store>.archive/catalog.json``.
+
+    Data rows ``1..archived_rows`` live in ``segments``, the workbook holds
+    the rest and keeps numbering them from ``archived_rows + 1``.
+    ``checksums`` are the block checksums of the archived rows alone; the
+    last one may cover a block the workbook continues. ``fingerprint`` is
+    the workbook the compaction left behind.
+    """
+
+    archived_rows: int = 0
+    checksums: List[str] = field(default_factory=list)
+    segments: List[ArchiveSegment] = field(default_factory=list)
+    fingerprint: Optional[List[int]] = None
+    version: int = CATALOG_VERSION
+
+
+def archive_dir(xlsx_path: Path) -> Path:
+    return xlsx_path.with_name(f"{xlsx_path.name}.archive")
+
+
+def _catalog_path(xlsx_path: Path, pending: bool = False) -> Path:
+    return archive_dir(xlsx_path) / ("catalog.next.json" if pending else "catalog.json")
+
+
+def _read_catalog(path: Path) -> Optional[ArchiveCatalog]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    data["segments"] = [ArchiveSegment(**segment) for segment in data.get("segments", [])]
+    catalog = ArchiveCatalog(**data)
+    if catalog.version != CATALOG_VERSION:
+        raise ValueError(f"unsupported archive catalog version {catalog.version}")
+    return catalog
+
+
+def load_catalog(xlsx_path: Path) -> ArchiveCatalog:
+    """Catalog matching the workbook on disk; empty if the store was never compacted.
+
+    A compaction writes ``catalog.next.json`` before it replaces the
+    workbook and renames it afterwards, so the pending catalog counts as soon
+    as the workbook it describes is in place. Raises ``ValueError`` if the
+    catalog cannot be read: guessing would renumber every row.
+    """
+    try:
+        pending = _read_catalog(_catalog_path(xlsx_path, pending=True))
+        if pending is not None and pending.fingerprint == file_fingerprint(xlsx_path):
+            return pending
+        return _read_catalog(_catalog_path(xlsx_path)) or ArchiveCatalog()
+    except (OSError, TypeError, KeyError) as exc:
+        raise ValueError(f"unreadable archive catalog of {xlsx_path.name}: {exc}") from exc
+
+
+def stage_catalog(xlsx_path: Path, catalog: ArchiveCatalog) -> None:
+    path = _catalog_path(xlsx_path, pending=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(asdict(catalog), ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def settle_catalog(xlsx_path: Path) -> None:
+    """Finish or roll back an interrupted compaction; the caller holds the store lock."""
+    pending_path = _catalog_path(xlsx_path, pending=True)
+    try:
+        pending = _read_catalog(pending_path)
+    except (OSError, ValueError, TypeError, KeyError):
+        pending = None
+    if pending is not None and pending.fingerprint == file_fingerprint(xlsx_path):
+        os.replace(pending_path, _catalog_path(xlsx_path))
+    else:
+        pending_path.unlink(missing_ok=True)
+
+
+def _day(value: object) -> Optional[str]:
+    if isinstance(value, (date, datetime)):
+        return f"{value.year:04d}-{value.month:02d}-{value.day:02d}"
+    if isinstance(value, str) and _DAY_RE.match(value):
+        return value[:10]
+    return None
+
+
+def row_month(value: object) -> Optional[str]:
+    """``YYYY-MM`` of a date cell or of an ISO timestamp, ``None`` if there is none."""
+    day = _day(value)
+    return day[:7] if day is not None else None
+
+
+def _encode(value: object) -> object:
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"date": value.isoformat()}
+    if isinstance(value, time):
+        return {"time": value.isoformat()}
+    raise TypeError(f"cannot archive a value of type {type(value).__name__}")
+
+
+def _decode(entry: Dict[str, str]) -> object:
+    kind, text = next(iter(entry.items()))
+    return {"datetime": datetime, "date": date, "time": time}[kind].fromisoformat(text)
+
+
+class SegmentWriter:
+    """Writes the rows of one month to a new segment file.
+
+    ``count_columns`` and ``total_columns`` map summary names to column
+    indexes: the former count rows per distinct value, the latter keep the
+    sum and the number of numeric values, enough for an average.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        name: str,
+        month: str,
+        *,
+        date_column: int,
+        count_columns: Dict[str, int],
+        total_columns: Dict[str, int],
+    ) -> None:
+        self.path = directory / name
+        self.segment = ArchiveSegment(
+            name=name,
+            month=month,
+            first_row=0,
+            last_row=0,
+            rows=0,
+            index=[],
+            summary={"first_date": None, "last_date": None, "counts": {}, "totals": {}},
+        )
+        self._date_column = date_column
+        self._count_columns = count_columns
+        self._total_columns = total_columns
+        self._tmp_path = self.path.with_name(f"{name}.tmp")
+        self._file = self._tmp_path.open("wb")
+        self._lines: List[str] = []
+        self._member_first_row = 0
+
+    def _summarize(self, row: Sequence[object]) -> None:
+        summary = self.segment.summary
+        value = row[self._date_column] if len(row) > self._date_column else None
+        day = _day(value)
+        if day is not None:
+            if summary["first_date"] is None or day < summary["first_date"]:
+                summary["first_date"] = day
+            if summary["last_date"] is None or day > summary["last_date"]:
+                summary["last_date"] = day
+        for name, column in self._count_columns.items():
+            value = row[column] if len(row) > column else None
+            if value not in (None, ""):
+                counts = summary["counts"].setdefault(name, {})
+                counts[str(value)] = counts.get(str(value), 0) + 1
+        for name, column in self._total_columns.items():
+            value = row[column] if len(row) > column else None
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                total = summary["totals"].setdefault(name, [0.0, 0])
+                total[0] += value
+                total[1] += 1
+
+    def _flush(self) -> None:
+        if self._lines:
+            self.segment.index.append([self._member_first_row, self._file.tell()])
+            self._file.write(gzip.compress(("\n".join(self._lines) + "\n").encode("utf-8")))
+            self._lines = []
+
+    def append(self, row_number: int, row: Sequence[object]) -> None:
+        if not self._lines:
+            self._member_first_row = row_number
+        self._lines.append(json.dumps([row_number, *row], ensure_ascii=False, default=_encode))
+        segment = self.segment
+        segment.first_row = segment.first_row or row_number
+        segment.last_row = row_number
+        segment.rows += 1
+        self._summarize(row)
+        if len(self._lines) == MEMBER_ROWS:
+            self._flush()
+
+    def close(self) -> ArchiveSegment:
+        self._flush()
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return self.segment
+
+    def discard(self) -> None:
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def segment_name(catalog: ArchiveCatalog, month: str) -> str:
+    """``2024-10.jsonl.gz``, or ``2024-10.1.jsonl.gz`` for rows of a month archived later on."""
+    parts = sum(segment.month == month for segment in catalog.segments)
+    return f"{month}.jsonl.gz" if parts == 0 else f"{month}.{parts}.jsonl.gz"
+
+
+def _iter_segment(xlsx_path: Path, segment: ArchiveSegment, since_row: int) -> Iterator[Tuple[int, List]]:
+    offset = 0
+    for first_row, member_offset in segment.index:
+        if first_row > since_row:
+            break
+        offset = member_offset
+    with (archive_dir(xlsx_path) / segment.name).open("rb") as raw:
+        raw.seek(offset)
+        with gzip.GzipFile(fileobj=raw) as lines:
+            for line in lines:
+                row_number, *row = json.loads(line, object_hook=_decode)
+                if row_number > since_row:
+                    yield row_number, row
+
+
+def iter_archived_rows(
+    xlsx_path: Path, catalog: ArchiveCatalog, since_row: int = 0, until_row: Optional[int] = None
+) -> Iterator[Tuple[int, List]]:
+    """``(row_number, row)`` of the archived rows after ``since_row``, in row order.
+
+    Only the segments holding rows in the range are opened, each from the
+    member that holds its first wanted row.
+    """
+    if until_row is None:
+        until_row = catalog.archived_rows
+    segments = [
+        segment for segment in catalog.segments if segment.last_row > since_row and segment.first_row <= until_row
+    ]
+    for row_number, row in heapq.merge(*(_iter_segment(xlsx_path, segment, since_row) for segment in segments)):
+        if row_number > until_row:
+            return
+        yield row_number, row
+
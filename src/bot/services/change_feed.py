@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.bot.services.parser import PlavkaRecord
+from src.bot.services.rate_limit import TokenBucket
+from src.bot.services.shards import shard_for_chat, shard_of_path
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 10  # seconds
+CHAT_MESSAGES_PER_MINUTE = 20
+MAX_LINES_PER_MESSAGE = 20
+
+
+class ChatSubscriptions:
+    """Set of chat ids subscribed to the change feed, persisted as JSON.
+
+    A chat is only told about plavki of the store it writes to, so the
+    subscribers are also kept keyed by ``shard_for_chat``.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._chat_ids: Set[int] = self._load()
+        self._by_shard: Optional[Dict[Optional[str], List[int]]] = None
+
+    def _load(self) -> Set[int]:
+        try:
+            return {int(chat_id) for chat_id in json.loads(self.path.read_text(encoding="utf-8"))}
+        except FileNotFoundError:
+            return set()
+        except (OSError, ValueError, TypeError) as exc:
+            logger.warning("Ignoring unreadable subscriptions %s: %s", self.path, exc)
+            return set()
+
+    def _save(self) -> None:
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps(sorted(self._chat_ids)), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._chat_ids
+
+    def __iter__(self):
+        return iter(list(self._chat_ids))
+
+    def for_shard(self, shard: Optional[str]) -> List[int]:
+        """Subscribed chats writing to the store of ``shard``."""
+        by_shard = self._by_shard
+        if by_shard is None:
+            by_shard = {}
+            for chat_id in sorted(self._chat_ids):
+                by_shard.setdefault(shard_for_chat(chat_id), []).append(chat_id)
+            self._by_shard = by_shard
+        return by_shard.get(shard, [])
+
+    def add(self, chat_id: int) -> bool:
+        if chat_id in self._chat_ids:
+            return False
+        self._chat_ids.add(chat_id)
+        self._by_shard = None
+        self._save()
+        return True
+
+    def discard(self, chat_id: int) -> bool:
+        if chat_id not in self._chat_ids:
+            return False
+        self._chat_ids.discard(chat_id)
+        self._by_shard = None
+        self._save()
+        return True
+
+
+def format_feed_message(records: List[PlavkaRecord]) -> str:
+    lines = [f"🔔 Новые плавки: {len(records)}"]
+    for record in records[:MAX_LINES_PER_MESSAGE]:
+        display_date = record.plavka_data.strftime("%d.%m.%Y") if hasattr(record.plavka_data, "strftime") else "—"
+        line = f"• Плавка {record.nomer_plavki} · {display_date} · {record.naimenovanie_otlivki or '—'}"
+        if record.plavka_temperatura_zalivki_a is not None:
+            line += f" · {record.plavka_temperatura_zalivki_a:g} °C"
+        lines.append(line)
+    if len(records) > MAX_LINES_PER_MESSAGE:
+        lines.append(f"…и ещё {len(records) - MAX_LINES_PER_MESSAGE}")
+    return "\n".join(lines)
+
+
+class ChangeFeed:
+    """Pushes newly committed plavki to subscribed chats.
+
+    Commits are buffered per chat and coalesced by ``id_plavka`` and
+    ``uchetny_nomer``, so a re-imported plavka is announced once; a commit
+    only reaches the chats writing to the same store. Every
+    ``flush_interval`` each chat with pending records gets one message, as long
+    as its token bucket allows it. Records for a chat that is still rate limited,
+    or whose message failed, stay buffered and go out with the next batch.
+    Global pacing is left to the outbound scheduler the ``send`` callable goes
+    through.
+    """
+
+    def __init__(
+        self,
+        subscriptions: ChatSubscriptions,
+        flush_interval: float = FLUSH_INTERVAL,
+        chat_rate_per_minute: float = CHAT_MESSAGES_PER_MINUTE,
+    ) -> None:
+        self.subscriptions = subscriptions
+        self.flush_interval = flush_interval
+        self._chat_rate = chat_rate_per_minute / 60
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._pending: Dict[int, Dict[Tuple[int, str], PlavkaRecord]] = {}
+        self._send: Optional[Callable[[int, str], Awaitable[object]]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.messages_sent = 0
+        self.records_published = 0
+
+    def start(self, send: Callable[[int, str], Awaitable[object]]) -> None:
+        self._send = send
+        self._loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def publish(self, records: List[PlavkaRecord], shard: Optional[str] = None) -> None:
+        """Queue records committed to the store of ``shard`` for its subscribed chats."""
+        self.records_published += len(records)
+        for chat_id in self.subscriptions.for_shard(shard):
+            self._enqueue(chat_id, records)
+
+    def _enqueue(self, chat_id: int, records: List[PlavkaRecord]) -> None:
+        pending = self._pending.setdefault(chat_id, {})
+        for record in records:
+            key = (record.id_plavka, record.uchetny_nomer)
+            pending.pop(key, None)
+            pending[key] = record
+
+    def _requeue(self, chat_id: int, records: List[PlavkaRecord]) -> None:
+        """Put back a batch that was not delivered, ahead of what arrived meanwhile."""
+        newer = list(self._pending.pop(chat_id, {}).values())
+        self._enqueue(chat_id, records)
+        self._enqueue(chat_id, newer)
+
+    def publish_rows_threadsafe(self, rows: List[List], xlsx_path: Optional[Path] = None) -> None:
+        """Commit listener: hand committed rows of a plavka store over to the event loop."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        records = [PlavkaRecord.from_excel_row(row) for row in rows]
+        shard = shard_of_path(xlsx_path) if xlsx_path is not None else None
+        self._loop.call_soon_threadsafe(self.publish, records, shard)
+
+    async def flush(self) -> None:
+        if self._send is None:
+            return
+        batches = []
+        for chat_id in list(self._pending):
+            if chat_id not in self.subscriptions:
+                self._pending.pop(chat_id, None)
+                continue
+            bucket = self._chat_buckets.setdefault(chat_id, TokenBucket(self._chat_rate, 3))
+            if not bucket.try_acquire():
+                continue
+            batches.append((chat_id, list(self._pending.pop(chat_id).values())))
+
+        try:
+            results = await asyncio.gather(
+                *(self._send(chat_id, format_feed_message(records)) for chat_id, records in batches),
+                return_exceptions=True,
+            )
+        except asyncio.CancelledError:
+            for chat_id, records in batches:
+                self._requeue(chat_id, records)
+            raise
+        for (chat_id, records), result in zip(batches, results):
+            if isinstance(result, BaseException):
+                logger.warning(
+                    "Failed to deliver change feed to chat %s, keeping it for the next batch: %s", chat_id, result
+                )
+                self._requeue(chat_id, records)
+            else:
+                self.messages_sent += 1
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+@lru_cache(maxsize=1)
+def get_change_feed() -> ChangeFeed:
+    xlsx_path = get_settings().xlsx_path
+    return ChangeFeed(ChatSubscriptions(xlsx_path.with_name(f"{xlsx_path.name}.subscriptions.json")))
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.bot.services.excel import ExcelServiceError, compact_workbook
+from src.bot.services.reconcile import watched_stores
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = 3600  # seconds
+
+
+def hot_window_start(today: date, hot_months: int) -> str:
+    """``YYYY-MM`` of the oldest month kept in the workbooks."""
+    months = today.year * 12 + today.month - 1 - (hot_months - 1)
+    return f"{months // 12:04d}-{months % 12 + 1:02d}"
+
+
+class Compactor:
+    """Moves closed months out of the workbooks into archive segments.
+
+    Every store keeps the current month and the ``hot_months - 1`` before it;
+    older rows go to ``<store>.archive/``. A pass over stores with nothing to
+    archive reads one row of each, so it runs every ``interval`` seconds and
+    the work happens right after a month closes.
+    """
+
+    def __init__(self, hot_months: int, interval: float = CHECK_INTERVAL) -> None:
+        self.hot_months = hot_months
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def compact(self, today: Optional[date] = None) -> Dict[Path, int]:
+        before = hot_window_start(today or date.today(), self.hot_months)
+        archived = {}
+        for path, kind in watched_stores():
+            try:
+                rows = compact_workbook(path, kind=kind, before=before)
+            except ExcelServiceError as exc:
+                logger.warning("Could not archive old months of %s: %s", path.name, exc)
+                continue
+            if rows:
+                archived[path] = rows
+        return archived
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.compact)
+            except Exception as exc:  # pragma: no cover - keep compacting
+                logger.exception("Archiving old months failed: %s", exc)
+            await asyncio.sleep(self.interval)
+
+
+@lru_cache(maxsize=1)
+def get_compactor() -> Compactor:
+    return Compactor(get_settings().hot_months)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentCache:
+    """Remembers the Telegram ``file_id`` of an uploaded document per content version.
+
+    The first request for a version uploads the file; concurrent requests for the
+    same version wait for that upload and then resend by ``file_id``. Only the
+    newest version is kept, since older ones are never requested again.
+    """
+
+    def __init__(self) -> None:
+        self._file_ids: Dict[Hashable, str] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def send(
+        self,
+        version: Hashable,
+        upload: Callable[[], Awaitable[Optional[str]]],
+        send_cached: Callable[[str], Awaitable[object]],
+    ) -> None:
+        file_id = self._file_ids.get(version)
+        if file_id is None and version in self._inflight:
+            file_id = await asyncio.shield(self._inflight[version])
+
+        if file_id is not None:
+            try:
+                await send_cached(file_id)
+                self.hits += 1
+                return
+            except Exception as exc:
+                logger.warning("Cached file_id was rejected, uploading again: %s", exc)
+                self._file_ids.pop(version, None)
+
+        await self._upload(version, upload)
+
+    async def _upload(self, version: Hashable, upload: Callable[[], Awaitable[Optional[str]]]) -> None:
+        self.misses += 1
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[version] = future
+        file_id = None
+        try:
+            file_id = await upload()
+        finally:
+            if file_id is not None:
+                self._file_ids = {version: file_id}
+            future.set_result(file_id)
+            if self._inflight.get(version) is future:
+                del self._inflight[version]
+
+
+@lru_cache(maxsize=1)
+def get_document_cache() -> DocumentCache:
+    return DocumentCache()
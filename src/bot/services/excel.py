@@ -1,66 +1,83 @@
 from __future__ import annotations
 
 import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Sequence
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from filelock import FileLock, Timeout
-from openpyxl import Workbook, load_workbook
-from openpyxl.utils.exceptions import InvalidFileException
 
+# openpyxl takes longer to import than the rest of the module; it is imported
+# where a workbook is opened, so parsing and one-shot tools never load it.
+if TYPE_CHECKING:
+    from openpyxl import Workbook
+
+from src.bot.services.archive import (
+    ArchiveCatalog,
+    SegmentWriter,
+    archive_dir,
+    iter_archived_rows,
+    load_catalog,
+    row_month,
+    segment_name,
+    settle_catalog,
+    stage_catalog,
+)
+from src.bot.services.manifest import (
+    CHECKSUM_BLOCK_ROWS,
+    WorkbookManifest,
+    current_manifest,
+    discard_manifest,
+    extend_block_checksums,
+    file_fingerprint,
+    header_hash,
+    load_manifest,
+    save_manifest,
+)
+from src.bot.services.parser import PlavkaRecord
+from src.bot.services.perf import get_perf_counters
+from src.bot.services.schema import EXPECTED_HEADERS, PLAVKA_HEADERS
+from src.bot.services.shared_strings import encode_shared_strings
 from src.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
-EXPECTED_HEADERS: Sequence[str] = (
-    "timestamp",
-    "user_id",
-    "username",
-    "chat_id",
-    "message_id",
-    "text",
-)
+LOCK_TIMEOUT = 15  # seconds
 
-PLAVKA_HEADERS: Sequence[str] = (
-    "id_plavka",
-    "Учетный_номер",
-    "Плавка_дата",
-    "Номер_плавки",
-    "Номер_кластера",
-    "Старший_смены_плавки",
-    "Первый_участник_смены_плавки",
-    "Второй_участник_смены_плавки",
-    "Третий_участник_смены_плавки",
-    "Четвертый_участник_смены_плавки",
-    "Наименование_отливки",
-    "Тип_эксперемента",
-    "Сектор_A_опоки",
-    "Сектор_B_опоки",
-    "Сектор_C_опоки",
-    "Сектор_D_опоки",
-    "Плавка_время_прогрева_ковша_A",
-    "Плавка_время_перемещения_A",
-    "Плавка_время_заливки_A",
-    "Плавка_температура_заливки_A",
-    "Плавка_время_прогрева_ковша_B",
-    "Плавка_время_перемещения_B",
-    "Плавка_время_заливки_B",
-    "Плавка_температура_заливки_B",
-    "Плавка_время_прогрева_ковша_C",
-    "Плавка_время_перемещения_C",
-    "Плавка_время_заливки_C",
-    "Плавка_температура_заливки_C",
-    "Плавка_время_прогрева_ковша_D",
-    "Плавка_время_перемещения_D",
-    "Плавка_время_заливки_D",
-    "Плавка_температура_заливки_D",
-    "Комментарий",
-    "Плавка_время_заливки",
-    "id",
-)
+_store_version = 0
+_store_version_lock = threading.Lock()
+CommitListener = Callable[[List[List], Path], None]
+_commit_listeners: Dict[str, List[CommitListener]] = {"plavka": [], "journal": []}
 
-LOCK_TIMEOUT = 15  # seconds
+
+@dataclass
+class StoreChanges:
+    """What ``reconcile_workbook`` found in a store edited outside the bot.
+
+    ``blocks`` maps the index of every changed block of ``CHECKSUM_BLOCK_ROWS``
+    data rows to all of its rows as they are now. Rows after ``row_count``
+    were deleted.
+    """
+
+    path: Path
+    kind: str
+    blocks: Dict[int, List[List]]
+    row_count: int
+    previous_row_count: int
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.blocks) or self.row_count != self.previous_row_count
+
+
+_reconcile_listeners: List[Callable[[StoreChanges], None]] = []
 
 
 class ExcelServiceError(Exception):
@@ -71,13 +88,399 @@ class ExcelValidationError(ExcelServiceError):
     """Raised when the Excel sheet does not match the expected structure."""
 
 
-def _get_lock(path: Path) -> FileLock:
+def get_store_version() -> int:
+    """Monotonic counter of commits made by this process, for keying read caches."""
+    return _store_version
+
+
+def _bump_store_version() -> None:
+    global _store_version
+    with _store_version_lock:
+        _store_version += 1
+
+
+def add_commit_listener(listener: CommitListener, kind: str = "plavka") -> None:
+    """Register a callback that receives the rows of every successful commit.
+
+    ``kind`` selects plavka rows or journal rows; the listener is called with
+    the rows and the path of the store they went to, since plavka rows may be
+    sharded over several workbooks. Listeners run in the writing
+    thread while the lock is held and must only hand the rows off (e.g. with
+    ``loop.call_soon_threadsafe``) or do a small amount of bookkeeping.
+    """
+    _commit_listeners[kind].append(listener)
+
+
+def remove_commit_listener(listener: CommitListener, kind: str = "plavka") -> None:
+    if listener in _commit_listeners[kind]:
+        _commit_listeners[kind].remove(listener)
+
+
+def _notify_commit_listeners(rows: List[List], kind: str, path: Path) -> None:
+    for listener in list(_commit_listeners[kind]):
+        try:
+            listener(rows, path)
+        except Exception as exc:  # pragma: no cover - a listener must never fail a commit
+            logger.exception("Commit listener failed: %s", exc)
+
+
+def add_reconcile_listener(listener: Callable[[StoreChanges], None]) -> None:
+    """Register a callback for edits found by ``reconcile_workbook``.
+
+    Like commit listeners, it runs with the store lock held, so no commit can
+    slip in between the edit and the callback.
+    """
+    _reconcile_listeners.append(listener)
+
+
+def remove_reconcile_listener(listener: Callable[[StoreChanges], None]) -> None:
+    if listener in _reconcile_listeners:
+        _reconcile_listeners.remove(listener)
+
+
+def publish_store_changes(changes: StoreChanges) -> None:
+    """Tell readers that a store was rewritten outside a commit; the caller holds its lock.
+
+    Read caches keyed by the store version are invalidated, and if rows
+    changed the reconcile listeners get ``changes``, as after a reconcile.
+    """
+    _bump_store_version()
+    if not changes.changed:
+        return
+    for listener in list(_reconcile_listeners):
+        try:
+            listener(changes)
+        except Exception as exc:  # pragma: no cover - a listener must never fail a reconcile
+            logger.exception("Reconcile listener failed: %s", exc)
+
+
+def store_lock(path: Path) -> FileLock:
+    """The writer lock of a store; whoever replaces the file or its manifest holds it."""
     return FileLock(f"{path}.lock", timeout=LOCK_TIMEOUT)
 
 
-def _prepare_workbook(path: Path) -> None:
+def _save_workbook(
+    workbook: Workbook, path: Path, *, before_replace: Optional[Callable[[Path], None]] = None
+) -> None:
+    """Save to a temporary file and atomically replace ``path``.
+
+    Readers that opened the previous file keep reading that complete version,
+    so they never need the writer lock. Strings are dictionary-encoded on the
+    way, see ``encode_shared_strings``. ``before_replace`` gets the finished
+    file right before it takes the place of ``path``.
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    encoded_path = tmp_path.with_name(f"{tmp_path.name}.sst")
+    try:
+        workbook.save(tmp_path)
+        encode_shared_strings(tmp_path, encoded_path)
+        if before_replace is not None:
+            before_replace(encoded_path)
+        os.replace(encoded_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+        encoded_path.unlink(missing_ok=True)
+
+
+def load_store_catalog(path: Path) -> ArchiveCatalog:
+    """The archive catalog of a store, a damaged one reported as ``ExcelValidationError``."""
+    try:
+        return load_catalog(path)
+    except ValueError as exc:
+        raise ExcelValidationError(f"Не удалось прочитать архив {path.name}: {exc}") from exc
+
+
+def _record_manifest(path: Path, worksheet, mode: str) -> None:
+    headers = PLAVKA_HEADERS if mode == "plavka" else EXPECTED_HEADERS
+    catalog = load_store_catalog(path)
+    max_row = worksheet.max_row
+    last_id_column = 1 if mode == "plavka" else 5
+    last_id = worksheet.cell(row=max_row, column=last_id_column).value if max_row > 1 else None
+    checksums = list(catalog.checksums)
+    if max_row > 1:
+        extend_block_checksums(
+            checksums, catalog.archived_rows + 1, worksheet.iter_rows(min_row=2, values_only=True)
+        )
+    save_manifest(
+        path,
+        WorkbookManifest(
+            fingerprint=file_fingerprint(path),
+            mode=mode,
+            header_hash=header_hash(headers),
+            row_count=catalog.archived_rows + max_row - 1,
+            last_id=last_id if isinstance(last_id, int) else None,
+            block_checksums=checksums,
+        ),
+    )
+
+
+def _advance_manifest(path: Path, manifest: Optional[WorkbookManifest], rows: List[List], last_id: object) -> None:
+    """Account for rows just appended, or drop the manifest if it was not current before the write."""
+    if manifest is None:
+        discard_manifest(path)
+        return
+    extend_block_checksums(manifest.block_checksums, manifest.row_count + 1, rows)
+    manifest.row_count += len(rows)
+    if rows:
+        manifest.last_id = last_id if isinstance(last_id, int) else None
+    manifest.fingerprint = file_fingerprint(path)
+    save_manifest(path, manifest)
+
+
+def _reconcile(path: Path, kind: str) -> Optional[StoreChanges]:
+    """Find the blocks changed since the manifest was written; the caller holds the lock.
+
+    The sheet is streamed once to recompute the block checksums, and only the
+    rows of blocks whose checksum differs are kept. Returns ``None`` when there
+    is no manifest to compare against, so the caller has to do the full check.
+    """
+    manifest = load_manifest(path)
+    if manifest is None or manifest.mode != kind or not path.exists():
+        return None
+    if manifest.fingerprint == file_fingerprint(path):
+        return StoreChanges(path, kind, {}, manifest.row_count, manifest.row_count)
+
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    headers = PLAVKA_HEADERS if kind == "plavka" else EXPECTED_HEADERS
+    catalog = load_store_catalog(path)
+    try:
+        workbook = load_workbook(path, read_only=True)
+    except InvalidFileException as exc:
+        raise ExcelValidationError(
+            f"Не удалось прочитать {path.name}. Проверьте структуру файла."
+        ) from exc
+
+    # Rows keep their numbers after the archived ones, and the checksum of a
+    # block the archive and the workbook share starts from its archived part.
+    checksums = list(catalog.checksums)
+    changed: Dict[int, List[List]] = {}
+    block_rows: List[List] = []
+    row_count = catalog.archived_rows
+    last_row: Optional[List] = None
+
+    def close_block() -> None:
+        first_row = row_count - len(block_rows) + 1
+        block = (first_row - 1) // CHECKSUM_BLOCK_ROWS
+        extend_block_checksums(checksums, first_row, block_rows)
+        previous = manifest.block_checksums[block] if block < len(manifest.block_checksums) else None
+        if checksums[block] != previous:
+            archived: List[List] = []
+            if first_row > block * CHECKSUM_BLOCK_ROWS + 1:
+                archived = [row for _, row in iter_archived_rows(path, catalog, block * CHECKSUM_BLOCK_ROWS)]
+            changed[block] = archived + block_rows
+        block_rows.clear()
+
+    try:
+        for number, row in enumerate(workbook.active.iter_rows(values_only=True)):
+            if number == 0:
+                if header_hash(list(row[: len(headers)])) != manifest.header_hash:
+                    return None
+                continue
+            if block_rows and row_count % CHECKSUM_BLOCK_ROWS == 0:
+                close_block()
+            last_row = list(row)
+            block_rows.append(last_row)
+            row_count = catalog.archived_rows + number
+    finally:
+        workbook.close()
+    if block_rows:
+        close_block()
+
+    changes = StoreChanges(path, kind, changed, row_count, manifest.row_count)
+    last_id = last_row[0 if kind == "plavka" else 4] if last_row else None
+    manifest.fingerprint = file_fingerprint(path)
+    manifest.row_count = row_count
+    manifest.last_id = last_id if isinstance(last_id, int) else None
+    manifest.block_checksums = checksums
+    save_manifest(path, manifest)
+
+    if changes.changed:
+        logger.info(
+            "Reconciled %s: %d of %d blocks changed, %d -> %d rows",
+            path.name, len(changed), len(checksums), changes.previous_row_count, row_count,
+        )
+        publish_store_changes(changes)
+    return changes
+
+
+def _reconcile_if_edited(path: Path, kind: str) -> None:
+    """Cheap guard for writers: reconcile only if the file no longer matches its manifest."""
+    if path.exists() and current_manifest(path) is None and load_manifest(path) is not None:
+        _reconcile(path, kind)
+
+
+def reconcile_workbook(xlsx_path: Optional[Path] = None, *, kind: str = "plavka") -> Optional[StoreChanges]:
+    """Reconcile a store with its manifest after it was edited outside the bot.
+
+    Costs a stat when the file is unchanged. Otherwise the work after the one
+    streaming pass, and the work of the listeners, is proportional to the
+    blocks that were edited rather than to the file. Returns ``None`` if the
+    store has no usable manifest yet.
+    """
+    if xlsx_path is None:
+        settings = get_settings()
+        xlsx_path = settings.xlsx_path if kind == "plavka" else settings.journal_path
+    try:
+        with store_lock(xlsx_path):
+            return _reconcile(xlsx_path, kind)
+    except Timeout as exc:
+        raise ExcelServiceError(
+            f"Файл {xlsx_path.name} сейчас используется. Попробуйте повторить попытку позже."
+        ) from exc
+
+
+# Aggregates kept in the summary of every archive segment: rows per value of
+# the first columns, sums and counts of the second.
+_SUMMARY_COLUMNS: Dict[str, Tuple[Sequence[str], Sequence[str]]] = {
+    "plavka": (
+        ("Наименование_отливки", "Тип_эксперемента", "Старший_смены_плавки"),
+        tuple(f"Плавка_температура_заливки_{sector}" for sector in "ABCD"),
+    ),
+    "journal": (("username",), ()),
+}
+
+
+def _compact(path: Path, kind: str, before: str) -> int:
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    headers = PLAVKA_HEADERS if kind == "plavka" else EXPECTED_HEADERS
+    date_column = headers.index("Плавка_дата" if kind == "plavka" else "timestamp")
+    count_names, total_names = _SUMMARY_COLUMNS[kind]
+    catalog = load_store_catalog(path)
+    manifest = current_manifest(path)
+    directory = archive_dir(path)
+    writers: Dict[str, SegmentWriter] = {}
+
+    def writer(month: str) -> SegmentWriter:
+        if month not in writers:
+            directory.mkdir(exist_ok=True)
+            writers[month] = SegmentWriter(
+                directory,
+                segment_name(catalog, month),
+                month,
+                date_column=date_column,
+                count_columns={name: headers.index(name) for name in count_names},
+                total_columns={name: headers.index(name) for name in total_names},
+            )
+        return writers[month]
+
+    try:
+        workbook = load_workbook(path, read_only=True)
+    except InvalidFileException as exc:
+        raise ExcelValidationError(
+            f"Не удалось прочитать {path.name}. Проверьте структуру файла."
+        ) from exc
+
+    live = None
+    checksums = list(catalog.checksums)
+    row_number = catalog.archived_rows
+    month: Optional[str] = None
+    undated: List[List] = []
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        for values in rows:
+            row = list(values)
+            if live is not None:
+                live.append(row)
+                continue
+            # A row without a date belongs to the month of the rows before it.
+            month = row_month(row[date_column] if len(row) > date_column else None) or month
+            if month is None:
+                undated.append(row)
+                continue
+            if month < before:
+                for archived in undated + [row]:
+                    row_number += 1
+                    writer(month).append(row_number, archived)
+                    extend_block_checksums(checksums, row_number, [archived])
+                undated = []
+                continue
+            if not writers:
+                return 0
+            live_workbook = Workbook(write_only=True)
+            live = live_workbook.create_sheet(workbook.active.title)
+            live.append(header)
+            for held in undated + [row]:
+                live.append(held)
+        if not writers:
+            return 0
+        if live is None:
+            live_workbook = Workbook(write_only=True)
+            live = live_workbook.create_sheet(workbook.active.title)
+            live.append(header)
+            for held in undated:
+                live.append(held)
+        segments = [writer.close() for writer in writers.values()]
+    except BaseException:
+        for segment_writer in writers.values():
+            segment_writer.discard()
+        raise
+    finally:
+        workbook.close()
+
+    archived = row_number - catalog.archived_rows
+    catalog.archived_rows = row_number
+    catalog.checksums = checksums
+    catalog.segments.extend(segments)
+
+    def stage(new_path: Path) -> None:
+        catalog.fingerprint = file_fingerprint(new_path)
+        stage_catalog(path, catalog)
+
+    _save_workbook(live_workbook, path, before_replace=stage)
+    settle_catalog(path)
+    if manifest is not None:
+        # Numbering and block checksums run across the archive, so only the file changed.
+        manifest.fingerprint = file_fingerprint(path)
+        save_manifest(path, manifest)
+    _bump_store_version()
+    logger.info(
+        "Archived %d rows of %s from months before %s into %s",
+        archived, path.name, before, ", ".join(segment.name for segment in segments),
+    )
+    return archived
+
+
+def compact_workbook(xlsx_path: Optional[Path] = None, *, kind: str = "plavka", before: str) -> int:
+    """Move the leading rows of months before ``before`` (``YYYY-MM``) into archive segments.
+
+    Rows are archived in order, up to the first row of a later month; rows
+    of an old month that arrive after it stay in the workbook until a later
+    compaction reaches them. Archived rows keep their numbers, so download
+    watermarks, the search index and block checksums stay valid. Costs one
+    read of the first row when there is nothing to archive. Returns the
+    number of rows archived.
+    """
+    if xlsx_path is None:
+        settings = get_settings()
+        xlsx_path = settings.xlsx_path if kind == "plavka" else settings.journal_path
+    if not xlsx_path.exists():
+        return 0
+    try:
+        with store_lock(xlsx_path):
+            settle_catalog(xlsx_path)
+            _prepare_workbook(xlsx_path, kind)
+            return _compact(xlsx_path, kind, before)
+    except Timeout as exc:
+        raise ExcelServiceError(
+            f"Файл {xlsx_path.name} сейчас используется. Попробуйте повторить попытку позже."
+        ) from exc
+
+
+def _prepare_workbook(path: Path, mode: str = "plavka") -> None:
+    if current_manifest(path) is not None:
+        return
+    if _reconcile(path, mode) is not None:
+        return
+
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
     if not path.exists():
-        mode = _detect_workbook_mode(path)
         logger.info("Excel file not found. Creating a new workbook at %s with mode=%s", path, mode)
         workbook = Workbook()
         worksheet = workbook.active
@@ -89,7 +492,8 @@ def _prepare_workbook(path: Path) -> None:
             worksheet.title = "Journal"
             worksheet.append(list(EXPECTED_HEADERS))
         
-        workbook.save(path)
+        _save_workbook(workbook, path)
+        _record_manifest(path, worksheet, mode)
         workbook.close()
         return
 
@@ -97,12 +501,11 @@ def _prepare_workbook(path: Path) -> None:
         workbook = load_workbook(path)
     except InvalidFileException as exc:
         raise ExcelValidationError(
-            "Не удалось открыть plavka.xlsx. Проверьте, что файл не поврежден и используется формат XLSX."
+            f"Не удалось открыть {path.name}. Проверьте, что файл не поврежден и используется формат XLSX."
         ) from exc
 
     worksheet = workbook.active
-    mode = _detect_workbook_mode(path)
-    
+
     if mode == "plavka":
         header_values = [worksheet.cell(row=1, column=index + 1).value for index in range(min(len(PLAVKA_HEADERS), worksheet.max_column))]
         
@@ -110,10 +513,12 @@ def _prepare_workbook(path: Path) -> None:
             logger.info("Excel file found without headers. Writing plavka headers to %s", path)
             for column, header in enumerate(PLAVKA_HEADERS, start=1):
                 worksheet.cell(row=1, column=column, value=header)
-            workbook.save(path)
+            _save_workbook(workbook, path)
+            _record_manifest(path, worksheet, mode)
             workbook.close()
             return
         
+        _record_manifest(path, worksheet, mode)
         workbook.close()
     else:
         header_values = [worksheet.cell(row=1, column=index + 1).value for index in range(len(EXPECTED_HEADERS))]
@@ -122,65 +527,133 @@ def _prepare_workbook(path: Path) -> None:
             logger.info("Excel file found without headers. Writing default headers to %s", path)
             for column, header in enumerate(EXPECTED_HEADERS, start=1):
                 worksheet.cell(row=1, column=column, value=header)
-            workbook.save(path)
+            _save_workbook(workbook, path)
+            _record_manifest(path, worksheet, mode)
             workbook.close()
             return
 
         if list(header_values) != list(EXPECTED_HEADERS):
             workbook.close()
             raise ExcelValidationError(
-                "Структура листа plavka.xlsx не соответствует ожидаемой. "
+                f"Структура листа {path.name} не соответствует ожидаемой. "
                 "Проверьте заголовки: timestamp, user_id, username, chat_id, message_id, text."
             )
 
+        _record_manifest(path, worksheet, mode)
         workbook.close()
 
 
-def ensure_workbook_ready() -> None:
-    settings = get_settings()
-    xlsx_path = settings.xlsx_path
-    lock = _get_lock(xlsx_path)
+def migrate_legacy_journal(*, xlsx_path: Optional[Path] = None, journal_path: Optional[Path] = None) -> bool:
+    """Move a journal-mode plavka.xlsx left from before the split to ``JOURNAL_PATH``.
+
+    Free-text notes used to share plavka.xlsx with plavki, and the file held
+    whichever schema it was created with. This is the only place that still
+    probes the schema; with a current manifest it costs O(1). Returns whether a
+    file was moved.
+    """
+    if xlsx_path is None:
+        xlsx_path = get_settings().xlsx_path
+    if journal_path is None:
+        journal_path = get_settings().journal_path
+
+    manifest = current_manifest(xlsx_path)
+    mode = manifest.mode if manifest is not None else _detect_workbook_mode(xlsx_path)
+    if mode != "journal":
+        return False
 
     try:
-        with lock:
-            _prepare_workbook(xlsx_path)
+        with store_lock(xlsx_path), store_lock(journal_path):
+            if journal_path.exists():
+                raise ExcelValidationError(
+                    f"plavka.xlsx содержит журнал заметок, а {journal_path.name} уже существует. "
+                    "Перенесите заметки вручную."
+                )
+            shutil.move(str(xlsx_path), str(journal_path))
+            discard_manifest(xlsx_path)
     except Timeout as exc:
         raise ExcelServiceError(
             "Файл plavka.xlsx сейчас используется. Попробуйте повторить попытку позже."
         ) from exc
 
+    logger.warning("Moved the journal kept in %s to %s", xlsx_path, journal_path)
+    return True
 
 
-def append_message_row(*, user_id: int, username: str | None, chat_id: int, message_id: int, text: str) -> None:
+def is_workbook_unchanged() -> bool:
+    """Whether both stores still match the manifests of their last full check."""
     settings = get_settings()
-    xlsx_path = settings.xlsx_path
-    lock = _get_lock(xlsx_path)
+    manifest = current_manifest(settings.xlsx_path)
+    if manifest is None or manifest.mode != "plavka":
+        return False
+    return not settings.journal_path.exists() or current_manifest(settings.journal_path) is not None
+
+
+def ensure_workbook_ready() -> None:
+    settings = get_settings()
+    migrate_legacy_journal()
+
+    stores = [(settings.xlsx_path, "plavka")]
+    if settings.journal_path.exists():
+        # Otherwise the journal is created by the first note.
+        stores.append((settings.journal_path, "journal"))
+
+    for path, mode in stores:
+        try:
+            with store_lock(path):
+                _prepare_workbook(path, mode)
+        except Timeout as exc:
+            raise ExcelServiceError(
+                f"Файл {path.name} сейчас используется. Попробуйте повторить попытку позже."
+            ) from exc
+
+
+def append_message_row(
+    *,
+    user_id: int,
+    username: str | None,
+    chat_id: int,
+    message_id: int,
+    text: str,
+    journal_path: Optional[Path] = None,
+) -> None:
+    if journal_path is None:
+        journal_path = get_settings().journal_path
+    lock = store_lock(journal_path)
 
     try:
+        waiting_since = time.perf_counter()
         with lock:
-            _prepare_workbook(xlsx_path)
+            get_perf_counters().lock_wait.record(time.perf_counter() - waiting_since)
+            _prepare_workbook(journal_path, "journal")
+            manifest = current_manifest(journal_path)
+
+            from openpyxl import load_workbook
+            from openpyxl.utils.exceptions import InvalidFileException
 
             try:
-                workbook = load_workbook(xlsx_path)
+                workbook = load_workbook(journal_path)
             except InvalidFileException as exc:
                 raise ExcelValidationError(
-                    "Не удалось открыть plavka.xlsx для записи. Проверьте структуру файла."
+                    f"Не удалось открыть {journal_path.name} для записи. Проверьте структуру файла."
                 ) from exc
 
             worksheet = workbook.active
             timestamp = datetime.now(timezone.utc).astimezone().isoformat(timespec="seconds")
-            worksheet.append(
-                [
-                    timestamp,
-                    user_id,
-                    username or "",
-                    chat_id,
-                    message_id,
-                    text,
-                ]
-            )
-            workbook.save(xlsx_path)
+            row = [
+                timestamp,
+                user_id,
+                username or "",
+                chat_id,
+                message_id,
+                text,
+            ]
+            worksheet.append(row)
+            _save_workbook(workbook, journal_path)
             workbook.close()
+            _advance_manifest(journal_path, manifest, [row], message_id)
+            _bump_store_version()
+            if _commit_listeners["journal"]:
+                _notify_commit_listeners([row], "journal", journal_path)
             logger.info(
                 "Добавлена запись в журнал: user_id=%s, chat_id=%s, message_id=%s",
                 user_id,
@@ -189,47 +662,220 @@ def append_message_row(*, user_id: int, username: str | None, chat_id: int, mess
             )
     except Timeout as exc:
         raise ExcelServiceError(
-            "Файл plavka.xlsx сейчас используется. Попробуйте повторить попытку позже."
+            f"Файл {journal_path.name} сейчас используется. Попробуйте повторить попытку позже."
         ) from exc
 
 
-def get_last_rows(limit: int) -> List[List[str | int | None]]:
-    if limit <= 0:
-        return []
+class StoreSnapshot:
+    """The last committed version of a store: its workbook and the rows archived before it.
 
-    settings = get_settings()
-    xlsx_path = settings.xlsx_path
-    lock = _get_lock(xlsx_path)
+    Opened without the writer lock. A compaction replaces the workbook and
+    then the archive catalog, so the catalog is read on both sides of opening
+    the workbook, and the open is retried if a compaction came in between.
+    """
 
-    try:
-        with lock:
-            _prepare_workbook(xlsx_path)
+    def __init__(self, path: Path) -> None:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
 
+        self.path = path
+        while True:
+            catalog = load_store_catalog(path)
             try:
-                workbook = load_workbook(xlsx_path, read_only=True)
-            except InvalidFileException as exc:
+                workbook = load_workbook(path, read_only=True)
+            except (InvalidFileException, FileNotFoundError) as exc:
                 raise ExcelValidationError(
-                    "Не удалось прочитать plavka.xlsx. Проверьте структуру файла."
+                    f"Не удалось прочитать {path.name}. Проверьте структуру файла."
                 ) from exc
-
-            worksheet = workbook.active
-            rows = [list(row) for row in worksheet.iter_rows(min_row=2, values_only=True)]
+            if load_store_catalog(path).archived_rows == catalog.archived_rows:
+                break
             workbook.close()
+        self.catalog = catalog
+        self.workbook = workbook
+        self.worksheet = workbook.active
+        self.header = list(next(self.worksheet.iter_rows(max_row=1, values_only=True), ()))
+        self.row_count = catalog.archived_rows
+
+    def rows(self, since_row: int = 0) -> Iterator[Tuple[int, List]]:
+        """Numbered data rows after ``since_row``; the archive is opened only if they start in it.
+
+        Once the rows are exhausted, ``row_count`` is the number of data rows
+        in the store.
+        """
+        archived_rows = self.catalog.archived_rows
+        if since_row < archived_rows:
+            yield from iter_archived_rows(self.path, self.catalog, since_row)
+        for number, row in enumerate(self.worksheet.iter_rows(min_row=2, values_only=True), start=1):
+            self.row_count = archived_rows + number
+            if self.row_count > since_row:
+                yield self.row_count, list(row)
+
+    def close(self) -> None:
+        self.workbook.close()
+
+    def __enter__(self) -> "StoreSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def get_last_rows(limit: int, *, xlsx_path: Optional[Path] = None) -> List[List[str | int | None]]:
+    """Return the last ``limit`` data rows of the last committed version.
+
+    Writers replace the file atomically, so the read runs against an immutable
+    snapshot and never waits for the writer lock. Archived rows are read only
+    when the workbook holds fewer than ``limit`` rows.
+    """
+    if limit <= 0:
+        return []
+
+    if xlsx_path is None:
+        xlsx_path = get_settings().xlsx_path
+    if not xlsx_path.exists():
+        return []
+
+    with StoreSnapshot(xlsx_path) as snapshot:
+        archived_rows = snapshot.catalog.archived_rows
+        rows = deque((row for _, row in snapshot.rows(archived_rows)), maxlen=limit)
+        missing = limit - len(rows)
+        if missing > 0 and archived_rows:
+            older = [row for _, row in iter_archived_rows(xlsx_path, snapshot.catalog, max(0, archived_rows - missing))]
+            return older + list(rows)
+
+    return list(rows)
+
+
+def export_rows_since(
+    since_row: int, destination: Path, *, xlsx_path: Optional[Path] = None
+) -> tuple[int, int]:
+    """Write the rows appended after data row ``since_row`` to a new workbook.
+
+    Rows are streamed from a read-only workbook into a ``write_only`` one, so
+    neither side is held in memory. Like ``get_last_rows`` it reads the last
+    committed snapshot without taking the writer lock; rows older than the
+    workbook come from its archive. Returns ``(rows_written, row_count)``,
+    where ``row_count`` is the number of data rows in the store.
+    """
+    if xlsx_path is None:
+        xlsx_path = get_settings().xlsx_path
+
+    from openpyxl import Workbook
+
+    export = None
+    export_sheet = None
+    rows_written = 0
+    with StoreSnapshot(xlsx_path) as snapshot:
+        for _, row in snapshot.rows(since_row):
+            if export is None:
+                export = Workbook(write_only=True)
+                export_sheet = export.create_sheet(snapshot.worksheet.title)
+                export_sheet.append(snapshot.header)
+            export_sheet.append(row)
+            rows_written += 1
+        row_count = snapshot.row_count
+
+    if export is not None:
+        export.save(destination)
+
+    return rows_written, row_count
+
+
+def iter_store_rows(xlsx_path: Path) -> Iterator[List]:
+    """Every data row of a store, archived ones first, from its last committed snapshot."""
+    with StoreSnapshot(xlsx_path) as snapshot:
+        for _, row in snapshot.rows():
+            yield row
+
+
+def read_row_blocks(path: Path, blocks: Iterable[int]) -> Dict[int, List[List]]:
+    """Read whole checksum blocks of data rows from the last committed snapshot."""
+    wanted = set(blocks)
+    result: Dict[int, List[List]] = {block: [] for block in wanted}
+    if not wanted or not path.exists():
+        return result
+
+    last_row = (max(wanted) + 1) * CHECKSUM_BLOCK_ROWS
+    with StoreSnapshot(path) as snapshot:
+        for row_number, row in snapshot.rows(min(wanted) * CHECKSUM_BLOCK_ROWS):
+            if row_number > last_row:
+                break
+            block = (row_number - 1) // CHECKSUM_BLOCK_ROWS
+            if block in wanted:
+                result[block].append(row)
+    return result
+
+
+REPLAY_BATCH_ROWS = 1000
+
+
+def _replay_rows(path: Path, since_row: int, listener: Callable[[List[List]], None]) -> int:
+    """Feed data rows after ``since_row`` to ``listener`` in batches; return the data row count."""
+    if not path.exists():
+        row_count = 0
+    else:
+        batch: List[List] = []
+        with StoreSnapshot(path) as snapshot:
+            for _, row in snapshot.rows(since_row):
+                batch.append(row)
+                if len(batch) >= REPLAY_BATCH_ROWS:
+                    listener(batch)
+                    batch = []
+            row_count = snapshot.row_count
+        if batch:
+            listener(batch)
+
+    if row_count < since_row:
+        raise ExcelValidationError(
+            f"{path.name} содержит {row_count} строк, меньше уже обработанных {since_row}."
+        )
+    return row_count
+
+
+def follow_committed_rows(
+    since_row: int,
+    listener: Callable[[List[List]], None],
+    *,
+    kind: str = "plavka",
+    xlsx_path: Optional[Path] = None,
+) -> Callable[[], None]:
+    """Replay the data rows after ``since_row`` to ``listener`` and subscribe it to new commits.
+
+    ``kind`` selects the store: ``"plavka"`` for plavka.xlsx, ``"journal"`` for
+    the notes journal. The bulk of the replay reads the last committed snapshot
+    without the writer lock; the rows committed meanwhile are read again under
+    the lock, right before the listener is registered, so every row reaches it
+    exactly once and in order. Only commits to this one store are passed on.
+    Raises ``ExcelValidationError`` if the store now has fewer rows than
+    ``since_row``. Returns a callable that unsubscribes.
+    """
+    if xlsx_path is None:
+        settings = get_settings()
+        xlsx_path = settings.xlsx_path if kind == "plavka" else settings.journal_path
+
+    def on_commit(rows: List[List], path: Path) -> None:
+        if path == xlsx_path:
+            listener(rows)
+
+    seen = _replay_rows(xlsx_path, since_row, listener)
+    try:
+        with store_lock(xlsx_path):
+            _replay_rows(xlsx_path, seen, listener)
+            add_commit_listener(on_commit, kind)
     except Timeout as exc:
         raise ExcelServiceError(
-            "Файл plavka.xlsx сейчас используется. Попробуйте повторить попытку позже."
+            f"Файл {xlsx_path.name} сейчас используется. Попробуйте повторить попытку позже."
         ) from exc
 
-    if not rows:
-        return []
-
-    return rows[-limit:]
+    return lambda: remove_commit_listener(on_commit, kind)
 
 
 def _detect_workbook_mode(path: Path) -> str:
     if not path.exists():
         return "plavka"
-    
+
+    from openpyxl import load_workbook
+
     try:
         workbook = load_workbook(path, read_only=True)
         worksheet = workbook.active
@@ -246,56 +892,95 @@ def _detect_workbook_mode(path: Path) -> str:
         return "plavka"
 
 
-def append_plavka_rows(rows: List[List]) -> int:
-    settings = get_settings()
-    xlsx_path = settings.xlsx_path
-    lock = _get_lock(xlsx_path)
-    
-    mode = _detect_workbook_mode(xlsx_path)
-    
-    if mode != "plavka" and xlsx_path.exists():
+def _write_plavka_rows(rows: List[List], xlsx_path: Path) -> int:
+    """Load, append and save one plavka store; the caller holds its lock.
+
+    Module level so that it can run in a worker process.
+    """
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    if not xlsx_path.exists():
+        logger.info("Creating new plavka workbook at %s", xlsx_path)
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.title = "Records"
+        worksheet.append(list(PLAVKA_HEADERS))
+        _save_workbook(workbook, xlsx_path)
+        _record_manifest(xlsx_path, worksheet, "plavka")
+        workbook.close()
+
+    manifest = current_manifest(xlsx_path)
+    try:
+        workbook = load_workbook(xlsx_path)
+    except InvalidFileException as exc:
         raise ExcelValidationError(
-            "Файл plavka.xlsx имеет неправильную структуру. Ожидалась структура для записи плавок."
+            "Не удалось открыть plavka.xlsx для записи плавок. Проверьте структуру файла."
+        ) from exc
+
+    worksheet = workbook.active
+    header_values = [worksheet.cell(row=1, column=i+1).value for i in range(len(PLAVKA_HEADERS))]
+
+    if list(header_values) != list(PLAVKA_HEADERS):
+        workbook.close()
+        raise ExcelValidationError(
+            f"Структура листа plavka.xlsx не соответствует ожидаемой для плавок. "
+            f"Ожидалось: {len(PLAVKA_HEADERS)} столбцов, найдено: {len(header_values)}"
         )
 
+    for row in rows:
+        worksheet.append(row)
+    last_id = rows[-1][0] if rows else None
+
+    _save_workbook(workbook, xlsx_path)
+    workbook.close()
+    _advance_manifest(xlsx_path, manifest, rows, last_id)
+    return len(rows)
+
+
+def append_plavka_rows(
+    rows: Iterable[List], *, xlsx_path: Optional[Path] = None, executor: Optional[Executor] = None
+) -> int:
+    """Append rows to a plavka store under its lock and notify the commit listeners.
+
+    ``rows`` is read into a list before the lock is taken: the batch is written
+    in one save and passed to the listeners, so all of it is held in memory.
+    Large imports are committed in batches by the caller, as ``ingest`` does.
+    With an ``executor`` (a process pool) the workbook load and save run in a
+    worker process while this thread holds the lock, so commits to different
+    stores do not take turns on the GIL.
+    """
+    if xlsx_path is None:
+        xlsx_path = get_settings().xlsx_path
+    lock = store_lock(xlsx_path)
+    committed_rows = list(rows)
+
     try:
+        waiting_since = time.perf_counter()
         with lock:
-            if not xlsx_path.exists():
-                logger.info("Creating new plavka workbook at %s", xlsx_path)
-                workbook = Workbook()
-                worksheet = workbook.active
-                worksheet.title = "Records"
-                worksheet.append(list(PLAVKA_HEADERS))
-                workbook.save(xlsx_path)
-                workbook.close()
-            
-            try:
-                workbook = load_workbook(xlsx_path)
-            except InvalidFileException as exc:
-                raise ExcelValidationError(
-                    "Не удалось открыть plavka.xlsx для записи плавок. Проверьте структуру файла."
-                ) from exc
-            
-            worksheet = workbook.active
-            header_values = [worksheet.cell(row=1, column=i+1).value for i in range(len(PLAVKA_HEADERS))]
-            
-            if list(header_values) != list(PLAVKA_HEADERS):
-                workbook.close()
-                raise ExcelValidationError(
-                    f"Структура листа plavka.xlsx не соответствует ожидаемой для плавок. "
-                    f"Ожидалось: {len(PLAVKA_HEADERS)} столбцов, найдено: {len(header_values)}"
-                )
-            
-            rows_added = 0
-            for row in rows:
-                worksheet.append(row)
-                rows_added += 1
-            
-            workbook.save(xlsx_path)
-            workbook.close()
+            get_perf_counters().lock_wait.record(time.perf_counter() - waiting_since)
+            _reconcile_if_edited(xlsx_path, "plavka")
+            if executor is None:
+                rows_added = _write_plavka_rows(committed_rows, xlsx_path)
+            else:
+                rows_added = executor.submit(_write_plavka_rows, committed_rows, xlsx_path).result()
+            _bump_store_version()
+            if committed_rows and _commit_listeners["plavka"]:
+                _notify_commit_listeners(committed_rows, "plavka", xlsx_path)
             logger.info("Добавлено %d плавок в журнал", rows_added)
             return rows_added
     except Timeout as exc:
         raise ExcelServiceError(
             "Файл plavka.xlsx сейчас используется. Попробуйте повторить попытку позже."
         ) from exc
+
+
+def append_plavka_records(records: Iterable[PlavkaRecord], *, xlsx_path: Optional[Path] = None) -> int:
+    """Append the records of e.g. ``iter_plavka_records`` as one batch.
+
+    ``records`` is consumed in full before the workbook is opened, so a report
+    that fails validation at its end leaves the file untouched. The batch is
+    held in memory; it is not written as it is parsed.
+    """
+    rows = (record.to_excel_row(index) for index, record in enumerate(records, start=1))
+    return append_plavka_rows(rows, xlsx_path=xlsx_path)
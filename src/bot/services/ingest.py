@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import logging
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Iterator, List, Optional, Sequence
+
+from src.bot.services.normalize import TEMPERATURE_RANGE, normalize_blocks
+from src.bot.services.parser import ParserError, ShiftReportParser
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DOCUMENT_SUFFIXES: Sequence[str] = (".txt", ".csv", ".xlsx")
+CSV_DELIMITERS: Sequence[str] = (",", ";", "\t")
+COMMIT_BATCH_ROWS = 500
+
+
+class DocumentFormatError(ParserError):
+    """Raised when an uploaded document cannot be read as a list of shift reports."""
+
+
+@dataclass
+class IngestProgress:
+    reports: int = 0
+    plavki: int = 0
+    rows_committed: int = 0
+    failed_reports: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+def _cells_to_line(cells: Iterable[object]) -> str:
+    values = []
+    for cell in cells:
+        if cell is None:
+            continue
+        if isinstance(cell, (datetime, date)):
+            cell = cell.strftime("%d.%m.%Y")
+        text = str(cell).strip()
+        if text:
+            values.append(text)
+
+    if not values:
+        return ""
+    if len(values) >= 2 and not values[0].endswith(":") and ":" not in values[0]:
+        return f"{values[0]}: {' '.join(values[1:])}"
+    return " ".join(values)
+
+
+def iter_document_lines(path: Path) -> Iterator[str]:
+    """Yield report lines from a .txt, .csv or .xlsx document without loading it whole.
+
+    Spreadsheet rows are read as ``key, value`` pairs and turned into ``key: value`` lines.
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".txt":
+        with path.open(encoding="utf-8-sig", errors="replace") as handle:
+            for line in handle:
+                yield line.rstrip("\r\n")
+    elif suffix == ".csv":
+        with path.open(encoding="utf-8-sig", errors="replace", newline="") as handle:
+            sample = handle.read(4096)
+            handle.seek(0)
+            delimiter = max(CSV_DELIMITERS, key=sample.count)
+            for cells in csv.reader(handle, delimiter=delimiter):
+                yield _cells_to_line(cells)
+    elif suffix == ".xlsx":
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+
+        # Parts of the file are parsed when opened and sheets lazily while
+        # rows are read, so a damaged document can fail at either point.
+        unreadable = (InvalidFileException, zipfile.BadZipFile, zlib.error, OSError, KeyError, ValueError, SyntaxError)
+        try:
+            workbook = load_workbook(path, read_only=True, data_only=True)
+        except unreadable as exc:
+            raise DocumentFormatError("Не удалось открыть файл XLSX с отчётами.") from exc
+        try:
+            for cells in workbook.active.iter_rows(values_only=True):
+                yield _cells_to_line(cells)
+        except unreadable as exc:
+            raise DocumentFormatError("Не удалось прочитать файл XLSX с отчётами.") from exc
+        finally:
+            workbook.close()
+    else:
+        raise DocumentFormatError(
+            f"Неподдерживаемый формат файла: {suffix or 'без расширения'}. "
+            f"Поддерживаются: {', '.join(SUPPORTED_DOCUMENT_SUFFIXES)}."
+        )
+
+
+def iter_report_rows(lines: Iterable[str]) -> Iterator[List[List] | ParserError]:
+    """Parse a stream of lines holding several shift reports.
+
+    Lines go through ``ShiftReportParser`` one by one; for every report either
+    its Excel rows or the ``ParserError`` that rejected it is yielded. The raw
+    blocks of a report are held back until the report closes and validates,
+    so a broken report never gets partially committed, and are then turned
+    into rows column by column with ``normalize_blocks``. A
+    ``DocumentFormatError`` raised while reading ``lines`` is not a broken
+    report: it propagates, so the caller can say the document itself could
+    not be read.
+    """
+    parser = ShiftReportParser(keep_blocks=True)
+    error: Optional[ParserError] = None
+
+    def finish() -> List[List] | ParserError:
+        if error is not None:
+            return error
+        try:
+            parser.close()
+            parser.validate()
+        except ParserError as exc:
+            return exc
+        batch = normalize_blocks(parser.header, parser.blocks)
+        if batch.out_of_range_count:
+            low, high = TEMPERATURE_RANGE
+            logger.warning(
+                "Report of %s has %d temperatures outside %g-%g °C",
+                parser.header.get("Дата"),
+                batch.out_of_range_count,
+                low,
+                high,
+            )
+        return list(batch.rows())
+
+    for raw_line in lines:
+        line = raw_line.strip()
+        if parser.starts_new_report(line):
+            yield finish()
+            parser = ShiftReportParser(keep_blocks=True)
+            error = None
+
+        if error is not None:
+            continue
+        try:
+            parser.feed_line(line)
+        except ParserError as exc:
+            error = exc
+
+    if parser.has_content:
+        yield finish()
+
+
+async def ingest_document(
+    path: Path,
+    *,
+    commit: Callable[[List[List]], Awaitable[int]],
+    on_progress: Optional[Callable[[IngestProgress], Awaitable[None]]] = None,
+    batch_rows: int = COMMIT_BATCH_ROWS,
+) -> IngestProgress:
+    """Parse every report in a document and commit the plavki in batches.
+
+    Reading and parsing run in a worker thread one report at a time, so memory
+    stays bounded by the rows of the largest single report. Reports that fail
+    to parse are counted and skipped.
+    """
+    progress = IngestProgress()
+    reports = iter_report_rows(iter_document_lines(path))
+    pending: List[List] = []
+
+    def next_report() -> List[List] | ParserError | None:
+        return next(reports, None)
+
+    while True:
+        report = await asyncio.to_thread(next_report)
+        if report is None:
+            break
+
+        progress.reports += 1
+        if isinstance(report, ParserError):
+            progress.failed_reports += 1
+            progress.errors.append(f"Отчёт {progress.reports}: {report}")
+            logger.info("Skipping report %d from document %s: %s", progress.reports, path.name, report)
+            continue
+
+        progress.plavki += len(report)
+        pending.extend(report)
+
+        if len(pending) >= batch_rows:
+            progress.rows_committed += await commit(pending)
+            pending = []
+            if on_progress is not None:
+                await on_progress(progress)
+
+    if pending:
+        progress.rows_committed += await commit(pending)
+    if on_progress is not None:
+        await on_progress(progress)
+    return progress
+
+
+def check_document(path: Path) -> IngestProgress:
+    """Parse every report in a document without committing anything."""
+    progress = IngestProgress()
+    for report in iter_report_rows(iter_document_lines(path)):
+        progress.reports += 1
+        if isinstance(report, ParserError):
+            progress.failed_reports += 1
+            progress.errors.append(f"Отчёт {progress.reports}: {report}")
+        else:
+            progress.plavki += len(report)
+    return progress
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Check report documents from the command line, or import them with ``--commit``.
+
+    Checking needs only the parser: neither openpyxl (except for .xlsx
+    documents) nor aiogram is imported, so it starts in a fraction of the
+    time the bot takes. With ``SHARD_BY`` set, ``--shard`` names the store the
+    plavki go to; without it they go to plavka.xlsx, which only chats outside
+    ``PLANTS`` write to.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.bot.services.ingest",
+        description="Проверить документы с отчётами о смене или импортировать их в XLSX_PATH.",
+    )
+    parser.add_argument("documents", nargs="+", type=Path, help=", ".join(SUPPORTED_DOCUMENT_SUFFIXES))
+    parser.add_argument("--commit", action="store_true", help="записать плавки в книгу, а не только проверить")
+    parser.add_argument(
+        "--shard",
+        help="книга цеха или чата при SHARD_BY=plant|chat: plavka.<SHARD>.xlsx (по умолчанию plavka.xlsx)",
+    )
+    args = parser.parse_args(argv)
+    if args.shard is not None and not args.commit:
+        parser.error("--shard имеет смысл только вместе с --commit")
+
+    commit = None
+    if args.commit:
+        from src.bot.services.excel import append_plavka_rows
+        from src.bot.services.reference_store import load_references, save_references
+        from src.bot.services.shards import store_path
+        from src.core.config import SHARD_NAME_RE, get_settings
+
+        settings = get_settings()
+        if args.shard is not None:
+            if settings.shard_by == "none":
+                parser.error("--shard задаётся только при SHARD_BY=plant или SHARD_BY=chat")
+            if not SHARD_NAME_RE.fullmatch(args.shard):
+                parser.error(f"недопустимое имя книги: {args.shard!r}")
+            if settings.shard_by == "plant" and args.shard not in settings.plant_chats.values():
+                parser.error(f"цеха {args.shard!r} нет в PLANTS")
+        elif settings.shard_by == "chat":
+            parser.error("при SHARD_BY=chat укажите книгу чата в --shard")
+        xlsx_path = store_path(args.shard)
+
+        # Spellings resolve against the dictionary the bot uses.
+        load_references()
+
+        async def commit(rows: List[List]) -> int:
+            return await asyncio.to_thread(append_plavka_rows, rows, xlsx_path=xlsx_path)
+
+    failed = 0
+    for path in args.documents:
+        try:
+            if commit is None:
+                progress = check_document(path)
+            else:
+                progress = asyncio.run(ingest_document(path, commit=commit))
+        except (OSError, ParserError) as exc:
+            print(f"{path}: {exc}")
+            failed += 1
+            continue
+        written = f", записано {progress.rows_committed}" if commit is not None else ""
+        print(f"{path}: отчётов {progress.reports}, плавок {progress.plavki}{written}, с ошибками {progress.failed_reports}")
+        for error in progress.errors:
+            print(f"  {error}")
+        failed += progress.failed_reports
+    if commit is not None:
+        save_references()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
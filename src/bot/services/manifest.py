@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 2
+CHECKSUM_BLOCK_ROWS = 1000
+
+
+@dataclass
+class WorkbookManifest:
+    """Summary of a checked workbook, persisted next to it.
+
+    ``fingerprint`` is ``[size, mtime_ns]`` of the file at the time of the
+    check; when it still matches, the file is known to be unchanged and the
+    full structure check can be skipped. ``block_checksums`` hold one checksum
+    per ``CHECKSUM_BLOCK_ROWS`` data rows, so an edit made outside the bot can
+    be narrowed down to the blocks it touched.
+    """
+
+    fingerprint: List[int]
+    mode: str
+    header_hash: str
+    row_count: int
+    last_id: Optional[int]
+    block_checksums: List[str] = field(default_factory=list)
+    version: int = MANIFEST_VERSION
+
+
+def manifest_path(xlsx_path: Path) -> Path:
+    return xlsx_path.with_name(f"{xlsx_path.name}.manifest.json")
+
+
+def file_fingerprint(xlsx_path: Path) -> Optional[List[int]]:
+    try:
+        stat = xlsx_path.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def header_hash(headers: Sequence[object]) -> str:
+    joined = "\x1f".join("" if value is None else str(value) for value in headers)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+def _cell_text(value: object) -> str:
+    # Normalise to what reading the saved file gives back: dates come back as
+    # datetimes and whole floats as ints.
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day).isoformat()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def row_hash(row_number: int, row: Sequence[object]) -> int:
+    """64-bit hash of data row ``row_number``; trailing empty cells do not count."""
+    cells = [_cell_text(value) for value in row]
+    while cells and cells[-1] == "":
+        cells.pop()
+    payload = f"{row_number}\x1e" + "\x1f".join(cells)
+    return int.from_bytes(hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def extend_block_checksums(checksums: List[str], first_row: int, rows: Iterable[Sequence[object]]) -> List[int]:
+    """Add data rows starting at ``first_row`` to ``checksums`` in place.
+
+    A block checksum is the sum of its row hashes modulo 2**64, so appending
+    rows only touches the last block and needs none of the rows before them.
+    Returns the indexes of the blocks that changed.
+    """
+    touched: List[int] = []
+    for row_number, row in enumerate(rows, start=first_row):
+        block = (row_number - 1) // CHECKSUM_BLOCK_ROWS
+        while len(checksums) <= block:
+            checksums.append(f"{0:016x}")
+        checksums[block] = f"{(int(checksums[block], 16) + row_hash(row_number, row)) % 2**64:016x}"
+        if not touched or touched[-1] != block:
+            touched.append(block)
+    return touched
+
+
+def block_checksum(block: int, rows: Iterable[Sequence[object]]) -> str:
+    """Checksum of block ``block`` holding ``rows``."""
+    checksums = [f"{0:016x}"] * block
+    extend_block_checksums(checksums, block * CHECKSUM_BLOCK_ROWS + 1, rows)
+    return checksums[block] if len(checksums) > block else f"{0:016x}"
+
+
+def load_manifest(xlsx_path: Path) -> Optional[WorkbookManifest]:
+    try:
+        data = json.loads(manifest_path(xlsx_path).read_text(encoding="utf-8"))
+        manifest = WorkbookManifest(**data)
+    except (OSError, ValueError, TypeError):
+        return None
+    if manifest.version != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(xlsx_path: Path, manifest: WorkbookManifest) -> None:
+    path = manifest_path(xlsx_path)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(asdict(manifest), ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def discard_manifest(xlsx_path: Path) -> None:
+    try:
+        manifest_path(xlsx_path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def current_manifest(xlsx_path: Path) -> Optional[WorkbookManifest]:
+    """Return the manifest only if it still describes the file on disk. O(1)."""
+    manifest = load_manifest(xlsx_path)
+    if manifest is None or manifest.fingerprint != file_fingerprint(xlsx_path):
+        return None
+    return manifest
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from src.bot.services.schema import PLAVKA_HEADERS
+from src.bot.services.parser import intern_row, make_id_plavka, parse_float, parse_report_date
+from src.bot.services.references import CASTING, CREW, get_reference_dictionary
+
+TEMPERATURE_RANGE: Tuple[float, float] = (1000.0, 1800.0)
+
+# Report field -> store column, for fields copied as text.
+TEXT_COLUMNS: Mapping[str, str] = {
+    "Номер кластера": "Номер_кластера",
+    "Участник 1": "Первый_участник_смены_плавки",
+    "Участник 2": "Второй_участник_смены_плавки",
+    "Участник 3": "Третий_участник_смены_плавки",
+    "Участник 4": "Четвертый_участник_смены_плавки",
+    "Тип эксперимента": "Тип_эксперемента",
+    "Сектор A": "Сектор_A_опоки",
+    "Сектор B": "Сектор_B_опоки",
+    "Сектор C": "Сектор_C_опоки",
+    "Сектор D": "Сектор_D_опоки",
+    "Прогрев ковша A": "Плавка_время_прогрева_ковша_A",
+    "Перемещение A": "Плавка_время_перемещения_A",
+    "Заливка A": "Плавка_время_заливки_A",
+    "Прогрев ковша B": "Плавка_время_прогрева_ковша_B",
+    "Перемещение B": "Плавка_время_перемещения_B",
+    "Заливка B": "Плавка_время_заливки_B",
+    "Прогрев ковша C": "Плавка_время_прогрева_ковша_C",
+    "Перемещение C": "Плавка_время_перемещения_C",
+    "Заливка C": "Плавка_время_заливки_C",
+    "Прогрев ковша D": "Плавка_время_прогрева_ковша_D",
+    "Перемещение D": "Плавка_время_перемещения_D",
+    "Заливка D": "Плавка_время_заливки_D",
+    "Комментарий": "Комментарий",
+    "Время заливки": "Плавка_время_заливки",
+}
+
+# Store column -> reference dictionary kind, resolved as in the parser.
+REFERENCE_COLUMNS: Mapping[str, str] = {
+    "Старший_смены_плавки": CREW,
+    "Первый_участник_смены_плавки": CREW,
+    "Второй_участник_смены_плавки": CREW,
+    "Третий_участник_смены_плавки": CREW,
+    "Четвертый_участник_смены_плавки": CREW,
+    "Наименование_отливки": CASTING,
+}
+
+TEMPERATURE_COLUMNS: Mapping[str, str] = {
+    "Температура A": "Плавка_температура_заливки_A",
+    "Температура B": "Плавка_температура_заливки_B",
+    "Температура C": "Плавка_температура_заливки_C",
+    "Температура D": "Плавка_температура_заливки_D",
+}
+
+
+@dataclass
+class NormalizedBatch:
+    """Typed store columns for a batch of plavki from one report.
+
+    ``columns`` is keyed by ``PLAVKA_HEADERS`` (except ``id``). For every
+    temperature column, ``valid`` marks values that parsed as numbers and
+    ``out_of_range`` marks parsed values outside ``TEMPERATURE_RANGE``.
+    """
+
+    size: int
+    columns: Dict[str, list]
+    valid: Dict[str, List[bool]] = field(default_factory=dict)
+    out_of_range: Dict[str, List[bool]] = field(default_factory=dict)
+
+    def rows(self, first_id: int = 1) -> Iterator[List]:
+        """Store rows, as ``PlavkaRecord.to_excel_row`` builds them."""
+        ordered = [self.columns[header] for header in PLAVKA_HEADERS[:-1]]
+        for offset, values in enumerate(zip(*ordered)):
+            row = [*values, first_id + offset]
+            intern_row(row)
+            yield row
+
+    @property
+    def out_of_range_count(self) -> int:
+        return sum(map(sum, self.out_of_range.values()))
+
+
+def parse_float_column(values: Sequence[Optional[str]]) -> Tuple[List[Optional[float]], List[bool]]:
+    """Convert a column of strings to floats and return it with a validity mask.
+
+    The whole column goes through one ``map(float, ...)``; only when that fails
+    does it fall back to checking the values one by one.
+    """
+    present = [bool(value) for value in values]
+    if all(present):
+        try:
+            parsed: List[Optional[float]] = list(map(float, values))
+            return parsed, present
+        except (ValueError, TypeError):
+            pass
+
+    parsed = [parse_float(value) for value in values]
+    return parsed, [value is not None for value in parsed]
+
+
+def range_mask(values: Sequence[Optional[float]], bounds: Tuple[float, float] = TEMPERATURE_RANGE) -> List[bool]:
+    low, high = bounds
+    return [value is not None and not (low <= value <= high) for value in values]
+
+
+def normalize_columns(header: Mapping[str, str], columns: Mapping[str, Sequence[Optional[str]]]) -> NormalizedBatch:
+    """Normalize raw report fields for many plavki of one report at once.
+
+    ``columns`` maps report field names (as in the shift report, e.g.
+    ``"Номер"`` or ``"Температура A"``) to equally long sequences of raw
+    strings; missing fields are treated as empty. The report date is parsed
+    once for the whole batch.
+    """
+    sizes = {len(values) for values in columns.values()}
+    if len(sizes) > 1:
+        raise ValueError(f"All columns must have the same length, got {sorted(sizes)}")
+    size = sizes.pop() if sizes else 0
+    empty: List[Optional[str]] = [None] * size
+
+    plavka_date = parse_report_date(dict(header))
+    short_year = plavka_date.year % 100
+
+    numbers = [value or "" for value in columns.get("Плавка №") or columns.get("Номер") or [""] * size]
+    id_plavka = [make_id_plavka(plavka_date, number) for number in numbers]
+
+    uchetny = columns.get("Учетный номер") or empty
+    starshiy_default = header.get("Старший_смены")
+    starshiy = columns.get("Старший смены") or empty
+
+    result: Dict[str, list] = {
+        "id_plavka": id_plavka,
+        "Учетный_номер": [
+            value if value is not None else f"{plavka_date.day}-{number}/{short_year}"
+            for value, number in zip(uchetny, numbers)
+        ],
+        "Плавка_дата": [plavka_date] * size,
+        "Номер_плавки": numbers,
+        "Старший_смены_плавки": [
+            starshiy_default if starshiy_default is not None else (value if value is not None else "")
+            for value in starshiy
+        ],
+        "Наименование_отливки": [
+            value if value is not None else "" for value in columns.get("Наименование отливки") or empty
+        ],
+    }
+    for field_name, header_name in TEXT_COLUMNS.items():
+        result[header_name] = list(columns.get(field_name) or empty)
+    references = get_reference_dictionary()
+    for header_name, kind in REFERENCE_COLUMNS.items():
+        result[header_name] = [references.resolve(kind, value) for value in result[header_name]]
+
+    batch = NormalizedBatch(size=size, columns=result)
+    for field_name, header_name in TEMPERATURE_COLUMNS.items():
+        values, mask = parse_float_column(columns.get(field_name) or empty)
+        result[header_name] = values
+        batch.valid[header_name] = mask
+        batch.out_of_range[header_name] = range_mask(values)
+    return batch
+
+
+# Report fields read from every block; the number is merged from its two spellings.
+BLOCK_FIELDS: Sequence[str] = (
+    "Учетный номер",
+    "Старший смены",
+    "Наименование отливки",
+    *TEXT_COLUMNS,
+    *TEMPERATURE_COLUMNS,
+)
+
+
+def normalize_blocks(header: Mapping[str, str], blocks: Sequence[Mapping[str, str]]) -> NormalizedBatch:
+    """``normalize_columns`` for the raw blocks of ``ShiftReportParser(keep_blocks=True)``."""
+    columns = {field_name: [block.get(field_name) for block in blocks] for field_name in BLOCK_FIELDS}
+    columns["Номер"] = [block.get("Плавка №", block.get("Номер", "")) for block in blocks]
+    return normalize_columns(header, columns)
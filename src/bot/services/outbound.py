@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Deque, Dict, Iterator, List, Optional, Set
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from src.bot.services.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_ACK = 0
+PRIORITY_BULK = 1
+LANE_NAMES = ("ack", "bulk")
+
+GLOBAL_MESSAGES_PER_SECOND = 25
+CHAT_MESSAGES_PER_SECOND = 1
+CHAT_BURST = 3
+MAX_RETRIES = 3
+DELAY_SAMPLES = 1000
+
+_priority: ContextVar[int] = ContextVar("outbound_priority", default=PRIORITY_ACK)
+
+
+@contextmanager
+def bulk_priority() -> Iterator[None]:
+    """Send the requests made inside the block through the bulk lane."""
+    token = _priority.set(PRIORITY_BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@dataclass(eq=False)
+class _Job:
+    chat_id: int | str
+    enqueued_at: float
+    granted: asyncio.Future = field(repr=False)
+
+
+@dataclass
+class LaneStats:
+    sent: int = 0
+    delays: Deque[float] = field(default_factory=lambda: deque(maxlen=DELAY_SAMPLES))
+
+    def percentile(self, fraction: float) -> float:
+        if not self.delays:
+            return 0.0
+        ordered = sorted(self.delays)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """Session middleware that paces every chat-bound Bot API request.
+
+    Requests wait in one of two lanes: replies to users (``ack``) always go
+    before change feed notifications and other ``bulk`` traffic. A request is
+    released once both its chat bucket and the global bucket have a token, so a
+    busy chat never holds up the others. A ``429 Retry-After`` pauses the chat
+    and puts the request back at the front of its lane.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = GLOBAL_MESSAGES_PER_SECOND,
+        chat_rate: float = CHAT_MESSAGES_PER_SECOND,
+        chat_burst: float = CHAT_BURST,
+        max_retries: int = MAX_RETRIES,
+    ) -> None:
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chat_buckets: Dict[int | str, TokenBucket] = {}
+        self._lanes: List[Deque[_Job]] = [deque() for _ in LANE_NAMES]
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.lane_stats = [LaneStats() for _ in LANE_NAMES]
+        self.retry_after_count = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        priority = _priority.get()
+        for attempt in range(self.max_retries + 1):
+            await self._wait_turn(chat_id, priority, front=attempt > 0)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                self.retry_after_count += 1
+                if attempt == self.max_retries:
+                    raise
+                logger.warning("Flood control in chat %s, retrying in %s s", chat_id, exc.retry_after)
+                self._chat_bucket(chat_id).pause(exc.retry_after)
+        raise AssertionError("unreachable")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "queued": len(lane),
+                "sent": stats.sent,
+                "delay_p50": stats.percentile(0.5),
+                "delay_p95": stats.percentile(0.95),
+                "delay_max": max(stats.delays, default=0.0),
+            }
+            for name, lane, stats in zip(LANE_NAMES, self._lanes, self.lane_stats)
+        }
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Let whatever is still queued go out unpaced rather than hang shutdown.
+        for lane in self._lanes:
+            while lane:
+                job = lane.popleft()
+                if not job.granted.done():
+                    job.granted.set_result(None)
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def _wait_turn(self, chat_id: int | str, priority: int, front: bool) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+        job = _Job(chat_id=chat_id, enqueued_at=time.monotonic(), granted=loop.create_future())
+        if front:
+            self._lanes[priority].appendleft(job)
+        else:
+            self._lanes[priority].append(job)
+        self._wakeup.set()
+        await job.granted
+
+    def _next_ready(self) -> tuple[Optional[_Job], int, Optional[float]]:
+        """Pop the first job whose chat has a token, or return the shortest wait."""
+        wait: Optional[float] = None
+        for priority, lane in enumerate(self._lanes):
+            blocked: Set[int | str] = set()
+            for job in lane:
+                if job.granted.done() or job.chat_id in blocked:
+                    continue
+                bucket = self._chat_bucket(job.chat_id)
+                if bucket.try_acquire():
+                    lane.remove(job)
+                    return job, priority, None
+                blocked.add(job.chat_id)
+                wait = bucket.delay() if wait is None else min(wait, bucket.delay())
+            # Drop requests whose callers gave up waiting.
+            while lane and lane[0].granted.done():
+                lane.popleft()
+        return None, -1, wait
+
+    async def _run(self) -> None:
+        while True:
+            job, priority, wait = self._next_ready()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._global_bucket.acquire()
+            if job.granted.done():
+                continue
+            stats = self.lane_stats[priority]
+            stats.sent += 1
+            stats.delays.append(time.monotonic() - job.enqueued_at)
+            job.granted.set_result(None)
+
+
+@lru_cache(maxsize=1)
+def get_outbound_scheduler() -> OutboundScheduler:
+    return OutboundScheduler()
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import codecs
 import logging
 import re
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, fields
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.bot.services.references import CASTING, CREW, get_reference_dictionary
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +58,14 @@ class PlavkaRecord:
     kommentariy: Optional[str]
     plavka_vremya_zalivki: Optional[str]
 
+    @classmethod
+    def from_excel_row(cls, row: Sequence) -> "PlavkaRecord":
+        """Rebuild a record from a stored row (the trailing ``id`` column is ignored)."""
+        values = list(row[: len(fields(cls))])
+        values.extend([None] * (len(fields(cls)) - len(values)))
+        intern_row(values)
+        return cls(*values)
+
     def to_excel_row(self, row_id: int) -> List:
         return [
             self.id_plavka,
@@ -94,6 +106,88 @@ class PlavkaRecord:
         ]
 
 
+# Crew, castings, experiment types and sectors repeat in almost every row and
+# come from a small vocabulary; interning keeps a single copy of each value.
+INTERNED_FIELDS = (
+    "starshiy_smeny",
+    "perviy_uchastnik",
+    "vtoroy_uchastnik",
+    "tretiy_uchastnik",
+    "chetvertyy_uchastnik",
+    "naimenovanie_otlivki",
+    "tip_eksperementa",
+    "sektor_a_opoki",
+    "sektor_b_opoki",
+    "sektor_c_opoki",
+    "sektor_d_opoki",
+)
+_INTERNED_COLUMNS = tuple(
+    index for index, field in enumerate(fields(PlavkaRecord)) if field.name in INTERNED_FIELDS
+)
+
+
+def _intern(value: object) -> object:
+    return sys.intern(value) if type(value) is str else value
+
+
+def intern_row(row: List) -> None:
+    """Intern the crew, casting, experiment and sector cells of a stored row in place."""
+    for index in _INTERNED_COLUMNS:
+        row[index] = _intern(row[index])
+
+
+# Castings and crew are typed by hand in every report; they are resolved
+# against the reference dictionary so case and spacing do not start a new value.
+REFERENCE_FIELDS = {
+    "starshiy_smeny": CREW,
+    "perviy_uchastnik": CREW,
+    "vtoroy_uchastnik": CREW,
+    "tretiy_uchastnik": CREW,
+    "chetvertyy_uchastnik": CREW,
+    "naimenovanie_otlivki": CASTING,
+}
+_REFERENCE_COLUMNS = tuple(
+    (index, REFERENCE_FIELDS[field.name])
+    for index, field in enumerate(fields(PlavkaRecord))
+    if field.name in REFERENCE_FIELDS
+)
+
+
+def _resolve(kind: str, value: Optional[str]) -> Optional[str]:
+    return _intern(get_reference_dictionary().resolve(kind, value))
+
+
+def resolve_reference_columns(rows: Iterable[List]) -> None:
+    """Resolve the casting and crew cells of ``rows`` in place."""
+    for row in rows:
+        for index, kind in _REFERENCE_COLUMNS:
+            if index < len(row):
+                row[index] = _resolve(kind, row[index])
+
+
+def reference_values(rows: Iterable[Sequence]) -> Iterator[Tuple[str, object]]:
+    """``(kind, value)`` of every casting and crew cell of stored rows."""
+    for row in rows:
+        for index, kind in _REFERENCE_COLUMNS:
+            if index < len(row):
+                yield kind, row[index]
+
+
+REQUIRED_HEADER_FIELDS = ("Дата", "Смена", "Старший_смены")
+REPORT_TITLES = ("ОТЧЁТ О СМЕНЕ", "SHIFT REPORT")
+
+
+def _validate_report(header: dict, plavok_found: int, total_plavok: int) -> None:
+    if plavok_found != total_plavok:
+        raise InvalidReportFormatError(
+            f"Несоответствие количества плавок: ожидалось {total_plavok}, найдено {plavok_found}"
+        )
+
+    for field in REQUIRED_HEADER_FIELDS:
+        if field not in header or not header[field]:
+            raise InvalidReportFormatError(f"Отсутствует обязательное поле заголовка: {field}")
+
+
 @dataclass
 class ShiftReport:
     header: dict
@@ -101,121 +195,202 @@ class ShiftReport:
     total_plavok: int
 
     def validate(self) -> None:
-        if len(self.plavki) != self.total_plavok:
-            raise InvalidReportFormatError(
-                f"Несоответствие количества плавок: ожидалось {self.total_plavok}, найдено {len(self.plavki)}"
-            )
-        
-        required_header_fields = ["Дата", "Смена", "Старший_смены"]
-        for field in required_header_fields:
-            if field not in self.header or not self.header[field]:
-                raise InvalidReportFormatError(f"Отсутствует обязательное поле заголовка: {field}")
+        _validate_report(self.header, len(self.plavki), self.total_plavok)
 
 
-def parse_shift_report(text: str) -> ShiftReport:
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    
-    if not lines:
-        raise InvalidReportFormatError("Пустой отчёт")
-    
-    header = {}
-    plavki = []
-    current_plavka_data = {}
-    in_plavka_section = False
-    total_plavok = 0
-    
-    for line in lines:
+class ShiftReportParser:
+    """Incremental parser for a single shift report.
+
+    Lines are fed one at a time; a ``PlavkaRecord`` is returned as soon as its
+    "Плавка" block is closed by the next block or by ``close()``. Only the
+    header and the block being read are kept in memory. With ``keep_blocks``
+    no records are built: the raw fields of every closed block are collected
+    in ``blocks`` instead, for ``normalize.normalize_blocks``.
+    """
+
+    def __init__(self, keep_blocks: bool = False) -> None:
+        self.blocks: Optional[List[dict]] = [] if keep_blocks else None
+        self.header: dict = {}
+        self.total_plavok = 0
+        self.plavok_found = 0
+        self.in_plavka_section = False
+        self.has_content = False
+        self._current_plavka_data: dict = {}
+        self._plavka_date: Optional[datetime] = None
+
+    def starts_new_report(self, line: str) -> bool:
+        """Whether ``line`` begins another report after the one being parsed."""
+        if not self.header:
+            return False
+        return line.upper().startswith(REPORT_TITLES) or (self.in_plavka_section and line.startswith("Дата:"))
+
+    def feed_line(self, line: str) -> Optional[PlavkaRecord]:
+        line = line.strip()
+        if not line:
+            return None
+        self.has_content = True
+
         if line.startswith("===") or line.startswith("---"):
-            continue
-        
-        if line.upper().startswith("ОТЧЁТ О СМЕНЕ") or line.upper().startswith("SHIFT REPORT"):
-            continue
-        
-        if ":" in line and not in_plavka_section:
+            return None
+
+        if line.upper().startswith(REPORT_TITLES):
+            return None
+
+        if ":" in line and not self.in_plavka_section:
             key, value = line.split(":", 1)
             key = key.strip()
             value = value.strip()
-            header[key] = value
-            
+            self.header[key] = value
+
             if key.lower() == "всего плавок":
                 try:
-                    total_plavok = int(value)
+                    self.total_plavok = int(value)
                 except ValueError:
                     raise InvalidReportFormatError(f"Некорректное значение 'Всего плавок': {value}")
-                in_plavka_section = True
-                continue
-        
-        if in_plavka_section and line.startswith("Плавка"):
-            if current_plavka_data:
-                plavka = _create_plavka_record(current_plavka_data, header)
-                plavki.append(plavka)
-                current_plavka_data = {}
-        
-        if in_plavka_section and ":" in line:
+                self.in_plavka_section = True
+                return None
+
+        record = None
+        if self.in_plavka_section and line.startswith("Плавка"):
+            record = self._flush()
+
+        if self.in_plavka_section and ":" in line:
             key, value = line.split(":", 1)
-            current_plavka_data[key.strip()] = value.strip()
-    
-    if current_plavka_data:
-        plavka = _create_plavka_record(current_plavka_data, header)
-        plavki.append(plavka)
-    
-    report = ShiftReport(header=header, plavki=plavki, total_plavok=total_plavok)
-    report.validate()
-    
-    return report
-
-
-def _create_plavka_record(data: dict, header: dict) -> PlavkaRecord:
+            self._current_plavka_data[key.strip()] = value.strip()
+
+        return record
+
+    def close(self) -> Optional[PlavkaRecord]:
+        """Flush the last open block. Call ``validate()`` afterwards."""
+        if not self.has_content:
+            raise InvalidReportFormatError("Пустой отчёт")
+        return self._flush()
+
+    def validate(self) -> None:
+        _validate_report(self.header, self.plavok_found, self.total_plavok)
+
+    def _flush(self) -> Optional[PlavkaRecord]:
+        if not self._current_plavka_data:
+            return None
+        self.plavok_found += 1
+        data, self._current_plavka_data = self._current_plavka_data, {}
+        if self.blocks is not None:
+            self.blocks.append(data)
+            return None
+        if self._plavka_date is None:
+            self._plavka_date = parse_report_date(self.header)
+        return _create_plavka_record(data, self.header, self._plavka_date)
+
+
+def _iter_lines(source: Iterable[str | bytes]) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    for chunk in source:
+        if isinstance(chunk, str):
+            yield chunk
+            continue
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        yield from lines
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_plavka_records(
+    source: Iterable[str | bytes], parser: Optional[ShiftReportParser] = None
+) -> Iterator[PlavkaRecord]:
+    """Yield plavka records of one report as they are parsed.
+
+    ``source`` may yield text lines or raw UTF-8 byte chunks split at arbitrary
+    positions. The count and header checks run after the last record, so a
+    consumer must treat the records as tentative until the generator finishes
+    without ``InvalidReportFormatError``. Pass ``parser`` to read the header
+    afterwards.
+    """
+    if parser is None:
+        parser = ShiftReportParser()
+
+    for line in _iter_lines(source):
+        record = parser.feed_line(line)
+        if record is not None:
+            yield record
+
+    record = parser.close()
+    if record is not None:
+        yield record
+    parser.validate()
+
+
+def parse_shift_report(text: str) -> ShiftReport:
+    parser = ShiftReportParser()
+    plavki = list(iter_plavka_records(text.split("\n"), parser))
+    return ShiftReport(header=parser.header, plavki=plavki, total_plavok=parser.total_plavok)
+
+
+def parse_report_date(header: dict) -> datetime:
     try:
         date_str = header.get("Дата", "")
-        plavka_date = datetime.strptime(date_str, "%d.%m.%Y") if date_str else datetime.now()
+        return datetime.strptime(date_str, "%d.%m.%Y") if date_str else datetime.now()
     except ValueError:
-        plavka_date = datetime.now()
-    
+        return datetime.now()
+
+
+def make_id_plavka(plavka_date: datetime, nomer_plavki: str) -> int:
+    number = int(nomer_plavki) if nomer_plavki.isdigit() else 0
+    if number < 1000:
+        return (plavka_date.year * 100 + plavka_date.month) * 1000 + number
+    return int(f"{plavka_date.year}{plavka_date.month:02d}{number}")
+
+
+def _create_plavka_record(data: dict, header: dict, plavka_date: Optional[datetime] = None) -> PlavkaRecord:
+    if plavka_date is None:
+        plavka_date = parse_report_date(header)
+
     nomer_plavki = data.get("Плавка №", data.get("Номер", ""))
     uchetny_nomer = data.get("Учетный номер", f"{plavka_date.day}-{nomer_plavki}/{plavka_date.year % 100}")
-    
-    id_plavka = int(f"{plavka_date.year}{plavka_date.month:02d}{int(nomer_plavki) if nomer_plavki.isdigit() else 0:03d}")
-    
+
+    id_plavka = make_id_plavka(plavka_date, nomer_plavki)
+
     return PlavkaRecord(
         id_plavka=id_plavka,
         uchetny_nomer=uchetny_nomer,
         plavka_data=plavka_date,
         nomer_plavki=nomer_plavki,
         nomer_klastera=data.get("Номер кластера"),
-        starshiy_smeny=header.get("Старший_смены", data.get("Старший смены", "")),
-        perviy_uchastnik=data.get("Участник 1"),
-        vtoroy_uchastnik=data.get("Участник 2"),
-        tretiy_uchastnik=data.get("Участник 3"),
-        chetvertyy_uchastnik=data.get("Участник 4"),
-        naimenovanie_otlivki=data.get("Наименование отливки", ""),
-        tip_eksperementa=data.get("Тип эксперимента"),
-        sektor_a_opoki=data.get("Сектор A"),
-        sektor_b_opoki=data.get("Сектор B"),
-        sektor_c_opoki=data.get("Сектор C"),
-        sektor_d_opoki=data.get("Сектор D"),
+        starshiy_smeny=_resolve(CREW, header.get("Старший_смены", data.get("Старший смены", ""))),
+        perviy_uchastnik=_resolve(CREW, data.get("Участник 1")),
+        vtoroy_uchastnik=_resolve(CREW, data.get("Участник 2")),
+        tretiy_uchastnik=_resolve(CREW, data.get("Участник 3")),
+        chetvertyy_uchastnik=_resolve(CREW, data.get("Участник 4")),
+        naimenovanie_otlivki=_resolve(CASTING, data.get("Наименование отливки", "")),
+        tip_eksperementa=_intern(data.get("Тип эксперимента")),
+        sektor_a_opoki=_intern(data.get("Сектор A")),
+        sektor_b_opoki=_intern(data.get("Сектор B")),
+        sektor_c_opoki=_intern(data.get("Сектор C")),
+        sektor_d_opoki=_intern(data.get("Сектор D")),
         plavka_vremya_progreva_kovsha_a=data.get("Прогрев ковша A"),
         plavka_vremya_peremesheniya_a=data.get("Перемещение A"),
         plavka_vremya_zalivki_a=data.get("Заливка A"),
-        plavka_temperatura_zalivki_a=_parse_float(data.get("Температура A")),
+        plavka_temperatura_zalivki_a=parse_float(data.get("Температура A")),
         plavka_vremya_progreva_kovsha_b=data.get("Прогрев ковша B"),
         plavka_vremya_peremesheniya_b=data.get("Перемещение B"),
         plavka_vremya_zalivki_b=data.get("Заливка B"),
-        plavka_temperatura_zalivki_b=_parse_float(data.get("Температура B")),
+        plavka_temperatura_zalivki_b=parse_float(data.get("Температура B")),
         plavka_vremya_progreva_kovsha_c=data.get("Прогрев ковша C"),
         plavka_vremya_peremesheniya_c=data.get("Перемещение C"),
         plavka_vremya_zalivki_c=data.get("Заливка C"),
-        plavka_temperatura_zalivki_c=_parse_float(data.get("Температура C")),
+        plavka_temperatura_zalivki_c=parse_float(data.get("Температура C")),
         plavka_vremya_progreva_kovsha_d=data.get("Прогрев ковша D"),
         plavka_vremya_peremesheniya_d=data.get("Перемещение D"),
         plavka_vremya_zalivki_d=data.get("Заливка D"),
-        plavka_temperatura_zalivki_d=_parse_float(data.get("Температура D")),
+        plavka_temperatura_zalivki_d=parse_float(data.get("Температура D")),
         kommentariy=data.get("Комментарий"),
         plavka_vremya_zalivki=data.get("Время заливки"),
     )
 
 
-def _parse_float(value: Optional[str]) -> Optional[float]:
+def parse_float(value: Optional[str]) -> Optional[float]:
     if not value:
         return None
     try:
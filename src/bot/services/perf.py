@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from functools import lru_cache
+from typing import TYPE_CHECKING, Deque, Optional
+
+if TYPE_CHECKING:
+    import asyncio
+
+SAMPLE_WINDOW = 1000
+LOOP_LAG_INTERVAL = 0.5  # seconds
+
+
+class LatencySamples:
+    """The latest ``SAMPLE_WINDOW`` durations of an operation, in seconds.
+
+    ``deque.append`` is atomic, so hot paths record from any thread without
+    a lock; percentiles are computed only when someone asks, from a copy.
+    """
+
+    def __init__(self, window: int = SAMPLE_WINDOW) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self._samples.copy())
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def maximum(self) -> float:
+        return max(self._samples.copy(), default=0.0)
+
+
+class PerfCounters:
+    """In-process counters behind the admin ``/perf`` command.
+
+    ``import_latency`` runs from a pasted report or document to its reply, ``lock_wait``
+    is the time writers wait for a store lock, and ``loop_lag`` is how late
+    the event loop wakes up from a short sleep: anything blocking the loop
+    shows up there.
+    """
+
+    def __init__(self) -> None:
+        self.import_latency = LatencySamples()
+        self.lock_wait = LatencySamples()
+        self.loop_lag = LatencySamples()
+        self._lag_task: Optional[asyncio.Task] = None
+
+    def start_loop_monitor(self, interval: float = LOOP_LAG_INTERVAL) -> None:
+        # The store writers record lock waits here, so asyncio is only
+        # imported once there is an event loop to watch.
+        import asyncio
+
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.create_task(self._watch_loop(interval))
+
+    async def stop_loop_monitor(self) -> None:
+        import asyncio
+
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+    async def _watch_loop(self, interval: float) -> None:
+        import asyncio
+
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(interval)
+            self.loop_lag.record(max(0.0, time.monotonic() - started - interval))
+
+
+@lru_cache(maxsize=1)
+def get_perf_counters() -> PerfCounters:
+    return PerfCounters()
@@ -0,0 +1,642 @@
+"""Regenerate a plavka store from row partitions rendered in parallel.
+
+Usage:
+    python -m src.bot.services.rebuild [--workers N] [--destination FULL.xlsx] [STORE.xlsx]
+
+Without ``--destination`` the rows of the workbook are rewritten in place
+(archived months stay in the archive); with it, the whole history, archived
+rows included, goes to a new file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from datetime import time as day_time
+from itertools import chain
+from math import isfinite
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from filelock import Timeout
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.compat import safe_string
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import to_excel
+
+from src.bot.services.archive import ArchiveCatalog, iter_archived_rows, settle_catalog
+from src.bot.services.excel import (
+    EXPECTED_HEADERS,
+    PLAVKA_HEADERS,
+    ExcelServiceError,
+    ExcelValidationError,
+    StoreChanges,
+    StoreSnapshot,
+    load_store_catalog,
+    publish_store_changes,
+    read_row_blocks,
+    store_lock,
+)
+from src.bot.services.manifest import (
+    CHECKSUM_BLOCK_ROWS,
+    WorkbookManifest,
+    file_fingerprint,
+    header_hash,
+    load_manifest,
+    row_hash,
+    save_manifest,
+)
+from src.bot.services.shared_strings import SHARED_STRINGS_PART, declare_shared_strings
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PARTITION_ROWS = 25000
+SHEET_PART = "xl/worksheets/sheet1.xml"
+ZIP_LIMIT = 2**32 - 1  # no ZIP64: sizes must fit the classic headers
+
+
+# --- CRC-32 of concatenated parts ------------------------------------------
+# zlib exposes no crc32_combine; this is its GF(2) matrix method, so each
+# worker checksums its own part and the parts never pass through one process.
+
+
+def _gf2_times(matrix: List[int], vector: int) -> int:
+    total = 0
+    index = 0
+    while vector:
+        if vector & 1:
+            total ^= matrix[index]
+        vector >>= 1
+        index += 1
+    return total
+
+
+def _gf2_square(matrix: List[int]) -> List[int]:
+    return [_gf2_times(matrix, row) for row in matrix]
+
+
+def crc32_combine(crc1: int, crc2: int, length2: int) -> int:
+    """CRC-32 of ``A + B`` from ``crc32(A)``, ``crc32(B)`` and ``len(B)``."""
+    if length2 <= 0:
+        return crc1
+    odd = [0xEDB88320] + [1 << bit for bit in range(31)]  # one zero bit
+    even = _gf2_square(odd)  # two zero bits
+    odd = _gf2_square(even)  # four zero bits
+    while True:
+        even = _gf2_square(odd)
+        if length2 & 1:
+            crc1 = _gf2_times(even, crc1)
+        length2 >>= 1
+        if not length2:
+            break
+        odd = _gf2_square(even)
+        if length2 & 1:
+            crc1 = _gf2_times(odd, crc1)
+        length2 >>= 1
+        if not length2:
+            break
+    return crc1 ^ crc2
+
+
+# --- Streaming zip writer ----------------------------------------------------
+
+
+@dataclass
+class _Deflated:
+    """Raw deflate data ending on a byte boundary, with the CRC and size of its input."""
+
+    data: bytes
+    crc: int
+    size: int
+
+
+def deflate_part(data: bytes, final: bool = False) -> _Deflated:
+    """Compress ``data`` so that parts can be concatenated into one deflate stream."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+    return _Deflated(compressed, zlib.crc32(data), len(data))
+
+
+class _ZipStream:
+    """Writes a zip file entry by entry, each entry from deflated parts as they arrive.
+
+    Sizes and CRC follow the data in a data descriptor, so nothing is held
+    back or written twice.
+    """
+
+    def __init__(self, fileobj) -> None:
+        self._file = fileobj
+        self._entries: List[Tuple[str, int, int, int, int]] = []
+        stamp = time.localtime()
+        self._dos_time = (stamp.tm_hour << 11) | (stamp.tm_min << 5) | (stamp.tm_sec // 2)
+        self._dos_date = ((stamp.tm_year - 1980) << 9) | (stamp.tm_mon << 5) | stamp.tm_mday
+
+    def write(self, name: str, data: bytes) -> None:
+        self.write_parts(name, [deflate_part(data, final=True)])
+
+    def write_parts(self, name: str, parts: Iterable[_Deflated]) -> None:
+        """Write an entry from parts whose last one was deflated with ``final=True``."""
+        encoded_name = name.encode("ascii")
+        offset = self._file.tell()
+        self._file.write(
+            struct.pack(
+                "<4s5H3L2H", b"PK\x03\x04", 20, 0x08, zipfile.ZIP_DEFLATED,
+                self._dos_time, self._dos_date, 0, 0, 0, len(encoded_name), 0,
+            )
+        )
+        self._file.write(encoded_name)
+        crc = compressed = size = 0
+        for part in parts:
+            self._file.write(part.data)
+            crc = crc32_combine(crc, part.crc, part.size)
+            compressed += len(part.data)
+            size += part.size
+        if compressed > ZIP_LIMIT or size > ZIP_LIMIT or self._file.tell() > ZIP_LIMIT:
+            raise ExcelServiceError(f"{name} не помещается в XLSX без ZIP64.")
+        self._file.write(struct.pack("<4s3L", b"PK\x07\x08", crc, compressed, size))
+        self._entries.append((name, offset, crc, compressed, size))
+
+    def close(self) -> None:
+        directory_offset = self._file.tell()
+        for name, offset, crc, compressed, size in self._entries:
+            encoded_name = name.encode("ascii")
+            self._file.write(
+                struct.pack(
+                    "<4s6H3L5H2L", b"PK\x01\x02", 20, 20, 0x08, zipfile.ZIP_DEFLATED,
+                    self._dos_time, self._dos_date, crc, compressed, size,
+                    len(encoded_name), 0, 0, 0, 0, 0, offset,
+                )
+            )
+            self._file.write(encoded_name)
+        directory_size = self._file.tell() - directory_offset
+        self._file.write(
+            struct.pack(
+                "<4s4H2LH", b"PK\x05\x06", 0, 0, len(self._entries), len(self._entries),
+                directory_size, directory_offset, 0,
+            )
+        )
+
+
+# --- Workbook skeleton -------------------------------------------------------
+
+
+@dataclass
+class _Skeleton:
+    """Every part of an openpyxl workbook but the sheet rows, and the styles of its date cells."""
+
+    parts: List[Tuple[str, bytes]]
+    prologue: bytes
+    epilogue: bytes
+    styles: Dict[type, str]
+
+
+_STYLE_RE = re.compile(rb'<c r="[A-Z]+2" s="([0-9]+)"')
+
+
+def _skeleton(title: str) -> _Skeleton:
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title)
+    worksheet.append(["datetime", "date", "time"])
+    worksheet.append([datetime(2000, 1, 1, 1), date(2000, 1, 1), day_time(1)])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    parts = []
+    with zipfile.ZipFile(buffer) as archive:
+        for info in archive.infolist():
+            parts.append((info.filename, declare_shared_strings(info.filename, archive.read(info))))
+    sheet = dict(parts)[SHEET_PART]
+    styles = dict(zip((datetime, date, day_time), (style.decode() for style in _STYLE_RE.findall(sheet))))
+    return _Skeleton(
+        parts=parts,
+        prologue=sheet[: sheet.index(b"<sheetData>") + len(b"<sheetData>")],
+        epilogue=sheet[sheet.index(b"</sheetData>") :],
+        styles=styles,
+    )
+
+
+# --- Partitions --------------------------------------------------------------
+
+
+Columns = Optional[List[Optional[int]]]
+
+
+def _reorder(row: Sequence[object], columns: Columns) -> List:
+    """``row`` in the order of ``PLAVKA_HEADERS``, cell ``columns[i]`` going to column ``i``."""
+    if columns is None:
+        return list(row)
+    return [row[index] if index is not None and index < len(row) else None for index in columns]
+
+
+@dataclass
+class RowsPartition:
+    """Rows already read, shipped to the worker with the task."""
+
+    data: List[List]
+
+    @property
+    def row_count(self) -> int:
+        return len(self.data)
+
+    def rows(self) -> Iterator[List]:
+        return iter(self.data)
+
+
+@dataclass
+class ArchivePartition:
+    """Archived rows ``first_row..last_row`` of a store, read by the worker itself."""
+
+    xlsx_path: Path
+    catalog: ArchiveCatalog
+    first_row: int
+    last_row: int
+    columns: Columns = None
+
+    @property
+    def row_count(self) -> int:
+        return self.last_row - self.first_row + 1
+
+    def rows(self) -> Iterator[List]:
+        for _number, row in iter_archived_rows(self.xlsx_path, self.catalog, self.first_row - 1, self.last_row):
+            yield _reorder(row, self.columns)
+
+
+def _collect_strings(partition) -> List[str]:
+    """Distinct strings of a partition, in order of first appearance."""
+    seen: Dict[str, None] = {}
+    for row in partition.rows():
+        for value in row:
+            if type(value) is str and value not in seen:
+                seen[value] = None
+    return list(seen)
+
+
+@dataclass
+class _RenderedPartition:
+    part: _Deflated
+    rows: int
+    string_cells: int
+    last_id: object
+    checksums: Dict[int, int] = field(default_factory=dict)
+
+
+def _render_partition(
+    partition,
+    first_row: int,
+    first_sheet_row: int,
+    width: int,
+    string_ids: List[int],
+    styles: Dict[type, str],
+    checksums: bool,
+) -> _RenderedPartition:
+    """Render the ``<row>`` elements of a partition and deflate them.
+
+    Rows are numbered from ``first_row`` in the store, for the block sums,
+    and from ``first_sheet_row`` in the sheet. Strings become shared string
+    references: ``string_ids`` maps the partition's strings, numbered as
+    ``_collect_strings`` found them, to the workbook's table.
+    """
+    references = [get_column_letter(column) for column in range(1, width + 1)]
+    local: Dict[str, int] = {}
+    sums: Dict[int, int] = {}
+    chunks: List[str] = []
+    row_number = first_row
+    string_cells = 0
+    last_id = None
+    for row_number, row in enumerate(partition.rows(), start=first_row):
+        row = row[:width]
+        sheet_row = row_number - first_row + first_sheet_row
+        cells = [f'<row r="{sheet_row}">']
+        blanked = False
+        for reference, value in zip(references, row):
+            kind = type(value)
+            if value is None:
+                continue
+            if kind is str:
+                index = local.get(value)
+                if index is None:
+                    index = local[value] = len(local)
+                string_cells += 1
+                cells.append(f'<c r="{reference}{sheet_row}" t="s"><v>{string_ids[index]}</v></c>')
+            elif kind is int or kind is float and isfinite(value):
+                cells.append(f'<c r="{reference}{sheet_row}" t="n"><v>{safe_string(value)}</v></c>')
+            elif kind is float:
+                blanked = True
+            elif kind is bool:
+                cells.append(f'<c r="{reference}{sheet_row}" t="b"><v>{int(value)}</v></c>')
+            elif kind in styles:
+                cells.append(
+                    f'<c r="{reference}{sheet_row}" s="{styles[kind]}" t="n"><v>{safe_string(to_excel(value))}</v></c>'
+                )
+            else:
+                raise ExcelServiceError(f"Строка {row_number}: неподдерживаемое значение {value!r}.")
+        cells.append("</row>")
+        chunks.append("".join(cells))
+        if blanked:
+            # NaN and infinity have no spreadsheet value; like openpyxl, leave the cell empty.
+            row = [None if type(value) is float and not isfinite(value) else value for value in row]
+        last_id = row[0] if row else None
+        if checksums:
+            block = (row_number - 1) // CHECKSUM_BLOCK_ROWS
+            sums[block] = (sums.get(block, 0) + row_hash(row_number, row)) % 2**64
+    rows = row_number - first_row + 1 if chunks else 0
+    if rows != partition.row_count:
+        raise ExcelServiceError(f"Ожидалось {partition.row_count} строк с {first_row}-й, прочитано {rows}.")
+    return _RenderedPartition(deflate_part("".join(chunks).encode("utf-8")), rows, string_cells, last_id, sums)
+
+
+# --- Writing -----------------------------------------------------------------
+
+
+@dataclass
+class RebuildResult:
+    rows: int
+    strings: int
+    last_id: object
+    checksums: Dict[int, int]
+    partitions: int = 0
+
+
+def _shared_strings_xml(strings: Sequence[str], cells: int) -> bytes:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        f'count="{cells}" uniqueCount="{len(strings)}">'
+    ]
+    for text in strings:
+        text = ILLEGAL_CHARACTERS_RE.sub("", text)
+        escaped = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        space = ' xml:space="preserve"' if text != text.strip() else ""
+        parts.append(f"<si><t{space}>{escaped}</t></si>")
+    parts.append("</sst>")
+    return "".join(parts).encode("utf-8")
+
+
+def write_workbook(
+    destination: Path,
+    partitions: Iterable,
+    *,
+    headers: Sequence[str] = PLAVKA_HEADERS,
+    title: str = "Records",
+    first_row: int = 1,
+    workers: Optional[int] = None,
+    checksums: bool = False,
+) -> RebuildResult:
+    """Write ``headers`` and the rows of ``partitions`` as one workbook.
+
+    A partition is any picklable object with ``row_count`` and ``rows()``;
+    its rows follow those of the partition before it from sheet row 2 on,
+    numbered from ``first_row`` in the store. Partitions are taken from the
+    iterable only as the writer catches up, at most two per worker at a
+    time, so a generator reading them stays just ahead of the workers.
+    Workers list the strings of each partition, which are merged into one
+    shared strings table in partition order, then render and deflate its
+    rows; the parts are stitched into the sheet in order as they complete.
+    The strings of a ``RowsPartition`` are listed in this process, which
+    already holds its rows. ``checksums`` also returns the manifest block
+    sums of the rows.
+    """
+    skeleton = _skeleton(title)
+    width = len(headers)
+    table: Dict[str, int] = {header: index for index, header in enumerate(headers)}
+    workers = workers or os.cpu_count() or 1
+    # A single worker renders in this process rather than pickling every row.
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def submit(function, *args) -> Future:
+        if executor is not None:
+            return executor.submit(function, *args)
+        future: Future = Future()
+        future.set_result(function(*args))
+        return future
+
+    result = RebuildResult(rows=0, strings=0, last_id=None, checksums={})
+
+    def rendered() -> Iterator[_RenderedPartition]:
+        source = iter(partitions)
+        listing: Deque[Tuple[object, int, Future]] = deque()
+        rendering: Deque[Future] = deque()
+        next_row = first_row
+        while True:
+            while len(listing) + len(rendering) < 2 * workers:
+                partition = next(source, None)
+                if partition is None:
+                    break
+                if isinstance(partition, RowsPartition):
+                    strings: Future = Future()
+                    strings.set_result(_collect_strings(partition))
+                else:
+                    strings = submit(_collect_strings, partition)
+                listing.append((partition, next_row, strings))
+                next_row += partition.row_count
+                result.partitions += 1
+            if listing and len(rendering) < workers:
+                partition, start, strings = listing.popleft()
+                string_ids = [table.setdefault(value, len(table)) for value in strings.result()]
+                rendering.append(
+                    submit(
+                        _render_partition, partition, start, start - first_row + 2, width,
+                        string_ids, skeleton.styles, checksums,
+                    )
+                )
+            elif rendering:
+                yield rendering.popleft().result()
+            else:
+                return
+
+    try:
+        string_cells = width
+
+        def sheet_parts() -> Iterator[_Deflated]:
+            nonlocal string_cells
+            header_row = "".join(
+                f'<c r="{reference}1" t="s"><v>{index}</v></c>'
+                for index, reference in enumerate(get_column_letter(column) for column in range(1, width + 1))
+            )
+            yield deflate_part(skeleton.prologue + f'<row r="1">{header_row}</row>'.encode("utf-8"))
+            for part in rendered():
+                yield part.part
+                result.rows += part.rows
+                string_cells += part.string_cells
+                if part.rows:
+                    result.last_id = part.last_id
+                for block, total in part.checksums.items():
+                    result.checksums[block] = (result.checksums.get(block, 0) + total) % 2**64
+            yield deflate_part(skeleton.epilogue, final=True)
+
+        with destination.open("wb") as output:
+            stream = _ZipStream(output)
+            for name, data in skeleton.parts:
+                if name == SHEET_PART:
+                    stream.write_parts(name, sheet_parts())
+                else:
+                    stream.write(name, data)
+            strings = list(table)
+            stream.write(SHARED_STRINGS_PART, _shared_strings_xml(strings, string_cells))
+            stream.close()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    result.strings = len(table)
+    return result
+
+
+# --- Rebuilding a store --------------------------------------------------------
+
+
+def _header_columns(path: Path, header: Sequence[object]) -> Columns:
+    """Where each of ``PLAVKA_HEADERS`` is in ``header``; ``None`` if it is in place.
+
+    Columns are matched by name, so a store whose columns were reordered, or
+    which predates a column, is rebuilt in the canonical order. A journal or
+    a header with unknown or repeated names is refused rather than guessed.
+    """
+    names = list(header)
+    while names and names[-1] in (None, ""):
+        names.pop()
+    if names == list(PLAVKA_HEADERS):
+        return None
+    if names[: len(EXPECTED_HEADERS)] == list(EXPECTED_HEADERS):
+        raise ExcelValidationError(f"{path.name} содержит журнал заметок, а не плавки.")
+    unknown = [str(name) for name in names if name not in PLAVKA_HEADERS]
+    if unknown or not names or len(set(names)) != len(names):
+        raise ExcelValidationError(
+            f"Структура листа {path.name} не соответствует ожидаемой: "
+            f"{', '.join(unknown) if unknown else 'повторяющиеся заголовки'}."
+        )
+    return [names.index(name) if name in names else None for name in PLAVKA_HEADERS]
+
+
+def _live_partitions(snapshot: StoreSnapshot, columns: Columns) -> Iterator[RowsPartition]:
+    chunk: List[List] = []
+    for row in snapshot.worksheet.iter_rows(min_row=2, values_only=True):
+        chunk.append(_reorder(row, columns))
+        if len(chunk) == PARTITION_ROWS:
+            yield RowsPartition(chunk)
+            chunk = []
+    if chunk:
+        yield RowsPartition(chunk)
+
+
+def _archive_partitions(path: Path, catalog: ArchiveCatalog, columns: Columns) -> Iterator[ArchivePartition]:
+    for first_row in range(1, catalog.archived_rows + 1, PARTITION_ROWS):
+        last_row = min(first_row + PARTITION_ROWS - 1, catalog.archived_rows)
+        yield ArchivePartition(path, catalog, first_row, last_row, columns)
+
+
+def rebuild_workbook(
+    xlsx_path: Optional[Path] = None, *, destination: Optional[Path] = None, workers: Optional[int] = None
+) -> int:
+    """Regenerate a plavka store with ``write_workbook``; returns the number of rows written.
+
+    Cells are moved under the canonical headers by the names in the
+    store's header row, see ``_header_columns``. In place, the workbook rows
+    are rewritten and the manifest is rebuilt from the block sums the
+    workers return, so no second read is needed. Blocks whose sums differ
+    from the previous manifest are then read back for the reconcile
+    listeners, as after a reconcile. Archived rows stay where they are, so
+    a store with an archive must already have the canonical columns. With
+    ``destination``, the full history including archived rows is written
+    there and the store is left alone. Rows are read from the store while
+    the workers render the partitions before them, never all at once. The
+    store lock is held throughout.
+    """
+    if xlsx_path is None:
+        xlsx_path = get_settings().xlsx_path
+    if not xlsx_path.exists():
+        raise ExcelServiceError(f"Файл {xlsx_path.name} не найден.")
+    started = time.perf_counter()
+    try:
+        with store_lock(xlsx_path):
+            settle_catalog(xlsx_path)
+            catalog = load_store_catalog(xlsx_path)
+            previous = load_manifest(xlsx_path)
+            with StoreSnapshot(xlsx_path) as snapshot:
+                columns = _header_columns(xlsx_path, snapshot.header)
+                if columns is not None and destination is None and catalog.archived_rows:
+                    raise ExcelValidationError(
+                        f"Столбцы {xlsx_path.name} расположены не по порядку, а часть строк уже в архиве. "
+                        "Выгрузите историю с --destination."
+                    )
+                partitions = _live_partitions(snapshot, columns)
+                if destination is not None:
+                    partitions = chain(_archive_partitions(xlsx_path, catalog, columns), partitions)
+                    result = write_workbook(destination, partitions, workers=workers)
+                else:
+                    tmp_path = xlsx_path.with_name(f".{xlsx_path.name}.{os.getpid()}.{threading.get_ident()}.rebuild")
+                    try:
+                        result = write_workbook(
+                            tmp_path, partitions, first_row=catalog.archived_rows + 1, workers=workers, checksums=True
+                        )
+                        os.replace(tmp_path, xlsx_path)
+                    finally:
+                        tmp_path.unlink(missing_ok=True)
+            if destination is None:
+                block_sums = [int(checksum, 16) for checksum in catalog.checksums]
+                for block, total in sorted(result.checksums.items()):
+                    while len(block_sums) <= block:
+                        block_sums.append(0)
+                    block_sums[block] = (block_sums[block] + total) % 2**64
+                checksums = [f"{total:016x}" for total in block_sums]
+                row_count = catalog.archived_rows + result.rows
+                save_manifest(
+                    xlsx_path,
+                    WorkbookManifest(
+                        fingerprint=file_fingerprint(xlsx_path),
+                        mode="plavka",
+                        header_hash=header_hash(PLAVKA_HEADERS),
+                        row_count=row_count,
+                        last_id=result.last_id if isinstance(result.last_id, int) else None,
+                        block_checksums=checksums,
+                    ),
+                )
+                # The previous manifest is what the listeners last saw, edits
+                # that were never reconciled included.
+                seen, seen_rows = [], row_count
+                if previous is not None and previous.mode == "plavka":
+                    seen, seen_rows = previous.block_checksums, previous.row_count
+                changed = [
+                    block
+                    for block, checksum in enumerate(checksums)
+                    if block >= len(seen) or seen[block] != checksum
+                ]
+                publish_store_changes(
+                    StoreChanges(xlsx_path, "plavka", read_row_blocks(xlsx_path, changed), row_count, seen_rows)
+                )
+    except Timeout as exc:
+        raise ExcelServiceError(
+            f"Файл {xlsx_path.name} сейчас используется. Попробуйте повторить попытку позже."
+        ) from exc
+    logger.info(
+        "Rebuilt %s into %s: %d rows in %d partitions, %d strings, %.1f s",
+        xlsx_path.name, (destination or xlsx_path).name, result.rows, result.partitions,
+        result.strings, time.perf_counter() - started,
+    )
+    return result.rows
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("store", nargs="?", type=Path, help="plavka store, XLSX_PATH by default")
+    parser.add_argument("--destination", type=Path, help="write the full history here instead of in place")
+    parser.add_argument("--workers", type=int, help="worker processes, one per CPU by default")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    rebuild_workbook(args.store, destination=args.destination, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from src.bot.services.excel import ExcelServiceError, StoreChanges, reconcile_workbook
+from src.bot.services.manifest import current_manifest, load_manifest
+from src.bot.services.shards import store_paths
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = 10  # seconds
+
+
+def watched_stores() -> List[Tuple[Path, str]]:
+    """Every store on disk or configured, with its kind."""
+    stores = [(path, "plavka") for path in store_paths().values()]
+    stores.append((get_settings().journal_path, "journal"))
+    return stores
+
+
+class EditWatcher:
+    """Notices stores edited by hand while the bot is running.
+
+    Every ``interval`` seconds it compares each store with its manifest, which
+    costs a ``stat``; a store that no longer matches is reconciled, and the
+    reconcile listeners re-index just the edited blocks. Commits reconcile an
+    edited store themselves, so the watcher only matters between commits.
+    """
+
+    def __init__(self, interval: float = CHECK_INTERVAL) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def check(self) -> List[StoreChanges]:
+        found = []
+        for path, kind in watched_stores():
+            if not path.exists() or current_manifest(path) is not None or load_manifest(path) is None:
+                continue
+            try:
+                changes = reconcile_workbook(path, kind=kind)
+            except ExcelServiceError as exc:
+                logger.warning("Could not reconcile %s: %s", path.name, exc)
+                continue
+            if changes is not None and changes.changed:
+                found.append(changes)
+        return found
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.check)
+            except Exception as exc:  # pragma: no cover - keep watching
+                logger.exception("Checking the stores for edits failed: %s", exc)
+
+
+@lru_cache(maxsize=1)
+def get_edit_watcher() -> EditWatcher:
+    return EditWatcher()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import logging
+from itertools import chain
+from pathlib import Path
+from typing import List
+
+from src.bot.services.parser import reference_values
+from src.bot.services.references import ReferenceDictionary, get_reference_dictionary, install_reference_dictionary
+from src.bot.services.excel import iter_store_rows
+from src.bot.services.shards import store_paths
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def reference_path() -> Path:
+    return get_settings().xlsx_path.with_name("references.json")
+
+
+def load_references() -> ReferenceDictionary:
+    """Install the saved reference dictionary, building it from the stores if there is none.
+
+    Call before the parse pool starts: worker processes inherit the
+    dictionary installed at that moment and do not see what is learned
+    later, so committers resolve the rows again before writing them.
+    """
+    path = reference_path()
+    dictionary = None
+    if path.exists():
+        try:
+            dictionary = ReferenceDictionary.load(path)
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not read %s, rebuilding it: %s", path.name, exc)
+    if dictionary is None:
+        rows = chain.from_iterable(map(iter_store_rows, store_paths().values()))
+        dictionary = ReferenceDictionary.from_values(reference_values(rows))
+        dictionary.save(path)
+        logger.info("Built the reference dictionary from the stores: %d spellings", len(dictionary))
+    install_reference_dictionary(dictionary)
+    return dictionary
+
+
+def learn_committed_rows(rows: List[List], _path: Path) -> None:
+    """Commit listener counting the castings and crew of committed rows."""
+    dictionary = get_reference_dictionary()
+    for kind, value in reference_values(rows):
+        dictionary.add(kind, value)
+
+
+def save_references() -> None:
+    get_reference_dictionary().save(reference_path())
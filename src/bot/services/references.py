@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CASTING = "casting"
+CREW = "crew"
+KINDS = (CASTING, CREW)
+
+NGRAM = 3
+MIN_FUZZY_COUNT = 3  # spellings seen fewer times are never suggested
+FUZZY_THRESHOLD = 0.75  # Dice similarity of trigram sets
+FUZZY_MARGIN = 0.1  # over the runner-up, or the match is ambiguous
+RESOLVED_CACHE_SIZE = 4096  # raw values whose resolution is memoized
+
+
+def normalize_key(value: str) -> str:
+    """Lookup key of a spelling: case-folded, ``ё`` as ``е``, single spaces."""
+    return " ".join(value.casefold().replace("ё", "е").split())
+
+
+def _digits(key: str) -> str:
+    return "".join(filter(str.isdigit, key))
+
+
+def ngrams(key: str) -> FrozenSet[str]:
+    padded = f" {key} "
+    return frozenset(padded[index : index + NGRAM] for index in range(len(padded) - NGRAM + 1))
+
+
+class _Vocabulary:
+    """Known spellings of one kind of value, indexed for exact and fuzzy lookup."""
+
+    def __init__(self) -> None:
+        self.spellings: Dict[str, Counter[str]] = {}
+        self.canonical: Dict[str, str] = {}
+        self.postings: Dict[str, List[str]] = {}
+        self.grams: Dict[str, FrozenSet[str]] = {}
+
+    def add(self, value: str, count: int) -> Tuple[bool, bool]:
+        """Count a spelling; return whether it is new and whether its key's canonical spelling changed."""
+        key = normalize_key(value)
+        if not key:
+            return False, False
+        spellings = self.spellings.get(key)
+        if spellings is None:
+            spellings = self.spellings[key] = Counter()
+        new = value not in spellings
+        before = sum(spellings.values())
+        spellings[value] += count
+        canonical = spellings.most_common(1)[0][0]
+        changed = self.canonical.get(key) != canonical
+        self.canonical[key] = canonical
+        if before < MIN_FUZZY_COUNT <= before + count:
+            grams = self.grams[key] = ngrams(key)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(key)
+        return new, changed
+
+    def closest(self, key: str) -> Optional[Tuple[str, float]]:
+        grams = ngrams(key)
+        digits = _digits(key)
+        floor = FUZZY_THRESHOLD - FUZZY_MARGIN
+        # A spelling sharing fewer trigrams than ``needed`` scores below
+        # ``floor``, so it is enough to probe all but ``needed - 1`` of them:
+        # the rarest, skipping the long lists of the most common trigrams.
+        needed = math.ceil(floor * len(grams) / (2 - floor))
+        probes = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))[: len(grams) - needed + 1]
+        candidates = {candidate for gram in probes for candidate in self.postings.get(gram, ())}
+        scores = sorted(
+            (score, candidate)
+            for candidate in candidates
+            for score in (2 * len(grams & self.grams[candidate]) / (len(grams) + len(self.grams[candidate])),)
+            if score >= floor and _digits(candidate) == digits
+        )
+        if not scores:
+            return None
+        score, best = scores[-1]
+        if len(scores) > 1 and score - scores[-2][0] < FUZZY_MARGIN:
+            return None
+        return self.canonical[best], score
+
+
+class ReferenceDictionary:
+    """Known castings and crew, as spelled most often in the stores.
+
+    Every spelling is filed under ``normalize_key``, so case, ``ё`` and extra
+    spaces resolve with one dict lookup; that is the only rewrite ``resolve``
+    makes. The trigram match resolves nothing: a value with no such key is
+    kept as typed, and its closest spelling seen at least ``MIN_FUZZY_COUNT``
+    times is only written to the log as a suggestion. Part numbers and
+    surnames one letter apart are similar too, so applying it would merge
+    different castings and people; spellings with different digits are not
+    even suggested. Candidates come from an index of character trigrams, so
+    only entries sharing one of the rarer trigrams are scored, never the
+    whole vocabulary.
+
+    The last ``RESOLVED_CACHE_SIZE`` resolutions are memoized per raw value,
+    so a report repeating the same names pays for each name once. They are
+    dropped whenever a spelling is added or a canonical spelling changes.
+    """
+
+    def __init__(self) -> None:
+        self._vocabularies = {kind: _Vocabulary() for kind in KINDS}
+        self._resolved: OrderedDict[Tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(vocabulary.spellings) for vocabulary in self._vocabularies.values())
+
+    def add(self, kind: str, value: object, count: int = 1) -> bool:
+        """Count a spelling; return whether it was not known before."""
+        if type(value) is not str:
+            return False
+        with self._lock:
+            new, changed = self._vocabularies[kind].add(value, count)
+            if new or changed:
+                self._resolved.clear()
+        return new
+
+    def lookup(self, kind: str, value: str) -> Optional[str]:
+        return self._vocabularies[kind].canonical.get(normalize_key(value))
+
+    def closest(self, kind: str, value: str) -> Optional[Tuple[str, float]]:
+        """The unambiguous best fuzzy match of ``value`` with the same digits, and its similarity."""
+        return self._vocabularies[kind].closest(normalize_key(value))
+
+    def resolve(self, kind: str, value: Optional[str]) -> Optional[str]:
+        """The known spelling of ``value`` under its normalized key, or ``value`` itself if there is none."""
+        if not value or type(value) is not str:
+            return value
+        cache_key = (kind, value)
+        with self._lock:
+            resolved = self._resolved.get(cache_key)
+            if resolved is not None:
+                self._resolved.move_to_end(cache_key)
+                return resolved
+            resolved = self.lookup(kind, value)
+            if resolved is None:
+                match = self.closest(kind, value)
+                if match is not None and match[1] >= FUZZY_THRESHOLD:
+                    logger.info("New %s %r kept as typed, similar to %r (%.2f)", kind, value, match[0], match[1])
+                resolved = value
+            self._resolved[cache_key] = resolved
+            if len(self._resolved) > RESOLVED_CACHE_SIZE:
+                self._resolved.popitem(last=False)
+        return resolved
+
+    def to_dict(self) -> Dict[str, Dict[str, int]]:
+        return {
+            kind: {
+                value: count
+                for spellings in vocabulary.spellings.values()
+                for value, count in spellings.items()
+            }
+            for kind, vocabulary in self._vocabularies.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Mapping[str, int]]) -> "ReferenceDictionary":
+        dictionary = cls()
+        for kind in KINDS:
+            for value, count in data.get(kind, {}).items():
+                dictionary.add(kind, value, count)
+        return dictionary
+
+    @classmethod
+    def from_values(cls, values: Iterable[Tuple[str, object]]) -> "ReferenceDictionary":
+        dictionary = cls()
+        for kind, value in values:
+            dictionary.add(kind, value)
+        return dictionary
+
+    def save(self, path: Path) -> None:
+        with self._lock:
+            data = self.to_dict()
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ReferenceDictionary":
+        return cls.from_dict(json.loads(path.read_text(encoding="utf-8")))
+
+
+_active = ReferenceDictionary()
+
+
+def get_reference_dictionary() -> ReferenceDictionary:
+    """The dictionary the parser resolves against; empty until one is installed."""
+    return _active
+
+
+def install_reference_dictionary(dictionary: ReferenceDictionary) -> None:
+    global _active
+    _active = dictionary
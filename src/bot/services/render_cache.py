@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class RenderCache:
+    """Caches rendered response texts until the store version changes.
+
+    An entry is returned only when it was stored for exactly the current store
+    version, so any append invalidates every cached view at once. A version
+    is any hashable value; see ``stores_version`` for the one menus use.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Hashable, Tuple[Hashable, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, version: Hashable, text: str) -> None:
+        self._entries[key] = (version, text)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@lru_cache(maxsize=1)
+def get_render_cache() -> RenderCache:
+    return RenderCache()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+EXPECTED_HEADERS: Sequence[str] = (
+    "timestamp",
+    "user_id",
+    "username",
+    "chat_id",
+    "message_id",
+    "text",
+)
+
+PLAVKA_HEADERS: Sequence[str] = (
+    "id_plavka",
+    "Учетный_номер",
+    "Плавка_дата",
+    "Номер_плавки",
+    "Номер_кластера",
+    "Старший_смены_плавки",
+    "Первый_участник_смены_плавки",
+    "Второй_участник_смены_плавки",
+    "Третий_участник_смены_плавки",
+    "Четвертый_участник_смены_плавки",
+    "Наименование_отливки",
+    "Тип_эксперемента",
+    "Сектор_A_опоки",
+    "Сектор_B_опоки",
+    "Сектор_C_опоки",
+    "Сектор_D_опоки",
+    "Плавка_время_прогрева_ковша_A",
+    "Плавка_время_перемещения_A",
+    "Плавка_время_заливки_A",
+    "Плавка_температура_заливки_A",
+    "Плавка_время_прогрева_ковша_B",
+    "Плавка_время_перемещения_B",
+    "Плавка_время_заливки_B",
+    "Плавка_температура_заливки_B",
+    "Плавка_время_прогрева_ковша_C",
+    "Плавка_время_перемещения_C",
+    "Плавка_время_заливки_C",
+    "Плавка_температура_заливки_C",
+    "Плавка_время_прогрева_ковша_D",
+    "Плавка_время_перемещения_D",
+    "Плавка_время_заливки_D",
+    "Плавка_температура_заливки_D",
+    "Комментарий",
+    "Плавка_время_заливки",
+    "id",
+)
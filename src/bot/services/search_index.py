@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import json
+import logging
+import re
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.bot.services.excel import (
+    PLAVKA_HEADERS,
+    ExcelValidationError,
+    StoreChanges,
+    add_commit_listener,
+    add_reconcile_listener,
+    follow_committed_rows,
+    read_row_blocks,
+    remove_commit_listener,
+    remove_reconcile_listener,
+)
+from src.bot.services.manifest import CHECKSUM_BLOCK_ROWS, block_checksum, current_manifest, extend_block_checksums
+from src.bot.services.shards import shard_of_path, store_paths
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+RESULT_LIMIT = 10
+MIN_TOKEN_LENGTH = 2
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_COMMENT_COLUMN = PLAVKA_HEADERS.index("Комментарий")
+_JOURNAL_TEXT_COLUMN = 5
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens; ``ё`` is folded into ``е``.
+
+    Russian inflection is left to prefix matching at query time: «трещин»
+    finds «трещина», «трещины» and «трещинами».
+    """
+    normalized = text.casefold().replace("ё", "е")
+    return [token for token in _TOKEN_RE.findall(normalized) if len(token) >= MIN_TOKEN_LENGTH or token.isdigit()]
+
+
+def _format_date(value: object) -> str:
+    if isinstance(value, date):
+        return value.strftime("%d.%m.%Y")
+    return str(value) if value not in (None, "") else "—"
+
+
+def _row_to_document(row: List, kind: str) -> Optional[Tuple[str, str]]:
+    """Return ``(label, text)`` of a workbook row, or ``None`` if it has no free text."""
+    if kind == "journal":
+        text = row[_JOURNAL_TEXT_COLUMN] if len(row) > _JOURNAL_TEXT_COLUMN else None
+        label = f"Заметка · {row[0] or '—'} · {row[2] or row[1] or '—'}"
+    else:
+        text = row[_COMMENT_COLUMN] if len(row) > _COMMENT_COLUMN else None
+        label = f"Плавка {row[3] or '—'} · {_format_date(row[2])} · {row[1] or '—'}"
+    if text in (None, "") or not str(text).strip():
+        return None
+    return label, str(text)
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    kind: str
+    row: int
+    label: Optional[str]
+    text: Optional[str]
+
+
+class SearchIndex:
+    """Inverted index over plavka comments and journal notes.
+
+    Documents are kept in memory as postings lists per token plus a sorted
+    vocabulary for prefix lookups. Every indexed batch is appended to a JSON
+    Lines log next to the workbook, so a restart only replays the log and the
+    rows committed since, instead of re-reading the whole workbook.
+
+    With ``follow_shards`` the plavka shards are indexed too, under store keys
+    like ``plavka@ceh1``, including shards created while the bot is running.
+
+    The index keeps the same block checksums as the workbook manifests. Rows
+    edited by hand are re-indexed from ``reconcile_workbook`` while the bot
+    runs, and by comparing checksums on the next start otherwise; a later entry
+    for a row supersedes the earlier one.
+    """
+
+    def __init__(
+        self, path: Path, stores: Optional[Dict[str, Optional[Path]]] = None, *, follow_shards: bool = False
+    ) -> None:
+        self.path = path
+        # Store key -> workbook path; ``None`` means the configured path.
+        self.stores = stores if stores is not None else {"plavka": None, "journal": None}
+        self.follow_shards = follow_shards
+        self.indexed_rows: Dict[str, int] = {kind: 0 for kind in self.stores}
+        self.ready = False
+        self._lock = threading.Lock()
+        self._documents: List[SearchHit] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_sorted = True
+        self._row_documents: Dict[Tuple[str, int], int] = {}
+        self._superseded: Set[int] = set()
+        self._checksums: Dict[str, List[str]] = {}
+        self._unsubscribe: List[Callable[[], None]] = []
+        self._following: Set[str] = set()
+        self._paths: Dict[Path, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents) - len(self._superseded)
+
+    def _add_document(self, hit: SearchHit) -> None:
+        previous = self._row_documents.pop((hit.kind, hit.row), None)
+        if previous is not None:
+            self._superseded.add(previous)
+        if hit.text is None:
+            # The row no longer has any text.
+            return
+
+        document_id = len(self._documents)
+        self._row_documents[(hit.kind, hit.row)] = document_id
+        self._documents.append(hit)
+        for token in set(tokenize(hit.text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = [document_id]
+                self._vocabulary.append(token)
+                self._vocabulary_sorted = False
+            else:
+                postings.append(document_id)
+
+    def _clear(self) -> None:
+        self.indexed_rows = {kind: 0 for kind in self.stores}
+        self._documents.clear()
+        self._row_documents.clear()
+        self._superseded.clear()
+        self._checksums.clear()
+        self._postings.clear()
+        self._vocabulary.clear()
+        self._vocabulary_sorted = True
+
+    def load(self) -> None:
+        """Rebuild the in-memory index from the log, dropping a torn last line."""
+        with self._lock:
+            self._clear()
+            try:
+                data = self.path.read_bytes()
+            except FileNotFoundError:
+                return
+
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                logger.warning("Dropping an incomplete entry at the end of %s", self.path)
+                with self.path.open("r+b") as log:
+                    log.truncate(complete)
+
+            for line in data[:complete].decode("utf-8").splitlines():
+                entry = json.loads(line)
+                if isinstance(entry, dict):
+                    for kind, rows in entry["rows"].items():
+                        self.indexed_rows[kind] = int(rows)
+                        del self._checksums.setdefault(kind, [])[-(-int(rows) // CHECKSUM_BLOCK_ROWS) :]
+                    for kind, blocks in entry.get("blocks", {}).items():
+                        checksums = self._checksums.setdefault(kind, [])
+                        for block, checksum in blocks.items():
+                            block = int(block)
+                            checksums.extend(["0" * 16] * (block + 1 - len(checksums)))
+                            checksums[block] = checksum
+                else:
+                    # Every line decodes to fresh strings; store kinds and
+                    # repeated comments («Плавка прошла штатно») are shared.
+                    kind, row, label, text = entry
+                    self._add_document(SearchHit(sys.intern(kind), row, label, text and sys.intern(text)))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+            self.path.write_bytes(b"")
+
+    def _log(self, lines: List[str], kind: str, blocks: Iterable[int]) -> None:
+        checksums = self._checksums.get(kind, [])
+        lines.append(
+            json.dumps(
+                {
+                    "rows": {kind: self.indexed_rows.get(kind, 0)},
+                    "blocks": {kind: {str(block): checksums[block] for block in blocks if block < len(checksums)}},
+                }
+            )
+        )
+        with self.path.open("a", encoding="utf-8") as log:
+            log.write("\n".join(lines) + "\n")
+
+    def add_rows(self, rows: List[List], kind: str) -> None:
+        """Index a batch of committed workbook rows, in workbook order."""
+        with self._lock:
+            lines = []
+            row_number = self.indexed_rows.get(kind, 0)
+            touched = extend_block_checksums(self._checksums.setdefault(kind, []), row_number + 1, rows)
+            for row in rows:
+                row_number += 1
+                document = _row_to_document(row, kind)
+                if document is None:
+                    continue
+                hit = SearchHit(kind, row_number, *document)
+                self._add_document(hit)
+                lines.append(json.dumps([hit.kind, hit.row, hit.label, hit.text], ensure_ascii=False))
+            self.indexed_rows[kind] = row_number
+            self._log(lines, kind, touched)
+
+    def apply_blocks(self, blocks: Dict[int, List[List]], kind: str, row_count: Optional[int] = None) -> int:
+        """Re-index whole checksum blocks of a store whose rows were edited in place.
+
+        Only rows whose label or text differ get a new entry. With
+        ``row_count`` the store is known to have exactly that many rows now,
+        so rows past it are dropped. Returns the number of rows re-indexed.
+        """
+        with self._lock:
+            limit = self.indexed_rows.get(kind, 0) if row_count is None else row_count
+            checksums = self._checksums.setdefault(kind, [])
+            lines = []
+            for block, rows in sorted(blocks.items()):
+                first_row = block * CHECKSUM_BLOCK_ROWS + 1
+                rows = rows[: max(0, limit - first_row + 1)]
+                for row_number, row in enumerate(rows, start=first_row):
+                    document = _row_to_document(row, kind)
+                    current_id = self._row_documents.get((kind, row_number))
+                    current = self._documents[current_id] if current_id is not None else None
+                    if document is None and current is None:
+                        continue
+                    if current is not None and document == (current.label, current.text):
+                        continue
+                    hit = SearchHit(kind, row_number, *(document or (None, None)))
+                    self._add_document(hit)
+                    lines.append(json.dumps([hit.kind, hit.row, hit.label, hit.text], ensure_ascii=False))
+                checksums.extend(["0" * 16] * (block + 1 - len(checksums)))
+                checksums[block] = block_checksum(block, rows)
+
+            if row_count is not None:
+                if row_count < self.indexed_rows.get(kind, 0):
+                    for row_number in range(row_count + 1, self.indexed_rows[kind] + 1):
+                        if (kind, row_number) in self._row_documents:
+                            self._add_document(SearchHit(kind, row_number, None, None))
+                            lines.append(json.dumps([kind, row_number, None, None]))
+                del checksums[-(-row_count // CHECKSUM_BLOCK_ROWS) :]
+                self.indexed_rows[kind] = row_count
+            self._log(lines, kind, blocks)
+            return len(lines)
+
+    def _prefix_words(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = start
+        while end < len(self._vocabulary) and self._vocabulary[end].startswith(prefix):
+            end += 1
+        return self._vocabulary[start:end]
+
+    def search(self, query: str, limit: int = RESULT_LIMIT) -> Tuple[List[SearchHit], int]:
+        """Return the newest ``limit`` documents containing every query word as a prefix, and the match count."""
+        tokens = tokenize(query)
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            if not self._vocabulary_sorted:
+                self._vocabulary.sort()
+                self._vocabulary_sorted = True
+
+            words = [self._prefix_words(token) for token in set(tokens)]
+            if len(words) == 1 and len(words[0]) == 1:
+                # Postings are in insertion order, so the newest matches are at the end.
+                postings = self._postings[words[0][0]]
+                if self._superseded:
+                    postings = [document_id for document_id in postings if document_id not in self._superseded]
+                newest = postings[: -limit - 1 : -1]
+                return [self._documents[document_id] for document_id in newest], len(postings)
+
+            candidates: List[Set[int]] = sorted(
+                (set().union(*(self._postings[word] for word in matched_words)) for matched_words in words), key=len
+            )
+            matched = candidates[0].intersection(*candidates[1:]) - self._superseded
+            newest = heapq.nlargest(limit, matched)
+            return [self._documents[document_id] for document_id in newest], len(matched)
+
+    def _on_plavka_commit(self, rows: List[List], path: Path) -> None:
+        """Start following a shard on its first commit; its later commits come through its own listener."""
+        shard = shard_of_path(path)
+        key = f"plavka@{shard}"
+        if shard is None or key in self.stores:
+            return
+        self.stores[key] = path
+        self._following.add(key)
+        self._paths[path] = key
+        self.indexed_rows[key] = 0
+        self.add_rows(rows, key)
+
+        def on_commit(rows: List[List], committed_path: Path) -> None:
+            if committed_path == path:
+                self.add_rows(rows, key)
+
+        add_commit_listener(on_commit, "plavka")
+        self._unsubscribe.append(lambda: remove_commit_listener(on_commit, "plavka"))
+
+    def _on_reconcile(self, changes: StoreChanges) -> None:
+        key = self._paths.get(changes.path)
+        if key is not None:
+            self.apply_blocks(changes.blocks, key, changes.row_count)
+
+    def _store_path(self, key: str) -> Path:
+        xlsx_path = self.stores[key]
+        if xlsx_path is not None:
+            return xlsx_path
+        settings = get_settings()
+        return settings.xlsx_path if key.partition("@")[0] == "plavka" else settings.journal_path
+
+    def _verify_blocks(self) -> None:
+        """Re-index the blocks that were edited while the index was not running."""
+        for key in list(self.stores):
+            xlsx_path = self._store_path(key)
+            manifest = current_manifest(xlsx_path)
+            if manifest is None:
+                # Not reconciled yet; reconcile_workbook will report the edit.
+                continue
+            with self._lock:
+                rows = min(self.indexed_rows.get(key, 0), manifest.row_count)
+                checksums = self._checksums.get(key, [])
+                full_blocks = rows // CHECKSUM_BLOCK_ROWS
+                if rows == manifest.row_count:
+                    full_blocks = -(-rows // CHECKSUM_BLOCK_ROWS)
+                stale = [
+                    block
+                    for block in range(full_blocks)
+                    if block >= len(checksums) or checksums[block] != manifest.block_checksums[block]
+                ]
+            if stale:
+                reindexed = self.apply_blocks(read_row_blocks(xlsx_path, stale), key)
+                logger.info("Search index re-read %d edited blocks of %s: %d entries", len(stale), key, reindexed)
+
+    def _follow_stores(self) -> None:
+        add_reconcile_listener(self._on_reconcile)
+        self._unsubscribe.append(lambda: remove_reconcile_listener(self._on_reconcile))
+        if self.follow_shards:
+            # Subscribe before listing the shards, so a shard created in between is not missed.
+            add_commit_listener(self._on_plavka_commit, "plavka")
+            self._unsubscribe.append(lambda: remove_commit_listener(self._on_plavka_commit, "plavka"))
+            for shard, xlsx_path in store_paths().items():
+                if shard is not None:
+                    self.stores.setdefault(f"plavka@{shard}", xlsx_path)
+
+        for key, xlsx_path in list(self.stores.items()):
+            if key in self._following:
+                continue
+            self._following.add(key)
+            self._paths[self._store_path(key)] = key
+            self._unsubscribe.append(
+                follow_committed_rows(
+                    self.indexed_rows.get(key, 0),
+                    partial(self.add_rows, kind=key),
+                    kind=key.partition("@")[0],
+                    xlsx_path=xlsx_path,
+                )
+            )
+
+    def start(self) -> None:
+        """Load the log, catch up with the stores and follow new commits."""
+        try:
+            self.load()
+            self._follow_stores()
+            self._verify_blocks()
+        except (ExcelValidationError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            # A store was replaced by a shorter one, or the log is damaged.
+            logger.warning("Rebuilding the search index from scratch: %s", exc)
+            self.stop()
+            self.reset()
+            self._follow_stores()
+        self.ready = True
+        logger.info("Search index is ready: %d documents, rows per store %s", len(self), self.indexed_rows)
+
+    def stop(self) -> None:
+        while self._unsubscribe:
+            self._unsubscribe.pop()()
+        self._following.clear()
+        self._paths.clear()
+        self.ready = False
+
+
+@lru_cache(maxsize=1)
+def get_search_index() -> SearchIndex:
+    xlsx_path = get_settings().xlsx_path
+    return SearchIndex(xlsx_path.with_name(f"{xlsx_path.name}.search.jsonl"), follow_shards=True)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import pickle
+import tempfile
+from datetime import date, datetime
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from src.bot.services.excel import PLAVKA_HEADERS, get_store_version, iter_store_rows
+from src.bot.services.manifest import file_fingerprint
+from src.core.config import SHARD_NAME_RE, get_settings
+
+logger = logging.getLogger(__name__)
+
+_DATE_COLUMN = PLAVKA_HEADERS.index("Плавка_дата")
+MAX_OPEN_RUNS = 64  # sorted runs read at once; more are merged in passes
+
+
+def shard_for_chat(chat_id: int) -> Optional[str]:
+    """Name of the plavka store a chat writes to, or ``None`` for plavka.xlsx itself.
+
+    With ``SHARD_BY=chat`` every chat gets its own store; with
+    ``SHARD_BY=plant`` chats listed in ``PLANTS`` write to their plant's store
+    and the others stay on the shared one.
+    """
+    settings = get_settings()
+    if settings.shard_by == "chat":
+        return f"chat{chat_id}".replace("-", "_")
+    if settings.shard_by == "plant":
+        return settings.plant_chats.get(chat_id)
+    return None
+
+
+def store_path(shard: Optional[str]) -> Path:
+    """Workbook of a shard: ``plavka.<shard>.xlsx`` next to plavka.xlsx."""
+    xlsx_path = get_settings().xlsx_path
+    if shard is None:
+        return xlsx_path
+    return xlsx_path.with_name(f"{xlsx_path.stem}.{shard}{xlsx_path.suffix}")
+
+
+def shard_of_path(path: Path) -> Optional[str]:
+    """Inverse of ``store_path`` for shard workbooks; ``None`` for anything else."""
+    xlsx_path = get_settings().xlsx_path
+    prefix, suffix = f"{xlsx_path.stem}.", xlsx_path.suffix
+    name = path.name
+    if path.parent != xlsx_path.parent or not (name.startswith(prefix) and name.endswith(suffix)):
+        return None
+    shard = name[len(prefix) : len(name) - len(suffix)]
+    return shard if SHARD_NAME_RE.fullmatch(shard) else None
+
+
+def store_paths() -> Dict[Optional[str], Path]:
+    """Every plavka store on disk, keyed by shard; plavka.xlsx comes first."""
+    xlsx_path = get_settings().xlsx_path
+    paths: Dict[Optional[str], Path] = {None: xlsx_path} if xlsx_path.exists() else {}
+    for path in sorted(xlsx_path.parent.glob(f"{xlsx_path.stem}.*{xlsx_path.suffix}")):
+        shard = shard_of_path(path)
+        if shard is not None:
+            paths[shard] = path
+    return paths
+
+
+def stores_version(*extra_paths: Path) -> Hashable:
+    """Version of every plavka store and ``extra_paths``, for keying read caches.
+
+    The commit counter of this process changes with its own writes; the
+    ``(size, mtime_ns)`` fingerprints change with writes from any other
+    process and with hand edits, so a cached view is never served after
+    either. Costs one ``stat`` per file.
+    """
+    paths = [*store_paths().values(), *extra_paths]
+    return get_store_version(), tuple((path.name, *(file_fingerprint(path) or ())) for path in paths)
+
+
+def _row_date(row: List) -> Optional[datetime]:
+    value = row[_DATE_COLUMN] if len(row) > _DATE_COLUMN else None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return None
+
+
+def _keyed(rows: Iterable[List]) -> Iterator[Tuple[datetime, List]]:
+    """Rows with their merge key; like compaction, a row without a date takes the date of the row before it."""
+    key = datetime.min
+    for row in rows:
+        key = _row_date(row) or key
+        yield key, row
+
+
+def _read_run(path: Path) -> Iterator[Tuple[datetime, List]]:
+    with path.open("rb") as handle:
+        unpickler = pickle.Unpickler(handle)
+        while True:
+            try:
+                yield unpickler.load()
+            except EOFError:
+                return
+
+
+class _Runs:
+    """Sorted runs of keyed rows spilled to files in ``directory``."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.paths: List[Path] = []
+        self._created = 0
+
+    def write(self, keyed_rows: Iterable[Tuple[datetime, List]]) -> None:
+        """Split ``keyed_rows`` into ascending runs, one file each."""
+        handle = pickler = None
+        previous = None
+        try:
+            for item in keyed_rows:
+                if pickler is None or item[0] < previous:
+                    if handle is not None:
+                        handle.close()
+                    self.paths.append(self._new_run())
+                    handle = self.paths[-1].open("wb")
+                    pickler = pickle.Pickler(handle, pickle.HIGHEST_PROTOCOL)
+                previous = item[0]
+                pickler.dump(item)
+        finally:
+            if handle is not None:
+                handle.close()
+
+    def _new_run(self) -> Path:
+        self._created += 1
+        return self.directory / f"run{self._created}.pickle"
+
+    def merged(self) -> Iterator[Tuple[datetime, List]]:
+        """Every run merged by key; equal keys keep the order the runs were written in."""
+        runs = self.paths
+        while len(runs) > MAX_OPEN_RUNS:
+            grouped = []
+            for start in range(0, len(runs), MAX_OPEN_RUNS):
+                group = runs[start : start + MAX_OPEN_RUNS]
+                target = self._new_run()
+                grouped.append(target)
+                with target.open("wb") as handle:
+                    pickler = pickle.Pickler(handle, pickle.HIGHEST_PROTOCOL)
+                    for item in heapq.merge(*map(_read_run, group), key=itemgetter(0)):
+                        pickler.dump(item)
+                for path in group:
+                    path.unlink()
+            runs = grouped
+        return heapq.merge(*map(_read_run, runs), key=itemgetter(0))
+
+
+def iter_merged_rows(paths: Iterable[Path]) -> Iterator[List]:
+    """The data rows of several stores, merged by ``Плавка_дата``.
+
+    Stores are in commit order, which is not date order once an old report
+    is back-filled, so each store is read once from its last committed
+    snapshot, archived rows first, and split into its ascending runs, spilled
+    to temporary files. The runs of all stores are then merged, so memory
+    stays flat however many rows there are. A row without a date goes with
+    the row before it; rows of equal date keep the order of ``paths`` and,
+    within a store, their own.
+    """
+    with tempfile.TemporaryDirectory(prefix="plavka-merge-") as tmp_dir:
+        runs = _Runs(Path(tmp_dir))
+        for path in paths:
+            stream = iter_store_rows(path)
+            try:
+                runs.write(_keyed(stream))
+            finally:
+                stream.close()
+        for _key, row in runs.merged():
+            yield row
+
+
+def export_merged(destination: Path, paths: Optional[Iterable[Path]] = None) -> int:
+    """Write the consolidated view of all stores to ``destination``; return the row count."""
+    if paths is None:
+        paths = store_paths().values()
+
+    from openpyxl import Workbook
+
+    export = Workbook(write_only=True)
+    worksheet = export.create_sheet("Records")
+    worksheet.append(list(PLAVKA_HEADERS))
+    rows_written = 0
+    for row in iter_merged_rows(paths):
+        worksheet.append(row)
+        rows_written += 1
+    export.save(destination)
+    logger.info("Exported %d plavki merged from all stores to %s", rows_written, destination)
+    return rows_written
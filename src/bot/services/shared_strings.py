@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import re
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SHEET_PREFIX = "xl/worksheets/sheet"
+SHARED_STRINGS_PART = "xl/sharedStrings.xml"
+CHUNK_SIZE = 1 << 20
+
+_INLINE_STRING_RE = re.compile(
+    rb'<c r="([A-Z]+[0-9]+)"((?: s="[0-9]+")?) t="inlineStr"><is><t( xml:space="preserve")?>([^<]*)</t></is></c>'
+)
+_CONTENT_TYPE = (
+    b'<Override PartName="/xl/sharedStrings.xml" '
+    b'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml" />'
+)
+_RELATIONSHIP = (
+    b'<Relationship Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+    b'Target="sharedStrings.xml" Id="rIdSharedStrings" />'
+)
+
+
+def declare_shared_strings(name: str, data: bytes) -> bytes:
+    """Part ``name`` of a workbook without shared strings, amended to declare ``sharedStrings.xml``.
+
+    Only the content types and the workbook relationships change; every other
+    part is returned as it is.
+    """
+    if name == "[Content_Types].xml":
+        return data.replace(b"</Types>", _CONTENT_TYPE + b"</Types>")
+    if name == "xl/_rels/workbook.xml.rels":
+        return data.replace(b"</Relationships>", _RELATIONSHIP + b"</Relationships>")
+    return data
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.index: Dict[bytes, int] = {}
+        self.entries: List[bytes] = []
+        self.cells = 0
+
+    def encode(self, match: re.Match) -> bytes:
+        coordinate, style, preserve, text = match.groups()
+        key = (preserve or b"") + b">" + text
+        position = self.index.get(key)
+        if position is None:
+            position = self.index[key] = len(self.entries)
+            self.entries.append(key)
+        self.cells += 1
+        return b'<c r="%s"%s t="s"><v>%d</v></c>' % (coordinate, style, position)
+
+    def to_xml(self) -> bytes:
+        parts = [
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+            b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="%d" uniqueCount="%d">'
+            % (self.cells, len(self.entries)),
+        ]
+        parts.extend(b"<si><t" + entry + b"</t></si>" for entry in self.entries)
+        parts.append(b"</sst>")
+        return b"".join(parts)
+
+
+def encode_shared_strings(source: Path, destination: Path) -> Tuple[int, int]:
+    """Copy an openpyxl-written workbook, moving its strings into ``sharedStrings.xml``.
+
+    openpyxl writes every text cell as an inline string, so a crew member's
+    name is stored once per row. Here each distinct text is stored once and
+    cells refer to it by index, the dictionary encoding Excel itself uses.
+    Sheets are rewritten in chunks of whole rows, never held in memory at
+    once. Rich text cells stay inline. Returns ``(string_cells, distinct_strings)``.
+    """
+    table = _StringTable()
+    with zipfile.ZipFile(source) as archive, zipfile.ZipFile(destination, "w", zipfile.ZIP_DEFLATED) as output:
+        if SHARED_STRINGS_PART in archive.namelist():
+            raise ValueError(f"{source.name} already has a shared strings table")
+        for info in archive.infolist():
+            if info.filename.startswith(SHEET_PREFIX):
+                with archive.open(info) as reader, output.open(info.filename, "w") as writer:
+                    pending = b""
+                    while chunk := reader.read(CHUNK_SIZE):
+                        pending += chunk
+                        cut = pending.rfind(b"</row>") + len(b"</row>")
+                        if cut >= len(b"</row>"):
+                            writer.write(_INLINE_STRING_RE.sub(table.encode, pending[:cut]))
+                            pending = pending[cut:]
+                    writer.write(_INLINE_STRING_RE.sub(table.encode, pending))
+                continue
+
+            output.writestr(info.filename, declare_shared_strings(info.filename, archive.read(info)))
+        output.writestr(SHARED_STRINGS_PART, table.to_xml())
+    return table.cells, len(table.entries)
@@ -0,0 +1,547 @@
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import math
+import mmap
+import operator
+import os
+import threading
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import filterfalse
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.bot.services.excel import (
+    PLAVKA_HEADERS,
+    ExcelValidationError,
+    StoreChanges,
+    add_commit_listener,
+    add_reconcile_listener,
+    follow_committed_rows,
+    read_row_blocks,
+    remove_commit_listener,
+    remove_reconcile_listener,
+)
+from src.bot.services.manifest import CHECKSUM_BLOCK_ROWS, block_checksum, current_manifest, extend_block_checksums
+from src.bot.services.shards import store_paths
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SECTORS = ("A", "B", "C", "D")
+NO_DAY = -(2**31)  # rows before the first dated one
+INSORT_ROWS = 1000  # larger out-of-order batches re-sort the day index instead
+
+_DATE_COLUMN = PLAVKA_HEADERS.index("Плавка_дата")
+_SECTOR_COLUMNS = {sector: PLAVKA_HEADERS.index(f"Плавка_температура_заливки_{sector}") for sector in SECTORS}
+_EPOCH = date(1970, 1, 1).toordinal()
+_DAYS = "days.i32"
+_META = "series.json"
+
+
+def epoch_day(value: object) -> Optional[int]:
+    """Days since 1970-01-01 of a date cell or an ISO date string, ``None`` if there is none."""
+    if isinstance(value, datetime):
+        value = value.date()
+    elif isinstance(value, str):
+        try:
+            value = date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    if isinstance(value, date):
+        return value.toordinal() - _EPOCH
+    return None
+
+
+def day_date(day: int) -> date:
+    return date.fromordinal(day + _EPOCH)
+
+
+def _temperature(value: object) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return math.nan
+
+
+def _means(
+    monthly_totals: Iterable[Tuple[date, Dict[str, Tuple[int, float]]]]
+) -> List[Tuple[date, Dict[str, Optional[float]]]]:
+    return [
+        (month, {sector: total / count if count else None for sector, (count, total) in totals.items()})
+        for month, totals in monthly_totals
+    ]
+
+
+def _present(values: Sequence[float]) -> Sequence[float]:
+    """``values`` without the NaNs of missing temperatures; no copy if there are none."""
+    if not math.isnan(sum(values)):
+        return values
+    return list(filterfalse(math.isnan, values))
+
+
+@dataclass(frozen=True)
+class SectorSummary:
+    count: int
+    mean: Optional[float]
+    minimum: Optional[float]
+    maximum: Optional[float]
+
+
+class _Column:
+    """A file of fixed-width ``typecode`` values, written with ``pwrite`` and read through a mapping."""
+
+    def __init__(self, path: Path, typecode: str) -> None:
+        self.path = path
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._map: Optional[mmap.mmap] = None
+        self._mapped = 0
+
+    def __len__(self) -> int:
+        return os.fstat(self._fd).st_size // self.itemsize
+
+    def write(self, index: int, values: array) -> None:
+        os.pwrite(self._fd, values.tobytes(), index * self.itemsize)
+
+    def view(self, rows: int) -> memoryview:
+        """The first ``rows`` values, backed by the page cache rather than a copy."""
+        if rows == 0:
+            return memoryview(array(self.typecode))
+        if self._mapped < rows:
+            # A mapping stays valid while views of it are alive, so readers
+            # holding the previous one are not disturbed.
+            self._mapped = len(self)
+            self._map = mmap.mmap(self._fd, self._mapped * self.itemsize, access=mmap.ACCESS_READ)
+        return memoryview(self._map).cast(self.typecode)[:rows]
+
+    def close(self) -> None:
+        self._map = None
+        os.close(self._fd)
+
+
+@dataclass
+class _Selection:
+    """The rows of a day range: ``low..high`` in day order, through ``positions`` unless the rows are in day order."""
+
+    days: memoryview
+    columns: Dict[str, memoryview]
+    positions: Optional[array]
+    low: int
+    high: int
+
+    def day_of(self, index: int) -> int:
+        return self.days[index if self.positions is None else self.positions[index]]
+
+    def values(self, sector: str, low: int, high: int) -> Sequence[float]:
+        column = self.columns[sector]
+        if self.positions is None:
+            return column[low:high]
+        return list(map(column.__getitem__, self.positions[low:high]))
+
+
+class TemperatureSeries:
+    """Pour temperatures of the plavka store as memory-mapped columns.
+
+    Row ``n`` of the store is entry ``n - 1`` of every column under
+    ``directory``: ``days.i32`` holds the pour date as days since 1970-01-01
+    and ``A.f64``..``D.f64`` the temperature of each sector, NaN where there
+    is none. Committed rows are written with ``pwrite`` and read through
+    read-only mappings, so a scan over years of history slices the page
+    cache instead of parsing workbook XML. Like compaction, a row without a
+    date belongs to the day of the row before it.
+
+    A day range is found by bisecting the days column while rows arrive in
+    date order. Once a late report breaks the order, an in-memory
+    permutation of the rows sorted by day takes over, kept sorted as rows
+    come in. ``series.json`` records how many rows are valid and the block
+    checksums they were built from; the store is followed and re-read after
+    edits the same way as by the search index.
+    """
+
+    def __init__(self, directory: Path, xlsx_path: Optional[Path] = None) -> None:
+        self.directory = directory
+        self.xlsx_path = xlsx_path
+        self.rows = 0
+        self.ready = False
+        self._lock = threading.Lock()
+        self._columns: Dict[str, _Column] = {}
+        self._checksums: List[str] = []
+        # ``None`` while the rows are in day order, otherwise row indexes sorted by day.
+        self._order: Optional[array] = None
+        self._order_stale = False
+        self._unsubscribe: List[Callable[[], None]] = []
+
+    # --- Storage -------------------------------------------------------------
+
+    def _store_path(self) -> Path:
+        return self.xlsx_path if self.xlsx_path is not None else get_settings().xlsx_path
+
+    def _open(self) -> None:
+        if not self._columns:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._columns["days"] = _Column(self.directory / _DAYS, "i")
+            for sector in SECTORS:
+                self._columns[sector] = _Column(self.directory / f"{sector}.f64", "d")
+
+    def _close(self) -> None:
+        for column in self._columns.values():
+            column.close()
+        self._columns = {}
+
+    def _save_meta(self) -> None:
+        meta_path = self.directory / _META
+        tmp_path = meta_path.with_name(f"{meta_path.name}.tmp")
+        tmp_path.write_text(json.dumps({"rows": self.rows, "checksums": self._checksums}), encoding="utf-8")
+        os.replace(tmp_path, meta_path)
+
+    def _write(self, first_row: int, rows: Sequence[Sequence[object]]) -> array:
+        """Write ``rows`` as store rows ``first_row`` onwards; return their days."""
+        index = first_row - 1
+        days = array("i")
+        previous = self._columns["days"].view(index)[index - 1] if index else NO_DAY
+        for row in rows:
+            day = epoch_day(row[_DATE_COLUMN]) if len(row) > _DATE_COLUMN else None
+            previous = day if day is not None else previous
+            days.append(previous)
+        self._columns["days"].write(index, days)
+        for sector, column in _SECTOR_COLUMNS.items():
+            values = array("d", (_temperature(row[column]) if len(row) > column else math.nan for row in rows))
+            self._columns[sector].write(index, values)
+        return days
+
+    def _check_order(self) -> None:
+        days = self._columns["days"].view(self.rows)
+        in_order = all(map(operator.le, days, days[1:]))
+        self._order = None if in_order else array("i")
+        self._order_stale = not in_order
+
+    def load(self) -> None:
+        """Map the columns, trusting only the rows recorded in ``series.json``."""
+        with self._lock:
+            self._open()
+            try:
+                meta = json.loads((self.directory / _META).read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                meta = {"rows": 0, "checksums": []}
+            # Rows written after the last ``series.json`` are overwritten by the next commit.
+            self.rows = min([int(meta["rows"])] + [len(column) for column in self._columns.values()])
+            self._checksums = list(meta["checksums"])[: -(-self.rows // CHECKSUM_BLOCK_ROWS)]
+            self._check_order()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._open()
+            self.rows = 0
+            self._checksums = []
+            self._order = None
+            self._order_stale = False
+            self._save_meta()
+
+    def add_rows(self, rows: List[List]) -> None:
+        """Append a batch of committed store rows, in store order."""
+        if not rows:
+            return
+        with self._lock:
+            first = self.rows
+            days = self._write(first + 1, rows)
+            extend_block_checksums(self._checksums, first + 1, rows)
+            self.rows += len(rows)
+            self._save_meta()
+
+            if self._order is None:
+                last = self._columns["days"].view(first)[-1] if first else NO_DAY
+                if last <= days[0] and all(map(operator.le, days, days[1:])):
+                    return
+                self._order = array("i", range(first))
+            if len(rows) > INSORT_ROWS:
+                self._order_stale = True
+            elif not self._order_stale:
+                view = self._columns["days"].view(self.rows)
+                for position in range(first, self.rows):
+                    bisect.insort(self._order, position, key=view.__getitem__)
+
+    def apply_blocks(self, blocks: Dict[int, List[List]], row_count: Optional[int] = None) -> None:
+        """Rewrite whole checksum blocks of rows edited in place; drop rows past ``row_count``."""
+        with self._lock:
+            limit = self.rows if row_count is None else row_count
+            for block, rows in sorted(blocks.items()):
+                first_row = block * CHECKSUM_BLOCK_ROWS + 1
+                if first_row > self.rows + 1:
+                    break
+                rows = rows[: max(0, limit - first_row + 1)]
+                self._write(first_row, rows)
+                self.rows = max(self.rows, first_row - 1 + len(rows))
+                self._checksums.extend([f"{0:016x}"] * (block + 1 - len(self._checksums)))
+                self._checksums[block] = block_checksum(block, rows)
+            if row_count is not None:
+                # The files keep their length: a reader may still map the old tail.
+                self.rows = min(self.rows, row_count)
+            del self._checksums[-(-self.rows // CHECKSUM_BLOCK_ROWS) :]
+            self._save_meta()
+            self._check_order()
+
+    # --- Queries ---------------------------------------------------------------
+
+    def _select(self, first_day: Optional[int], last_day: Optional[int]) -> _Selection:
+        with self._lock:
+            self._open()
+            days = self._columns["days"].view(self.rows)
+            columns = {sector: self._columns[sector].view(self.rows) for sector in SECTORS}
+            if self._order_stale:
+                self._order = array("i", sorted(range(self.rows), key=days.__getitem__))
+                self._order_stale = False
+            if self._order is None:
+                low = 0 if first_day is None else bisect.bisect_left(days, first_day)
+                high = self.rows if last_day is None else bisect.bisect_right(days, last_day)
+                return _Selection(days, columns, None, low, high)
+            order = self._order
+            low = 0 if first_day is None else bisect.bisect_left(order, first_day, key=days.__getitem__)
+            high = self.rows if last_day is None else bisect.bisect_right(order, last_day, key=days.__getitem__)
+            # A copy: the permutation grows under later commits.
+            return _Selection(days, columns, order[low:high], 0, high - low)
+
+    def values(self, sector: str, first_day: Optional[int] = None, last_day: Optional[int] = None) -> Sequence[float]:
+        """Temperatures of ``sector`` poured from ``first_day`` to ``last_day``, in day order, NaN where missing.
+
+        Rows in day order come back as a slice of the mapping, without a copy.
+        """
+        selection = self._select(first_day, last_day)
+        return selection.values(sector, selection.low, selection.high)
+
+    def summary(self, first_day: Optional[int] = None, last_day: Optional[int] = None) -> Dict[str, SectorSummary]:
+        selection = self._select(first_day, last_day)
+        result = {}
+        for sector in SECTORS:
+            present = _present(selection.values(sector, selection.low, selection.high))
+            if not len(present):
+                result[sector] = SectorSummary(0, None, None, None)
+                continue
+            result[sector] = SectorSummary(len(present), sum(present) / len(present), min(present), max(present))
+        return result
+
+    def monthly_totals(
+        self, first_day: Optional[int] = None, last_day: Optional[int] = None
+    ) -> List[Tuple[date, Dict[str, Tuple[int, float]]]]:
+        """Count and sum of the temperatures of each sector per calendar month that has pours."""
+        selection = self._select(first_day, last_day)
+        day_of, high = selection.day_of, selection.high
+        result = []
+        start = bisect.bisect_right(range(high), NO_DAY, lo=selection.low, key=day_of)
+        while start < high:
+            month = day_date(day_of(start)).replace(day=1)
+            following = (month + timedelta(days=31)).replace(day=1).toordinal() - _EPOCH
+            end = bisect.bisect_left(range(high), following, lo=start, key=day_of)
+            totals: Dict[str, Tuple[int, float]] = {}
+            for sector in SECTORS:
+                present = _present(selection.values(sector, start, end))
+                totals[sector] = (len(present), sum(present))
+            result.append((month, totals))
+            start = end
+        return result
+
+    def trend(
+        self, first_day: Optional[int] = None, last_day: Optional[int] = None
+    ) -> List[Tuple[date, Dict[str, Optional[float]]]]:
+        """Mean temperature of each sector per calendar month that has pours."""
+        return _means(self.monthly_totals(first_day, last_day))
+
+    def histogram(
+        self,
+        first_day: Optional[int] = None,
+        last_day: Optional[int] = None,
+        *,
+        width: float = 10.0,
+        sectors: Iterable[str] = SECTORS,
+    ) -> Dict[float, int]:
+        """Pour counts per ``width``-degree bin of ``sectors`` together, keyed by the bin's lower edge."""
+        selection = self._select(first_day, last_day)
+        # Pours repeat a few hundred distinct readings, so those are counted
+        # first and only they are put into bins.
+        readings: Counter[float] = Counter()
+        for sector in sectors:
+            readings.update(_present(selection.values(sector, selection.low, selection.high)))
+        counts: Counter[float] = Counter()
+        for reading, count in readings.items():
+            counts[reading // width * width] += count
+        return dict(sorted(counts.items()))
+
+    # --- Following the store -------------------------------------------------
+
+    def _on_reconcile(self, changes: StoreChanges) -> None:
+        if changes.path == self._store_path():
+            self.apply_blocks(changes.blocks, changes.row_count)
+
+    def _verify_blocks(self) -> None:
+        """Re-read the blocks that were edited while the series was not running."""
+        xlsx_path = self._store_path()
+        manifest = current_manifest(xlsx_path)
+        if manifest is None:
+            return
+        with self._lock:
+            rows = min(self.rows, manifest.row_count)
+            full_blocks = -(-rows // CHECKSUM_BLOCK_ROWS) if rows == manifest.row_count else rows // CHECKSUM_BLOCK_ROWS
+            stale = [
+                block
+                for block in range(full_blocks)
+                if block >= len(self._checksums) or self._checksums[block] != manifest.block_checksums[block]
+            ]
+        if stale:
+            self.apply_blocks(read_row_blocks(xlsx_path, stale))
+            logger.info("Temperature series re-read %d edited blocks of %s", len(stale), xlsx_path.name)
+
+    def _follow_store(self) -> None:
+        add_reconcile_listener(self._on_reconcile)
+        self._unsubscribe.append(lambda: remove_reconcile_listener(self._on_reconcile))
+        self._unsubscribe.append(follow_committed_rows(self.rows, self.add_rows, xlsx_path=self.xlsx_path))
+
+    def start_new(self, rows: List[List]) -> None:
+        """Start from scratch with ``rows``, the first commit of a new store, and follow it.
+
+        Runs in the writing thread, from a commit listener, so the store is
+        not read again.
+        """
+        xlsx_path = self._store_path()
+
+        def on_commit(committed: List[List], path: Path) -> None:
+            if path == xlsx_path:
+                self.add_rows(committed)
+
+        self.reset()
+        self.add_rows(rows)
+        add_reconcile_listener(self._on_reconcile)
+        self._unsubscribe.append(lambda: remove_reconcile_listener(self._on_reconcile))
+        add_commit_listener(on_commit)
+        self._unsubscribe.append(lambda: remove_commit_listener(on_commit))
+        self.ready = True
+
+    def start(self) -> None:
+        """Map the columns, catch up with the store and follow new commits."""
+        try:
+            self.load()
+            self._follow_store()
+            self._verify_blocks()
+        except (ExcelValidationError, ValueError, KeyError, TypeError) as exc:
+            # The store was replaced by a shorter one, or series.json is damaged.
+            logger.warning("Rebuilding the temperature series from scratch: %s", exc)
+            self.stop()
+            self.reset()
+            self._follow_store()
+        self.ready = True
+        logger.info("Temperature series is ready: %d rows", self.rows)
+
+    def stop(self) -> None:
+        while self._unsubscribe:
+            self._unsubscribe.pop()()
+        with self._lock:
+            self._close()
+        self.ready = False
+
+
+class TemperatureHistory:
+    """Pour temperatures of every plavka store, merged at query time.
+
+    Each store, plavka.xlsx and every ``plavka.<shard>.xlsx``, has its own
+    ``TemperatureSeries`` in ``<store>.temperatures/``. Summaries, monthly
+    totals and histograms are computed per store and combined, so a query
+    still only scans mapped columns. A shard created while the bot runs is
+    picked up on its first commit.
+    """
+
+    def __init__(self) -> None:
+        self.series: Dict[Path, TemperatureSeries] = {}
+        self.ready = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def directory(xlsx_path: Path) -> Path:
+        return xlsx_path.with_name(f"{xlsx_path.name}.temperatures")
+
+    @property
+    def rows(self) -> int:
+        return sum(series.rows for series in list(self.series.values()))
+
+    def _on_plavka_commit(self, rows: List[List], path: Path) -> None:
+        with self._lock:
+            if path in self.series:
+                return
+            series = self.series[path] = TemperatureSeries(self.directory(path), path)
+        series.start_new(rows)
+        logger.info("Temperature series started for the new store %s", path.name)
+
+    def start(self) -> None:
+        with self._lock:
+            # Listed under the lock the listener takes, so a store is either
+            # listed here or new on its first commit, never both.
+            add_commit_listener(self._on_plavka_commit)
+            listed = [TemperatureSeries(self.directory(path), path) for path in store_paths().values()]
+            for series in listed:
+                self.series[series.xlsx_path] = series
+        for series in listed:
+            series.start()
+        self.ready = True
+        logger.info("Temperature history is ready: %d stores, %d rows", len(self.series), self.rows)
+
+    def stop(self) -> None:
+        remove_commit_listener(self._on_plavka_commit)
+        with self._lock:
+            stores, self.series = list(self.series.values()), {}
+        for series in stores:
+            series.stop()
+        self.ready = False
+
+    def _ready_series(self) -> List[TemperatureSeries]:
+        return [series for series in list(self.series.values()) if series.ready]
+
+    def summary(self, first_day: Optional[int] = None, last_day: Optional[int] = None) -> Dict[str, SectorSummary]:
+        parts = [series.summary(first_day, last_day) for series in self._ready_series()]
+        result = {}
+        for sector in SECTORS:
+            present = [part[sector] for part in parts if part[sector].count]
+            count = sum(stats.count for stats in present)
+            if not count:
+                result[sector] = SectorSummary(0, None, None, None)
+                continue
+            result[sector] = SectorSummary(
+                count,
+                sum(stats.mean * stats.count for stats in present) / count,
+                min(stats.minimum for stats in present),
+                max(stats.maximum for stats in present),
+            )
+        return result
+
+    def trend(
+        self, first_day: Optional[int] = None, last_day: Optional[int] = None
+    ) -> List[Tuple[date, Dict[str, Optional[float]]]]:
+        months: Dict[date, Dict[str, Tuple[int, float]]] = {}
+        for series in self._ready_series():
+            for month, totals in series.monthly_totals(first_day, last_day):
+                merged = months.setdefault(month, {sector: (0, 0.0) for sector in SECTORS})
+                for sector, (count, total) in totals.items():
+                    merged[sector] = (merged[sector][0] + count, merged[sector][1] + total)
+        return _means(sorted(months.items()))
+
+    def histogram(
+        self,
+        first_day: Optional[int] = None,
+        last_day: Optional[int] = None,
+        *,
+        width: float = 10.0,
+        sectors: Iterable[str] = SECTORS,
+    ) -> Dict[float, int]:
+        sectors = tuple(sectors)
+        counts: Counter[float] = Counter()
+        for series in self._ready_series():
+            counts.update(series.histogram(first_day, last_day, width=width, sectors=sectors))
+        return dict(sorted(counts.items()))
+
+
+@lru_cache(maxsize=1)
+def get_temperature_series() -> TemperatureHistory:
+    return TemperatureHistory()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadWatermarks:
+    """Per-user count of data rows the user has already downloaded.
+
+    Stored as a small JSON file next to the workbook so it survives restarts.
+    Marks for a plavka shard are kept under ``<user_id>@<shard>``.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._marks: Dict[str, int] = self._load()
+
+    def _load(self) -> Dict[str, int]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable download watermarks %s: %s", self.path, exc)
+            return {}
+        return {str(user_id): int(row) for user_id, row in data.items()}
+
+    @staticmethod
+    def _key(user_id: int, shard: Optional[str]) -> str:
+        return str(user_id) if shard is None else f"{user_id}@{shard}"
+
+    def get(self, user_id: int, shard: Optional[str] = None) -> int:
+        return self._marks.get(self._key(user_id, shard), 0)
+
+    def set(self, user_id: int, row_count: int, shard: Optional[str] = None) -> None:
+        with self._lock:
+            self._marks[self._key(user_id, shard)] = row_count
+            tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+            tmp_path.write_text(json.dumps(self._marks), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+
+@lru_cache(maxsize=1)
+def get_watermarks() -> DownloadWatermarks:
+    xlsx_path = get_settings().xlsx_path
+    return DownloadWatermarks(xlsx_path.with_name(f"{xlsx_path.name}.watermarks.json"))
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.bot.services.excel import append_plavka_rows
+from src.bot.services.parser import ShiftReport, parse_shift_report, resolve_reference_columns
+from src.bot.services.shards import store_path
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MAX_COMMIT_BATCH_ROWS = 5000
+
+
+class ParseWorkerPool:
+    """Parses shift reports in a pool of worker processes.
+
+    With ``workers == 0`` parsing runs inline in the calling process, which keeps
+    the single-process deployment unchanged. The same processes also load and
+    save plavka stores for the committers, see ``get_committer``.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self.workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            logger.info("Started parse worker pool with %d processes", self.workers)
+
+    @property
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def parse(self, text: str) -> ShiftReport:
+        if self._executor is None:
+            return parse_shift_report(text)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, parse_shift_report, text)
+
+    def parse_many(self, texts: Iterable[str], chunksize: int = 8) -> List[ShiftReport]:
+        if self._executor is None:
+            return [parse_shift_report(text) for text in texts]
+        return list(self._executor.map(parse_shift_report, texts, chunksize=chunksize))
+
+
+class RecordCommitter:
+    """Funnels all plavka writes through one task.
+
+    Rows queued while a save is in progress are appended together in the next
+    save, so a burst of imports costs one workbook load/save instead of one each.
+    """
+
+    def __init__(
+        self,
+        append: Callable[[List[List]], int] = append_plavka_rows,
+        max_batch_rows: int = MAX_COMMIT_BATCH_ROWS,
+    ) -> None:
+        self._append = append
+        self._max_batch_rows = max_batch_rows
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        return self._queue
+
+    async def commit(self, rows: List[List]) -> int:
+        if not rows:
+            return 0
+        queue = self._ensure_started()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((rows, future))
+        return await future
+
+    @property
+    def pending(self) -> int:
+        """Commit requests waiting for the save in progress."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def stop(self) -> None:
+        if self._task is None or self._task.done():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+
+    async def _run(self) -> None:
+        queue = self._queue
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is None:
+                break
+
+            batch: List[Tuple[List[List], asyncio.Future]] = [item]
+            batch_rows = len(item[0])
+            while batch_rows < self._max_batch_rows and not queue.empty():
+                item = queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                batch_rows += len(item[0])
+
+            all_rows = [row for rows, _future in batch for row in rows]
+            try:
+                await asyncio.to_thread(self._append, all_rows)
+            except Exception as exc:
+                for _rows, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            logger.info("Committed %d rows from %d requests", len(all_rows), len(batch))
+            for rows, future in batch:
+                if not future.done():
+                    future.set_result(len(rows))
+
+
+@lru_cache(maxsize=1)
+def get_parse_pool() -> ParseWorkerPool:
+    return ParseWorkerPool(get_settings().workers)
+
+
+_committers: Dict[Optional[str], RecordCommitter] = {}
+
+
+def _append_to_store(rows: List[List], *, xlsx_path: Path) -> int:
+    # Parse workers resolve against the dictionary they inherited at fork;
+    # the committer resolves again against the one kept up to date here.
+    resolve_reference_columns(rows)
+    return append_plavka_rows(rows, xlsx_path=xlsx_path, executor=get_parse_pool().executor)
+
+
+def get_committer(shard: Optional[str] = None) -> RecordCommitter:
+    """Committer of one plavka store; each shard has its own lock and its own task.
+
+    With ``WORKERS > 0`` the saves run in the worker processes, so commits to
+    different shards proceed in parallel.
+    """
+    committer = _committers.get(shard)
+    if committer is None:
+        committer = _committers[shard] = RecordCommitter(partial(_append_to_store, xlsx_path=store_path(shard)))
+    return committer
+
+
+def pending_commits() -> Dict[Optional[str], int]:
+    """Queue depth of every committer started so far, keyed by shard."""
+    return {shard: committer.pending for shard, committer in _committers.items()}
+
+
+async def stop_committers() -> None:
+    await asyncio.gather(*(committer.stop() for committer in _committers.values()))
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from src.core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+DRAIN_TIMEOUT = 30  # seconds
+PENDING_UPDATES_FACTOR = 8
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Webhook handler that answers Telegram immediately and processes updates in the background.
+
+    At most ``max_concurrency`` updates are fed to the dispatcher at once. A request body may
+    carry a single update or a JSON array of updates. When the backlog is full or the server
+    is draining, the request is refused with 503 so that Telegram redelivers it later.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        max_concurrency: int,
+        secret_token: str | None = None,
+        **data: Any,
+    ) -> None:
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_concurrency * PENDING_UPDATES_FACTOR
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._draining = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._background_feed_update_tasks)
+
+    async def _background_feed_update(self, bot: Bot, update: dict[str, Any]) -> None:
+        async with self._semaphore:
+            try:
+                await super()._background_feed_update(bot=bot, update=update)
+            except Exception as exc:  # pragma: no cover - the dispatcher already logs handler errors
+                logger.exception("Failed to process webhook update: %s", exc)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if self._draining:
+            return web.Response(status=503, text="Shutting down")
+
+        payload = await request.json(loads=bot.session.json_loads)
+        updates = payload if isinstance(payload, list) else [payload]
+        if self.pending + len(updates) > self.max_pending:
+            logger.warning("Webhook backlog is full (%d pending), asking Telegram to retry", self.pending)
+            return web.Response(status=503, text="Backlog is full")
+
+        for update in updates:
+            task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+            self._background_feed_update_tasks.add(task)
+            task.add_done_callback(self._background_feed_update_tasks.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT) -> None:
+        self._draining = True
+        tasks = set(self._background_feed_update_tasks)
+        if not tasks:
+            return
+        logger.info("Draining %d webhook updates", len(tasks))
+        _done, still_running = await asyncio.wait(tasks, timeout=timeout)
+        if still_running:
+            logger.warning("Cancelling %d webhook updates after drain timeout", len(still_running))
+            for task in still_running:
+                task.cancel()
+
+    async def close(self) -> None:
+        await self.drain()
+        await super().close()
+
+
+def build_webhook_app(dispatcher: Dispatcher, bot: Bot, settings: Settings) -> web.Application:
+    app = web.Application()
+    handler = BoundedRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        max_concurrency=settings.webhook_max_concurrency,
+        secret_token=settings.webhook_secret,
+    )
+    handler.register(app, path=settings.webhook_path)
+    setup_application(app, dispatcher, bot=bot)
+    return app
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot, settings: Settings) -> None:
+    app = build_webhook_app(dispatcher, bot, settings)
+    webhook_url = f"{settings.webhook_url.rstrip('/')}{settings.webhook_path}"
+
+    async def register_webhook(_app: web.Application) -> None:
+        await bot.set_webhook(
+            webhook_url,
+            secret_token=settings.webhook_secret,
+            max_connections=settings.webhook_max_concurrency,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+        )
+        logger.info("Webhook registered at %s", webhook_url)
+
+    app.on_startup.append(register_webhook)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.webhook_host, port=settings.webhook_port)
+    await site.start()
+    logger.info("Listening for webhook updates on %s:%s", settings.webhook_host, settings.webhook_port)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
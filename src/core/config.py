@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import os
+import re
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
+from typing import Dict, FrozenSet, Mapping, Optional
 
 from dotenv import load_dotenv
 
@@ -14,7 +16,64 @@ load_dotenv()
 class Settings:
     bot_token: str
     xlsx_path: Path
+    journal_path: Path
     locale: str
+    workers: int
+    webhook_url: Optional[str]
+    webhook_path: str
+    webhook_host: str
+    webhook_port: int
+    webhook_secret: Optional[str]
+    webhook_max_concurrency: int
+    telegram_api_url: Optional[str]
+    shard_by: str
+    plant_chats: Mapping[int, str]
+    hot_months: int
+    admin_ids: FrozenSet[int]
+    import_concurrency: int
+    import_per_user: int
+    import_queue: int
+
+
+def _get_int(name: str, default: int, minimum: int = 0) -> int:
+    value = os.getenv(name, str(default))
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}.")
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {number}.")
+    return number
+
+
+SHARD_MODES = ("none", "chat", "plant")
+SHARD_NAME_RE = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def _parse_plants(value: str) -> Dict[int, str]:
+    """Parse ``plant=chat_id,chat_id;plant=chat_id`` into a chat -> plant mapping."""
+    plant_chats: Dict[int, str] = {}
+    for part in filter(None, (chunk.strip() for chunk in value.split(";"))):
+        plant, _, chat_ids = part.partition("=")
+        plant = plant.strip()
+        if not SHARD_NAME_RE.fullmatch(plant):
+            raise ValueError(f"PLANTS: plant names may only contain letters, digits, '_' and '-', got {plant!r}.")
+        for chat_id in filter(None, (chunk.strip() for chunk in chat_ids.split(","))):
+            try:
+                plant_chats[int(chat_id)] = plant
+            except ValueError:
+                raise ValueError(f"PLANTS: chat ids must be integers, got {chat_id!r} for {plant}.")
+    return plant_chats
+
+
+def _parse_ids(name: str) -> FrozenSet[int]:
+    ids = set()
+    for value in filter(None, (chunk.strip() for chunk in os.getenv(name, "").split(","))):
+        try:
+            ids.add(int(value))
+        except ValueError:
+            raise ValueError(f"{name} must be a comma-separated list of user ids, got {value!r}.")
+    return frozenset(ids)
 
 
 def _resolve_path(path_value: str) -> Path:
@@ -34,6 +93,38 @@ def get_settings() -> Settings:
     xlsx_path = _resolve_path(xlsx_path_value)
     xlsx_path.parent.mkdir(parents=True, exist_ok=True)
 
+    journal_path_value = os.getenv("JOURNAL_PATH")
+    journal_path = _resolve_path(journal_path_value) if journal_path_value else xlsx_path.with_name("journal.xlsx")
+    journal_path.parent.mkdir(parents=True, exist_ok=True)
+
     locale_value = os.getenv("LOCALE", "ru")
 
-    return Settings(bot_token=bot_token, xlsx_path=xlsx_path, locale=locale_value)
+    shard_by = os.getenv("SHARD_BY", "none").strip().lower()
+    if shard_by not in SHARD_MODES:
+        raise ValueError(f"SHARD_BY must be one of {', '.join(SHARD_MODES)}, got {shard_by!r}.")
+
+    webhook_path = os.getenv("WEBHOOK_PATH", "/webhook")
+    if not webhook_path.startswith("/"):
+        webhook_path = f"/{webhook_path}"
+
+    return Settings(
+        bot_token=bot_token,
+        xlsx_path=xlsx_path,
+        journal_path=journal_path,
+        locale=locale_value,
+        workers=_get_int("WORKERS", 0),
+        webhook_url=os.getenv("WEBHOOK_URL") or None,
+        webhook_path=webhook_path,
+        webhook_host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+        webhook_port=_get_int("WEBHOOK_PORT", 8080, minimum=1),
+        webhook_secret=os.getenv("WEBHOOK_SECRET") or None,
+        webhook_max_concurrency=_get_int("WEBHOOK_MAX_CONCURRENCY", 16, minimum=1),
+        telegram_api_url=os.getenv("TELEGRAM_API_URL") or None,
+        shard_by=shard_by,
+        plant_chats=_parse_plants(os.getenv("PLANTS", "")),
+        hot_months=_get_int("HOT_MONTHS", 0),
+        admin_ids=_parse_ids("ADMIN_IDS"),
+        import_concurrency=_get_int("IMPORT_CONCURRENCY", 4, minimum=1),
+        import_per_user=_get_int("IMPORT_PER_USER", 1, minimum=1),
+        import_queue=_get_int("IMPORT_QUEUE", 16),
+    )
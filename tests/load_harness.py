@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""Load-test the bot offline against a local stand-in for the Telegram Bot API.
+
+The harness starts a fake Bot API server, runs the real ``main.py`` against it
+in a subprocess (``TELEGRAM_API_URL`` points the bot at the fake server) and
+starts user sessions at a configurable rate: /start, menu callbacks, shift
+reports built from ``tests/example_shift_report.txt`` and workbook downloads.
+For every step it measures the time from handing the update to ``getUpdates``
+until the bot's reply in that chat arrives, and prints latency percentiles
+and throughput.
+
+Usage:
+    python tests/load_harness.py --rate 5 --duration 60 --chats 100
+    python tests/load_harness.py --mix report=1,download=1 --json result.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+ROOT = Path(__file__).parent.parent
+REPORT_TEMPLATE = (Path(__file__).parent / "example_shift_report.txt").read_text(encoding="utf-8")
+
+TOKEN = "42:LOADTEST"
+BOT_USER = {"id": 42, "is_bot": True, "first_name": "Журнал смен", "username": "plavka_load_bot"}
+STARTUP_TIMEOUT = 30  # seconds
+SHUTDOWN_TIMEOUT = 15  # seconds
+
+# Each step is (update kind, payload, step name); the step ends with the bot's
+# first visible reply (sendMessage, editMessageText or sendDocument) in the chat.
+SCENARIOS: Dict[str, List[Tuple[str, str, str]]] = {
+    "start": [("message", "/start", "start")],
+    "last_records": [("callback", "menu:last_records", "last_records")],
+    "help": [("callback", "menu:help", "help")],
+    "report": [("callback", "menu:add_record", "add_record"), ("message", "<report>", "report")],
+    "download": [("callback", "menu:download", "download")],
+}
+DEFAULT_MIX = {"start": 2, "last_records": 3, "help": 1, "report": 3, "download": 1}
+
+
+def build_report(number: int) -> str:
+    """A variant of the example report with its own date and plavka numbers."""
+    day = 1 + number % 28
+    month = 1 + (number // 28) % 12
+    return (
+        REPORT_TEMPLATE.replace("06.11.2024", f"{day:02d}.{month:02d}.2024")
+        .replace("11-", f"{month}{day:02d}-")
+    )
+
+
+class FakeBotAPI:
+    """Minimal Bot API: serves queued updates to ``getUpdates`` and records replies."""
+
+    def __init__(self) -> None:
+        self.calls: Counter = Counter()
+        self.ready = asyncio.Event()
+        self._updates: Deque[dict] = deque()
+        self._new_updates = asyncio.Event()
+        self._update_id = 0
+        self._message_id = 0
+        self._file_id = 0
+        self._waiters: Dict[int, Deque[asyncio.Future]] = defaultdict(deque)
+        self.app = web.Application(client_max_size=64 * 1024 * 1024)
+        self.app.router.add_post("/bot{token}/{method}", self.handle)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        data = await request.post()
+        self.calls[method] += 1
+        handler = getattr(self, f"_{method}", None)
+        result = await handler(data) if handler is not None else True
+        return web.json_response({"ok": True, "result": result})
+
+    def push_update(self, chat_id: int, payload: dict) -> asyncio.Future:
+        """Queue an update and return a future resolved with the time of the bot's reply."""
+        self._update_id += 1
+        self._updates.append({"update_id": self._update_id, **payload})
+        reply = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id].append(reply)
+        self._new_updates.set()
+        return reply
+
+    def _complete(self, chat_id: int) -> None:
+        waiters = self._waiters.get(chat_id)
+        while waiters:
+            reply = waiters.popleft()
+            if not reply.done():
+                reply.set_result(time.perf_counter())
+                return
+
+    def _message(self, chat_id: int, **fields) -> dict:
+        self._message_id += 1
+        return {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            **fields,
+        }
+
+    async def _getme(self, data) -> dict:
+        return BOT_USER
+
+    async def _getupdates(self, data) -> List[dict]:
+        self.ready.set()
+        offset = int(data.get("offset") or 0)
+        timeout = float(data.get("timeout") or 0)
+        limit = int(data.get("limit") or 100)
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(self._updates)[:limit]
+
+    async def _sendmessage(self, data) -> dict:
+        chat_id = int(data["chat_id"])
+        self._complete(chat_id)
+        return self._message(chat_id, text=data.get("text", ""))
+
+    async def _editmessagetext(self, data) -> dict:
+        chat_id = int(data["chat_id"])
+        self._complete(chat_id)
+        return self._message(chat_id, text=data.get("text", ""))
+
+    async def _senddocument(self, data) -> dict:
+        chat_id = int(data["chat_id"])
+        document = data["document"]
+        if isinstance(document, str):
+            file_id = document
+        else:
+            document.file.read()
+            self._file_id += 1
+            file_id = f"file-{self._file_id}"
+        self._complete(chat_id)
+        return self._message(
+            chat_id,
+            document={"file_id": file_id, "file_unique_id": file_id, "file_name": "plavka.xlsx"},
+        )
+
+
+def message_update(chat_id: int, message_id: int, text: str) -> dict:
+    return {
+        "message": {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Мастер"},
+            "text": text,
+        }
+    }
+
+
+def callback_update(chat_id: int, query_id: int, data: str) -> dict:
+    return {
+        "callback_query": {
+            "id": str(query_id),
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Мастер"},
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": "Выберите действие:",
+            },
+        }
+    }
+
+
+class LoadGenerator:
+    """Starts sessions at ``rate`` per second on idle chats from a fixed pool."""
+
+    def __init__(self, api: FakeBotAPI, rate: float, chats: int, mix: Dict[str, int], step_timeout: float,
+                 seed: int = 1) -> None:
+        self.api = api
+        self.rate = rate
+        self.step_timeout = step_timeout
+        self.random = random.Random(seed)
+        self.scenarios = list(mix)
+        self.weights = [mix[name] for name in self.scenarios]
+        self.idle_chats = list(range(10001, 10001 + chats))
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.timeouts: Counter = Counter()
+        self.sessions_started = 0
+        self.sessions_skipped = 0
+        self._sequence = 0
+
+    async def _run_session(self, chat_id: int, scenario: str) -> None:
+        try:
+            for kind, payload, step in SCENARIOS[scenario]:
+                self._sequence += 1
+                if kind == "callback":
+                    update = callback_update(chat_id, self._sequence, payload)
+                else:
+                    text = build_report(self._sequence) if payload == "<report>" else payload
+                    update = message_update(chat_id, self._sequence, text)
+
+                sent_at = time.perf_counter()
+                try:
+                    replied_at = await asyncio.wait_for(self.api.push_update(chat_id, update), self.step_timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts[step] += 1
+                    return
+                self.latencies[step].append(replied_at - sent_at)
+        finally:
+            self.idle_chats.append(chat_id)
+
+    async def run(self, duration: float) -> float:
+        sessions = set()
+        start_time = time.perf_counter()
+        while time.perf_counter() - start_time < duration:
+            await asyncio.sleep(self.random.expovariate(self.rate))
+            if not self.idle_chats:
+                self.sessions_skipped += 1
+                continue
+            chat_id = self.idle_chats.pop(self.random.randrange(len(self.idle_chats)))
+            scenario = self.random.choices(self.scenarios, self.weights)[0]
+            self.sessions_started += 1
+            task = asyncio.create_task(self._run_session(chat_id, scenario))
+            sessions.add(task)
+            task.add_done_callback(sessions.discard)
+        if sessions:
+            await asyncio.gather(*sessions)
+        return time.perf_counter() - start_time
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(generator: LoadGenerator, elapsed: float, api: FakeBotAPI) -> dict:
+    steps = {}
+    for step, values in sorted(generator.latencies.items()):
+        steps[step] = {
+            "count": len(values),
+            "p50_ms": round(_percentile(values, 0.5) * 1000, 1),
+            "p95_ms": round(_percentile(values, 0.95) * 1000, 1),
+            "p99_ms": round(_percentile(values, 0.99) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+        }
+    completed = sum(len(values) for values in generator.latencies.values())
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "sessions_started": generator.sessions_started,
+        "sessions_skipped": generator.sessions_skipped,
+        "steps_completed": completed,
+        "throughput_steps_per_s": round(completed / elapsed, 2) if elapsed else 0.0,
+        "timeouts": dict(generator.timeouts),
+        "steps": steps,
+        "api_calls": dict(api.calls),
+    }
+
+
+def print_summary(summary: dict) -> None:
+    print(f"Elapsed: {summary['elapsed_s']} s, sessions: {summary['sessions_started']} "
+          f"(skipped, no idle chat: {summary['sessions_skipped']})")
+    print(f"Throughput: {summary['throughput_steps_per_s']} steps/s, timeouts: {summary['timeouts'] or 0}")
+    print(f"{'step':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, stats in summary["steps"].items():
+        print(f"{step:<14}{stats['count']:>7}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+
+
+async def _stop_bot(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is not None:
+        return
+    process.send_signal(signal.SIGINT)
+    try:
+        await asyncio.wait_for(process.wait(), SHUTDOWN_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+
+async def run_load(rate: float, duration: float, chats: int = 50, mix: Optional[Dict[str, int]] = None,
+                   step_timeout: float = 30, workdir: Optional[Path] = None, seed: int = 1) -> dict:
+    """Run the bot against the fake API under load and return the summary."""
+    api = FakeBotAPI()
+    runner = web.AppRunner(api.app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        workdir = workdir or Path(tmp_dir)
+        log_path = workdir / "bot.log"
+        env = {
+            **os.environ,
+            "BOT_TOKEN": TOKEN,
+            "TELEGRAM_API_URL": f"http://127.0.0.1:{port}",
+            "XLSX_PATH": str(workdir / "plavka.xlsx"),
+            "JOURNAL_PATH": str(workdir / "journal.xlsx"),
+            "WEBHOOK_URL": "",
+        }
+        with log_path.open("wb") as log:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, str(ROOT / "main.py"), cwd=workdir, env=env, stdout=log, stderr=log
+            )
+        try:
+            ready = asyncio.create_task(api.ready.wait())
+            exited = asyncio.create_task(process.wait())
+            await asyncio.wait({ready, exited}, timeout=STARTUP_TIMEOUT, return_when=asyncio.FIRST_COMPLETED)
+            exited.cancel()
+            if not api.ready.is_set():
+                ready.cancel()
+                raise RuntimeError(f"The bot did not start polling:\n{log_path.read_text(errors='replace')[-2000:]}")
+
+            generator = LoadGenerator(api, rate, chats, mix or DEFAULT_MIX, step_timeout, seed)
+            elapsed = await generator.run(duration)
+        finally:
+            await _stop_bot(process)
+            await runner.cleanup()
+
+    return summarize(generator, elapsed, api)
+
+
+def _parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=2.0, help="sessions started per second (Poisson)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to generate load")
+    parser.add_argument("--chats", type=int, default=50, help="number of simulated chats")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX,
+                        help="scenario weights, e.g. start=2,report=3,download=1")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for a reply")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", type=Path, help="keep plavka.xlsx and bot.log in this directory")
+    parser.add_argument("--json", type=Path, help="also write the summary to this file")
+    args = parser.parse_args()
+
+    summary = asyncio.run(
+        run_load(args.rate, args.duration, args.chats, args.mix, args.timeout, args.workdir, args.seed)
+    )
+    print_summary(summary)
+    if args.json:
+        args.json.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0 if not summary["timeouts"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Benchmark the parallel workbook rebuild on a synthetic plavka history.
+
+The history is split into months generated inside the worker processes, so
+only the rendering is measured. The baseline is what a full regeneration
+costs with the bot's own write path: one openpyxl loop over all rows,
+followed by the shared strings pass of ``_save_workbook``.
+
+Usage:
+    python tests/rebuild_benchmark.py --rows 500000 --workers 1 2 4
+    python tests/rebuild_benchmark.py --rows 100000 --skip-baseline
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from openpyxl import Workbook
+
+from src.bot.services.excel import PLAVKA_HEADERS
+from src.bot.services.rebuild import write_workbook
+from src.bot.services.shared_strings import encode_shared_strings
+
+ROWS_PER_MONTH = 4000
+CASTINGS = ("Держатель ригеля", "Адаптер", "Вороток", "Корпус клапана", "Крышка подшипника")
+CREW = ("Иванов Иван Иванович", "Петров Петр Петрович", "Сидоров Сергей Сергеевич", "Кузнецов Олег Андреевич")
+
+
+def synthetic_row(index: int, month: int) -> List:
+    row = [None] * len(PLAVKA_HEADERS)
+    row[0] = 200000000 + index
+    row[1] = f"{index % 28 + 1}-{index}/24"
+    row[2] = datetime(2015 + month // 12, month % 12 + 1, index % 28 + 1)
+    row[3] = str(index % 999 + 1)
+    row[5] = CREW[index % len(CREW)]
+    row[6] = CREW[(index + 1) % len(CREW)]
+    row[10] = CASTINGS[index % len(CASTINGS)]
+    row[11] = "Серийная" if index % 3 else "Опытная"
+    for sector in range(4):
+        row[16 + sector * 4] = f"08:{index % 60:02d}"
+        row[19 + sector * 4] = 1500 + index % 80 + sector / 2
+    row[32] = f"Плавка {index}" if index % 5 == 0 else None
+    row[-1] = index
+    return row
+
+
+@dataclass
+class SyntheticMonth:
+    """``rows`` rows of month ``month``, numbered from ``first_index``; generated where it is rendered."""
+
+    month: int
+    first_index: int
+    row_count: int
+
+    def rows(self) -> Iterator[List]:
+        for index in range(self.first_index, self.first_index + self.row_count):
+            yield synthetic_row(index, self.month)
+
+
+def synthetic_history(rows: int) -> List[SyntheticMonth]:
+    months = []
+    for month, first_index in enumerate(range(1, rows + 1, ROWS_PER_MONTH)):
+        months.append(SyntheticMonth(month, first_index, min(ROWS_PER_MONTH, rows - first_index + 1)))
+    return months
+
+
+def openpyxl_rebuild(path: Path, months: List[SyntheticMonth]) -> None:
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Records")
+    worksheet.append(list(PLAVKA_HEADERS))
+    for month in months:
+        for row in month.rows():
+            worksheet.append(row)
+    plain_path = path.with_name(f"{path.name}.plain")
+    workbook.save(plain_path)
+    encode_shared_strings(plain_path, path)
+    plain_path.unlink()
+
+
+def run_benchmark(rows: int, workers: List[int], baseline: bool = True, workdir: Optional[Path] = None) -> Dict:
+    months = synthetic_history(rows)
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp_dir:
+        if baseline:
+            path = Path(tmp_dir) / "openpyxl.xlsx"
+            start_time = time.perf_counter()
+            openpyxl_rebuild(path, months)
+            results["openpyxl"] = {"seconds": time.perf_counter() - start_time, "mb": path.stat().st_size / 2**20}
+        for count in workers:
+            path = Path(tmp_dir) / f"rebuild-{count}.xlsx"
+            start_time = time.perf_counter()
+            write_workbook(path, months, workers=count)
+            results[f"rebuild x{count}"] = {"seconds": time.perf_counter() - start_time, "mb": path.stat().st_size / 2**20}
+    return {"rows": rows, "partitions": len(months), "cpus": os.cpu_count(), "results": results}
+
+
+def print_summary(summary: Dict) -> None:
+    print(f"{summary['rows']} rows in {summary['partitions']} months, {summary['cpus']} CPUs")
+    reference = summary["results"].get("openpyxl", next(iter(summary["results"].values())))["seconds"]
+    print(f"{'writer':<14}{'seconds':>10}{'rows/s':>12}{'speedup':>10}{'MB':>8}")
+    for name, result in summary["results"].items():
+        print(
+            f"{name:<14}{result['seconds']:>10.2f}{summary['rows'] / result['seconds']:>12.0f}"
+            f"{reference / result['seconds']:>10.1f}{result['mb']:>8.1f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--skip-baseline", action="store_true", help="do not time the openpyxl loop")
+    parser.add_argument("--workdir", type=Path, help="write the workbooks under this directory")
+    args = parser.parse_args()
+
+    print_summary(run_benchmark(args.rows, sorted(set(args.workers)), not args.skip_baseline, args.workdir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Test admission control of shift report imports."""
+
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import Chat, Message, User
+
+from src.bot.services.admission import IMPORT_FLAG, SATURATED, USER_BUSY, ImportAdmission
+
+
+def make_message(user_id: int) -> Message:
+    return Message(
+        message_id=user_id,
+        date=datetime.now(),
+        chat=Chat(id=user_id, type="private"),
+        from_user=User(id=user_id, is_bot=False, first_name="Тест"),
+        text="Отчёт",
+    )
+
+
+async def _noop(*_args) -> None:
+    return None
+
+
+IMPORT_HANDLER = HandlerObject(callback=_noop, flags={IMPORT_FLAG: True})
+OTHER_HANDLER = HandlerObject(callback=_noop)
+
+
+def send(admission: ImportAdmission, user_id: int, work: float, log: list, handler=IMPORT_HANDLER):
+    """Run one message through the middleware; log (user, outcome, seconds)."""
+    message = make_message(user_id)
+
+    async def handle(_event, _data):
+        await asyncio.sleep(work)
+        return "done"
+
+    async def run():
+        started = time.perf_counter()
+        result = await admission(handle, message, {"event_from_user": message.from_user, "handler": handler})
+        log.append((user_id, result or "rejected", time.perf_counter() - started))
+
+    return run()
+
+
+def test_one_user_burst():
+    print("Test 1: One user pastes ten reports at once")
+    admission = ImportAdmission(concurrency=4, per_user=1, queue_size=16)
+    log = []
+
+    async def scenario():
+        with mock.patch.object(Message, "answer", new_callable=mock.AsyncMock) as answer:
+            await asyncio.gather(*(send(admission, 1, 0.3, log) for _ in range(10)), send(admission, 2, 0.3, log))
+        return [call.args[0] for call in answer.call_args_list]
+
+    replies = asyncio.run(scenario())
+    rejected = [seconds for user, outcome, seconds in log if outcome == "rejected"]
+    done = sorted(user for user, outcome, _ in log if outcome == "done")
+    print(f"  done: {done}, {len(rejected)} rejected in at most {max(rejected) * 1000:.1f} ms")
+    if done != [1, 2] or len(rejected) != 9 or max(rejected) > 0.05:
+        print("✗ Expected one import per user and nine quick rejections")
+        return False
+    if replies != [USER_BUSY] * 9:
+        print(f"✗ Rejected senders should be told why: {replies}")
+        return False
+    print("✓ Extra reports of one user rejected at once, another user unaffected")
+    return True
+
+
+def test_global_limit_and_queue():
+    print("\nTest 2: Ten users against two slots and a queue of three")
+    admission = ImportAdmission(concurrency=2, per_user=1, queue_size=3)
+    log = []
+    order = []
+
+    async def scenario():
+        with mock.patch.object(Message, "answer", new_callable=mock.AsyncMock) as answer:
+            tasks = []
+            for user_id in range(1, 11):
+                tasks.append(asyncio.create_task(send(admission, user_id, 0.2, log)))
+                await asyncio.sleep(0)
+            await asyncio.sleep(0.01)
+            during = admission.stats()
+            await asyncio.gather(*tasks)
+            await send(admission, 11, 0, log, handler=OTHER_HANDLER)
+        order.extend(user for user, outcome, _ in log if outcome == "done")
+        return during, {call.args[0] for call in answer.call_args_list}
+
+    during, replies = asyncio.run(scenario())
+    rejected = [seconds for _, outcome, seconds in log if outcome == "rejected"]
+    print(f"  while saturated: {during}; finished in order {order}")
+    if during["active"] != 2 or during["queued"] != 3 or len(rejected) != 5 or max(rejected) > 0.05:
+        print("✗ Expected two running, three queued and five quick rejections")
+        return False
+    if order != [1, 2, 3, 4, 5, 11] or replies != {SATURATED}:
+        print("✗ Queued imports should run in arrival order, other messages pass through")
+        return False
+    if admission.stats() != {"active": 0, "queued": 0, "admitted": 5, "rejected": 5}:
+        print(f"✗ Slots leaked: {admission.stats()}")
+        return False
+    print("✓ Queue bounded, first come first served, slots returned")
+    return True
+
+
+def test_queue_timeout_bounds_latency():
+    print("\nTest 3: Waiting for a slot gives up after the queue timeout")
+    admission = ImportAdmission(concurrency=1, per_user=1, queue_size=10, queue_timeout=0.1)
+    log = []
+
+    async def scenario():
+        with mock.patch.object(Message, "answer", new_callable=mock.AsyncMock):
+            await asyncio.gather(*(send(admission, user_id, 0.5, log) for user_id in range(1, 6)))
+            await send(admission, 6, 0, log)
+
+    asyncio.run(scenario())
+    rejected = [seconds for _, outcome, seconds in log if outcome == "rejected"]
+    done = [user for user, outcome, _ in log if outcome == "done"]
+    print(f"  done: {done}, rejected after {min(rejected):.2f}..{max(rejected):.2f} s")
+    if done != [1, 6] or len(rejected) != 4 or not all(0.09 < seconds < 0.2 for seconds in rejected):
+        print("✗ Queued imports should be turned away after 0.1 s")
+        return False
+    if admission.stats()["active"] or admission.stats()["queued"]:
+        print(f"✗ Slots leaked: {admission.stats()}")
+        return False
+    print("✓ Nobody waits longer than the queue timeout")
+    return True
+
+
+def test_late_timeout_passes_slot_on():
+    print("\nTest 4: A slot handed over just as the wait times out is not lost")
+    admission = ImportAdmission(concurrency=1, per_user=1, queue_size=10, queue_timeout=1)
+    log = []
+
+    async def late_wait_for(waiter, _timeout):
+        # What wait_for may do on Python 3.12+: time out after the result is set.
+        await waiter
+        raise asyncio.TimeoutError
+
+    async def scenario():
+        with mock.patch.object(Message, "answer", new_callable=mock.AsyncMock):
+            with mock.patch("asyncio.wait_for", late_wait_for):
+                await asyncio.gather(send(admission, 1, 0.05, log), send(admission, 2, 0, log))
+            await send(admission, 3, 0, log)
+
+    asyncio.run(scenario())
+    outcomes = [(user, outcome) for user, outcome, _ in log]
+    print(f"  {outcomes}, {admission.stats()}")
+    if outcomes != [(1, "done"), (2, "rejected"), (3, "done")] or admission.stats()["active"]:
+        print("✗ The slot handed to the timed-out waiter leaked")
+        return False
+    print("✓ Slot passed on, nothing leaked")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("IMPORT ADMISSION TEST")
+    print("=" * 60)
+
+    tests = [
+        test_one_user_burst,
+        test_global_limit_and_queue,
+        test_queue_timeout_bounds_latency,
+        test_late_timeout_passes_slot_on,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
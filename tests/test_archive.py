@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Test compaction of closed months into archive segments."""
+
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from openpyxl import Workbook, load_workbook
+
+from src.bot.services import excel
+from src.bot.services.archive import archive_dir, load_catalog, settle_catalog, stage_catalog
+from src.bot.services.compaction import hot_window_start
+from src.bot.services.excel import (
+    PLAVKA_HEADERS,
+    _prepare_workbook,
+    append_plavka_rows,
+    compact_workbook,
+    export_rows_since,
+    get_last_rows,
+    iter_store_rows,
+    reconcile_workbook,
+)
+from src.bot.services.manifest import current_manifest, discard_manifest, file_fingerprint
+from src.bot.services.search_index import SearchIndex
+from test_manifest import build_row
+from test_reconcile import edit_cell
+from test_search_index import COMMENT_COLUMN
+
+# Rows 1..700 are from September, ..1500 October, ..2345 November and the
+# rest December, except row 2700: a late October report.
+MONTH_ENDS = ((700, date(2024, 9, 1)), (1500, date(2024, 10, 1)), (2345, date(2024, 11, 1)), (3000, date(2024, 12, 1)))
+LATE_ROW = 2700
+
+
+def dated_row(index: int) -> list:
+    row = build_row(index)
+    for last_index, first_day in MONTH_ENDS:
+        if index <= last_index:
+            row[2] = datetime.combine(first_day + timedelta(days=index % 28), datetime.min.time())
+            break
+    if index == LATE_ROW:
+        row[2] = datetime(2024, 10, 30)
+    if index % 100 == 0:
+        row[COMMENT_COLUMN] = "раковина" if index <= 2345 else "пригар"
+    return row
+
+
+def create_store(path: Path, rows: int = 3000) -> None:
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Records")
+    worksheet.append(list(PLAVKA_HEADERS))
+    for index in range(1, rows + 1):
+        worksheet.append(dated_row(index))
+    workbook.save(path)
+    _prepare_workbook(path)
+
+
+def live_rows(path: Path) -> int:
+    workbook = load_workbook(path, read_only=True)
+    count = sum(1 for _ in workbook.active.iter_rows(min_row=2))
+    workbook.close()
+    return count
+
+
+def test_closed_months_archived():
+    print("Test 1: Closed months leave the workbook, row numbers stay")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        create_store(xlsx_path)
+        before_rows = list(iter_store_rows(xlsx_path))
+        before_checksums = current_manifest(xlsx_path).block_checksums
+
+        archived = compact_workbook(xlsx_path, before="2024-12")
+        again = compact_workbook(xlsx_path, before="2024-12")
+        catalog = load_catalog(xlsx_path)
+        manifest = current_manifest(xlsx_path)
+        after_rows = list(iter_store_rows(xlsx_path))
+        last = get_last_rows(700, xlsx_path=xlsx_path)
+        in_workbook = live_rows(xlsx_path)
+
+        discard_manifest(xlsx_path)
+        _prepare_workbook(xlsx_path)
+        recomputed = current_manifest(xlsx_path)
+
+    print(f"  archived {archived} rows into {[segment.name for segment in catalog.segments]}, {in_workbook} left")
+    if archived != 2345 or again != 0 or in_workbook != 655:
+        print(f"✗ Expected 2345 rows archived once and 655 left, got {archived}, {again}, {in_workbook}")
+        return False
+    if [segment.month for segment in catalog.segments] != ["2024-09", "2024-10", "2024-11"]:
+        print("✗ Expected one segment per closed month")
+        return False
+    october = catalog.segments[1].summary
+    if catalog.segments[1].rows != 800 or october["counts"]["Наименование_отливки"] != {"Держатель ригеля": 800}:
+        print(f"✗ October summary is wrong: {october}")
+        return False
+    if manifest is None or manifest.row_count != 3000 or manifest.block_checksums != before_checksums:
+        print("✗ Manifest changed its numbering")
+        return False
+    if recomputed.block_checksums != before_checksums or recomputed.row_count != 3000:
+        print("✗ A full check after compaction numbers rows differently")
+        return False
+    if after_rows != before_rows or last != before_rows[-700:]:
+        print("✗ Reading through the archive gives different rows")
+        return False
+    print("✓ Same rows, numbers and checksums as before compaction")
+    return True
+
+
+def test_archive_read_only_when_needed():
+    print("\nTest 2: Reads open the archive only when the range reaches into it")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        create_store(xlsx_path)
+        compact_workbook(xlsx_path, before="2024-12")
+
+        with mock.patch.object(excel, "iter_archived_rows", wraps=excel.iter_archived_rows) as archive_reads:
+            recent = export_rows_since(2400, Path(tmp_dir) / "recent.xlsx", xlsx_path=xlsx_path)
+            get_last_rows(10, xlsx_path=xlsx_path)
+            hot_reads = archive_reads.call_count
+            older = export_rows_since(2000, Path(tmp_dir) / "older.xlsx", xlsx_path=xlsx_path)
+            cold_reads = archive_reads.call_count - hot_reads
+        exported = load_workbook(Path(tmp_dir) / "older.xlsx", read_only=True)
+        exported_ids = [row[-1] for row in exported.active.iter_rows(min_row=2, values_only=True)]
+        exported.close()
+
+    if recent != (600, 3000) or hot_reads != 0:
+        print(f"✗ Recent rows should come from the workbook alone: {recent}, {hot_reads} archive reads")
+        return False
+    if older != (1000, 3000) or cold_reads != 1 or exported_ids != list(range(2001, 3001)):
+        print(f"✗ Older rows should come from the archive, then the workbook: {older}, {cold_reads} archive reads")
+        return False
+    print("✓ Archive read only for the older range")
+    return True
+
+
+def test_search_and_edits_across_the_boundary():
+    print("\nTest 3: Search index and hand edits around archived rows")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        stores = {"plavka": xlsx_path, "journal": Path(tmp_dir) / "journal.xlsx"}
+        log_path = Path(tmp_dir) / "search.jsonl"
+        create_store(xlsx_path)
+
+        index = SearchIndex(log_path, stores)
+        index.start()
+        compact_workbook(xlsx_path, before="2024-12")
+        # Row 2400 is in block 2, rows 2001..2345 of which are archived.
+        edit_cell(xlsx_path, 2400 - 2345, COMMENT_COLUMN, "усадка")
+        changes = reconcile_workbook(xlsx_path)
+        live, _ = index.search("усадка")
+        index.stop()
+
+        append_plavka_rows([dated_row(3001)], xlsx_path=xlsx_path)
+        restarted = SearchIndex(log_path, stores)
+        restarted.start()
+        _, archived_total = restarted.search("раковина")
+        after_restart, _ = restarted.search("усадка")
+        indexed = restarted.indexed_rows["plavka"]
+        restarted.stop()
+
+    block = changes.blocks.get(2, [])
+    if list(changes.blocks) != [2] or len(block) != 1000 or block[0][-1] != 2001 or block[399][COMMENT_COLUMN] != "усадка":
+        print(f"✗ Expected block 2 with its archived rows, got {list(changes.blocks)}")
+        return False
+    if [hit.row for hit in live] != [2400] or [hit.row for hit in after_restart] != [2400]:
+        print(f"✗ Edit not indexed under its row number: {live}, {after_restart}")
+        return False
+    if archived_total != 23 or indexed != 3001:
+        print(f"✗ Archived comments or row count lost: {archived_total}, {indexed}")
+        return False
+    print("✓ Archived rows stay searchable, edits keep their numbers")
+    return True
+
+
+def test_late_rows_and_interrupted_compaction():
+    print("\nTest 4: Late rows of an old month, and a compaction cut short")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        create_store(xlsx_path)
+        compact_workbook(xlsx_path, before="2024-12")
+        compact_workbook(xlsx_path, before="2025-01")
+        catalog = load_catalog(xlsx_path)
+        names = [segment.name for segment in catalog.segments]
+        rows = list(iter_store_rows(xlsx_path))
+
+        # The catalog is staged before the workbook is replaced: it only
+        # counts once the workbook it was written for is in place.
+        staged = replace(catalog, archived_rows=1, fingerprint=[0, 0])
+        stage_catalog(xlsx_path, staged)
+        ignored = load_catalog(xlsx_path).archived_rows
+        settle_catalog(xlsx_path)
+        staged.fingerprint = file_fingerprint(xlsx_path)
+        stage_catalog(xlsx_path, staged)
+        adopted = load_catalog(xlsx_path).archived_rows
+        settle_catalog(xlsx_path)
+        pending_left = (archive_dir(xlsx_path) / "catalog.next.json").exists()
+        settled = load_catalog(xlsx_path).archived_rows
+
+    print(f"  segments: {', '.join(names)}")
+    if "2024-10.1.jsonl.gz" not in names or catalog.archived_rows != 3000 or len(rows) != 3000:
+        print("✗ The late October row should go to a second October segment")
+        return False
+    if [row[-1] for row in rows] != list(range(1, 3001)):
+        print("✗ Rows are out of order after two compactions")
+        return False
+    if (ignored, adopted, settled, pending_left) != (3000, 1, 1, False):
+        print(f"✗ Staged catalog handled wrongly: {ignored}, {adopted}, {settled}, {pending_left}")
+        return False
+    print("✓ Late rows archived later, staged catalog adopted only with its workbook")
+    return True
+
+
+def test_rebuild_cost(rows: int = 20000, hot: int = 1000):
+    print(f"\nTest 5: Appending to {rows} rows before and after archiving all but {hot}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet("Records")
+        worksheet.append(list(PLAVKA_HEADERS))
+        for index in range(1, rows + 1):
+            row = build_row(index)
+            row[2] = datetime(2024, 1 + min(11, (index - 1) * 11 // (rows - hot)), 15)
+            worksheet.append(row)
+        workbook.save(xlsx_path)
+        _prepare_workbook(xlsx_path)
+
+        start_time = time.perf_counter()
+        append_plavka_rows([build_row(rows + 1)], xlsx_path=xlsx_path)
+        before = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        archived = compact_workbook(xlsx_path, before=hot_window_start(date(2024, 12, 3), 1))
+        compaction = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        append_plavka_rows([build_row(rows + 2)], xlsx_path=xlsx_path)
+        after = time.perf_counter() - start_time
+        size = sum(path.stat().st_size for path in archive_dir(xlsx_path).glob("*.jsonl.gz"))
+
+    print(f"  archived {archived} rows in {compaction:.2f}s, {size / 1024:.0f} KiB of segments")
+    print(f"  append: {before:.2f}s before, {after:.2f}s after")
+    if archived != rows - hot or after >= before / 3:
+        print("✗ Appending after compaction should be several times faster")
+        return False
+    print("✓ Appends only rewrite the hot window")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("ARCHIVE TEST")
+    print("=" * 60)
+
+    tests = [
+        test_closed_months_archived,
+        test_archive_read_only_when_needed,
+        test_search_and_edits_across_the_boundary,
+        test_late_rows_and_interrupted_compaction,
+        test_rebuild_cost,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
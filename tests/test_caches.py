@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Test the download file_id cache and the versioned render cache."""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.services.document_cache import DocumentCache
+from src.bot.services.render_cache import RenderCache
+
+
+async def _download_burst(cache: DocumentCache, version, requests: int):
+    uploads = []
+    resent = []
+
+    async def upload():
+        uploads.append(version)
+        await asyncio.sleep(0.05)
+        return f"file-{version}"
+
+    async def send_cached(file_id):
+        resent.append(file_id)
+
+    await asyncio.gather(*(cache.send(version, upload, send_cached) for _ in range(requests)))
+    return uploads, resent
+
+
+def test_document_cache_shares_uploads():
+    print("Test 1: Concurrent downloads share one upload")
+    cache = DocumentCache()
+
+    uploads, resent = asyncio.run(_download_burst(cache, (100, 1), requests=10))
+    if len(uploads) != 1 or resent != ["file-(100, 1)"] * 9:
+        print(f"✗ Expected one upload and 9 resends, got {len(uploads)} uploads and {len(resent)} resends")
+        return False
+
+    uploads, resent = asyncio.run(_download_burst(cache, (100, 1), requests=3))
+    if uploads or len(resent) != 3:
+        print("✗ Cached file_id was not reused for the same version")
+        return False
+
+    uploads, _resent = asyncio.run(_download_burst(cache, (120, 2), requests=3))
+    if len(uploads) != 1:
+        print("✗ A new version did not trigger exactly one upload")
+        return False
+
+    print(f"✓ hits={cache.hits}, misses={cache.misses}")
+    return True
+
+
+def test_render_cache_versions():
+    print("\nTest 2: Render cache is reused until the store version changes")
+    cache = RenderCache()
+
+    if cache.get("last", 0) is not None:
+        print("✗ Empty cache returned a value")
+        return False
+    cache.put("last", 0, "Плавка 1")
+
+    start_time = time.perf_counter()
+    for _ in range(10000):
+        text = cache.get("last", 0)
+    elapsed = time.perf_counter() - start_time
+
+    if text != "Плавка 1" or cache.get("last", 1) is not None:
+        print("✗ Cache did not honour the store version")
+        return False
+
+    print(f"✓ 10000 hits in {elapsed * 1000:.2f} ms, hit rate {cache.hit_rate:.3f}")
+    return True
+
+
+def test_store_version_bumps_on_append():
+    print("\nTest 3: Store version grows with every append")
+    from src.bot.services.excel import append_plavka_rows, get_store_version
+    from test_manifest import build_row
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "plavka.xlsx"
+        before = get_store_version()
+        append_plavka_rows([build_row(1)], xlsx_path=path)
+        append_plavka_rows([build_row(2)], xlsx_path=path)
+        after = get_store_version()
+
+    if after - before != 2:
+        print(f"✗ Expected the version to grow by 2, got {before} -> {after}")
+        return False
+    print(f"✓ Store version {before} -> {after}")
+    return True
+
+
+def test_stores_version_sees_other_writers():
+    print("\nTest 4: Writes by another process change the version of the stores")
+    from src.bot.services.excel import append_plavka_rows, get_store_version
+    from src.bot.services.shards import stores_version
+    from test_manifest import build_row
+    from test_shards import _reset_settings, _use_settings
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = _use_settings(tmp_dir)
+        journal_path = Path(tmp_dir) / "journal.xlsx"
+        try:
+            append_plavka_rows([build_row(1)], xlsx_path=xlsx_path)
+            before, counter = stores_version(journal_path), get_store_version()
+            unchanged = stores_version(journal_path) == before
+            script = (
+                "import sys; sys.path.insert(0, 'tests')\n"
+                "from pathlib import Path\n"
+                "from src.bot.services.excel import append_plavka_rows\n"
+                "from test_manifest import build_row\n"
+                f"append_plavka_rows([build_row(2)], xlsx_path=Path({str(xlsx_path)!r}))\n"
+            )
+            subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=Path(__file__).parent.parent,
+                env={**os.environ, "BOT_TOKEN": os.environ.get("BOT_TOKEN", "x")},
+                check=True,
+            )
+            after_write = stores_version(journal_path)
+            journal_path.write_bytes(b"")
+            after_journal = stores_version(journal_path)
+            counter_after = get_store_version()
+        finally:
+            _reset_settings()
+
+    if not unchanged or counter_after != counter:
+        print("✗ The version should hold while nothing is written, and the counter only count this process")
+        return False
+    if after_write == before or after_journal == after_write:
+        print("✗ A write by another process or a new journal should change the version")
+        return False
+    print("✓ Version follows the files, not only this process's commits")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("CACHE TEST SUITE")
+    print("=" * 60)
+
+    tests = [
+        test_document_cache_shares_uploads,
+        test_render_cache_versions,
+        test_store_version_bumps_on_append,
+        test_stores_version_sees_other_writers,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Test batching, coalescing and rate limiting of the change feed."""
+
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.services.change_feed import ChangeFeed, ChatSubscriptions
+from src.bot.services.shards import store_path
+from test_manifest import build_row
+from test_shards import _reset_settings, _use_settings
+
+
+async def _run_feed(path: Path, commits: int, rows_per_commit: int, chats: int):
+    subscriptions = ChatSubscriptions(path)
+    for chat_id in range(1, chats + 1):
+        subscriptions.add(chat_id)
+
+    sent = []
+
+    async def send(chat_id, text):
+        sent.append((chat_id, text))
+
+    feed = ChangeFeed(subscriptions, flush_interval=0.05, chat_rate_per_minute=60)
+    feed.start(send)
+    start_time = time.perf_counter()
+
+    def committer():
+        for commit in range(commits):
+            first = commit * rows_per_commit + 1
+            feed.publish_rows_threadsafe([build_row(i) for i in range(first, first + rows_per_commit)])
+            time.sleep(0.005)
+
+    writer = threading.Thread(target=committer)
+    writer.start()
+    await asyncio.to_thread(writer.join)
+    # A plavka re-imported twice before the next flush is announced once more, not twice.
+    feed.publish_rows_threadsafe([build_row(1)])
+    feed.publish_rows_threadsafe([build_row(1)])
+    await asyncio.sleep(0)
+    await asyncio.sleep(1.2)
+    await feed.stop()
+    return sent, time.perf_counter() - start_time
+
+
+def test_feed_batches_per_chat(commits: int = 200, rows_per_commit: int = 3, chats: int = 4):
+    print(f"\nTest: {commits} commits fanned out to {chats} chats")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sent, elapsed = asyncio.run(_run_feed(Path(tmp_dir) / "subscriptions.json", commits, rows_per_commit, chats))
+        reloaded = ChatSubscriptions(Path(tmp_dir) / "subscriptions.json")
+
+    per_chat = {}
+    announced = {}
+    for chat_id, text in sent:
+        per_chat[chat_id] = per_chat.get(chat_id, 0) + 1
+        announced[chat_id] = announced.get(chat_id, 0) + int(text.splitlines()[0].rsplit(" ", 1)[1])
+
+    print(f"  messages per chat: {per_chat}")
+    print(f"  feed ran {elapsed:.2f}s, at most {3 + int(elapsed) + 1} messages allowed per chat")
+    print(f"  records announced per chat: {announced}")
+
+    total_records = commits * rows_per_commit
+    if set(per_chat) != set(range(1, chats + 1)) or any(chat_id not in reloaded for chat_id in per_chat):
+        print("✗ Not every subscribed chat received the feed")
+        return False
+    # 3 burst tokens plus one per second of activity at 60 messages/minute.
+    allowed = 3 + int(elapsed) + 1
+    if max(per_chat.values()) > allowed:
+        print("✗ Per-chat rate limit was not respected")
+        return False
+    if any(count < total_records for count in announced.values()):
+        print("✗ Some records were not announced")
+        return False
+    if any(count > total_records + 1 for count in announced.values()):
+        print("✗ Records were announced more than once")
+        return False
+
+    print(f"✓ {commits} commits delivered as {len(sent)} messages")
+    return True
+
+
+def _announced(text: str) -> list:
+    return [line.split()[2] for line in text.splitlines()[1:]]
+
+
+def test_feed_per_store_and_retries():
+    print("\nTest 2: Chats hear only about their own store, failed messages are sent again")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _use_settings(tmp_dir, SHARD_BY="plant", PLANTS="ceh1=-1001")
+        try:
+            subscriptions = ChatSubscriptions(Path(tmp_dir) / "subscriptions.json")
+            subscriptions.add(-1001)
+            subscriptions.add(42)
+            sent = []
+            failures = [-1001]
+
+            async def send(chat_id, text):
+                if chat_id in failures:
+                    failures.remove(chat_id)
+                    raise asyncio.TimeoutError()
+                sent.append((chat_id, _announced(text)))
+
+            async def scenario():
+                feed = ChangeFeed(subscriptions, flush_interval=3600)
+                feed.start(send)
+                feed.publish_rows_threadsafe([build_row(1), build_row(2)], store_path("ceh1"))
+                feed.publish_rows_threadsafe([build_row(10)], store_path(None))
+                await asyncio.sleep(0)
+                await feed.flush()
+                feed.publish_rows_threadsafe([build_row(3)], store_path("ceh1"))
+                await asyncio.sleep(0)
+                await feed.flush()
+                await feed.stop()
+                return feed.messages_sent
+
+            messages_sent = asyncio.run(scenario())
+        finally:
+            _reset_settings()
+
+    print(f"  sent: {sent}")
+    if sent != [(42, ["10"]), (-1001, ["1", "2", "3"])] or messages_sent != 2:
+        print("✗ Plavki leaked to another store's chat or a failed batch was lost")
+        return False
+    print("✓ One store per chat, nothing lost on a failed send")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("CHANGE FEED TEST")
+    print("=" * 60)
+
+    tests = [
+        test_feed_batches_per_chat,
+        test_feed_per_store_and_retries,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Test reuse and invalidation of the Telegram file_id of downloaded stores."""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiogram.types import FSInputFile
+
+from src.bot.handlers.menu import menu_download
+from src.bot.services.document_cache import DocumentCache, get_document_cache
+from src.bot.services.excel import append_plavka_rows
+from src.bot.services.watermarks import get_watermarks
+from test_manifest import build_row
+from test_shards import _reset_settings, _use_settings
+
+
+class FakeMessage:
+    """Records what the handlers send; uploads get file ids ``file-1``, ``file-2``..."""
+
+    def __init__(self, chat_id: int = 1, reject_file_ids: bool = False) -> None:
+        self.chat = SimpleNamespace(id=chat_id)
+        self.reject_file_ids = reject_file_ids
+        self.documents = []
+        self.texts = []
+        self.uploads = 0
+        self.on_upload = None
+
+    async def answer_document(self, document, **kwargs):
+        self.documents.append(document)
+        if isinstance(document, str):
+            if self.reject_file_ids:
+                raise RuntimeError("Bad Request: wrong file identifier")
+            return SimpleNamespace(document=SimpleNamespace(file_id=document))
+        self.uploads += 1
+        if self.on_upload is not None:
+            self.on_upload(document)
+        return SimpleNamespace(document=SimpleNamespace(file_id=f"file-{self.uploads}"))
+
+    async def answer(self, text, **kwargs):
+        self.texts.append(text)
+
+
+def make_callback(message: FakeMessage, user_id: int = 7):
+    return SimpleNamespace(message=message, from_user=SimpleNamespace(id=user_id), answer=mock.AsyncMock())
+
+
+def use_store(tmp_dir: str, **env: str) -> Path:
+    """Point the settings at ``tmp_dir`` and start with fresh caches."""
+    xlsx_path = _use_settings(tmp_dir, **env)
+    get_document_cache.cache_clear()
+    get_watermarks.cache_clear()
+    return xlsx_path
+
+
+def reset_store() -> None:
+    _reset_settings()
+    get_document_cache.cache_clear()
+    get_watermarks.cache_clear()
+
+
+def sent_kinds(message: FakeMessage) -> list:
+    return ["upload" if isinstance(document, FSInputFile) else document for document in message.documents]
+
+
+def test_reuse_until_the_file_changes():
+    print("Test 1: A download resends the file_id until the store changes")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = use_store(tmp_dir)
+        try:
+            append_plavka_rows([build_row(1)], xlsx_path=xlsx_path)
+            message = FakeMessage()
+
+            async def scenario():
+                await menu_download(make_callback(message))
+                await menu_download(make_callback(message, user_id=8))
+                append_plavka_rows([build_row(2)], xlsx_path=xlsx_path)
+                await menu_download(make_callback(message))
+                # A hand edit changes the file without a commit by the bot.
+                stat = xlsx_path.stat()
+                os.utime(xlsx_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+                await menu_download(make_callback(message))
+                await menu_download(make_callback(message))
+
+            asyncio.run(scenario())
+            cache = get_document_cache()
+        finally:
+            reset_store()
+
+    kinds = sent_kinds(message)
+    print(f"  sent: {kinds}")
+    if kinds != ["upload", "file-1", "upload", "upload", "file-3"]:
+        print("✗ The file should be uploaded once per version and resent by file_id otherwise")
+        return False
+    if (cache.hits, cache.misses) != (2, 3):
+        print(f"✗ Wrong hit/miss counts: {cache.hits}/{cache.misses}")
+        return False
+    print("✓ One upload per version of the store")
+    return True
+
+
+def test_rejected_and_failed_uploads():
+    print("\nTest 2: A rejected file_id is uploaded again, a failed upload is not remembered")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = use_store(tmp_dir)
+        try:
+            append_plavka_rows([build_row(1)], xlsx_path=xlsx_path)
+            message = FakeMessage(reject_file_ids=True)
+
+            async def scenario():
+                await menu_download(make_callback(message))
+                await menu_download(make_callback(message))
+                message.reject_file_ids = False
+                await menu_download(make_callback(message))
+
+            asyncio.run(scenario())
+        finally:
+            reset_store()
+
+    cache = DocumentCache()
+    attempts = []
+
+    async def failing_upload():
+        attempts.append("upload")
+        if len(attempts) == 1:
+            raise RuntimeError("network error")
+        return "file-ok"
+
+    async def send_cached(file_id):
+        attempts.append(file_id)
+
+    async def uploads():
+        try:
+            await cache.send("v1", failing_upload, send_cached)
+        except RuntimeError:
+            pass
+        await cache.send("v1", failing_upload, send_cached)
+        await cache.send("v1", failing_upload, send_cached)
+
+    asyncio.run(uploads())
+
+    kinds = sent_kinds(message)
+    print(f"  sent: {kinds}; after a failed upload: {attempts}")
+    if kinds != ["upload", "file-1", "upload", "file-2"]:
+        print("✗ A rejected file_id should fall back to an upload whose file_id is then reused")
+        return False
+    if attempts != ["upload", "upload", "file-ok"]:
+        print("✗ A failed upload should be retried, not cached")
+        return False
+    print("✓ Fallback upload replaces the rejected file_id")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("DOCUMENT CACHE TEST")
+    print("=" * 60)
+
+    tests = [
+        test_reuse_until_the_file_changes,
+        test_rejected_and_failed_uploads,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Test the import cost of the parsing path, measured with ``python -X importtime``."""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).parent.parent
+REPORT = Path(__file__).parent / "example_shift_report.txt"
+
+HEAVY_PACKAGES = ("openpyxl", "aiogram")
+RUNS = 3
+# Cumulative import time in seconds, the best of ``RUNS`` fresh interpreters.
+IMPORT_BUDGETS = {
+    "src.bot.services.parser": 0.15,
+    "src.bot.services.normalize": 0.15,
+    "src.bot.services.ingest": 0.15,
+    "src.bot.services.excel": 0.3,
+}
+
+
+def import_times(*args: str) -> Tuple[subprocess.CompletedProcess, Dict[str, float]]:
+    """Run ``python -X importtime *args``; return the process and each module's cumulative import time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        env={**os.environ, "BOT_TOKEN": os.environ.get("BOT_TOKEN", "x")},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    times: Dict[str, float] = {}
+    output: List[str] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            output.append(line)
+            continue
+        _self, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1e6
+    result.stderr = "\n".join(output)
+    return result, times
+
+
+def heavy(times: Dict[str, float]) -> List[str]:
+    return sorted({name.split(".")[0] for name in times if name.split(".")[0] in HEAVY_PACKAGES})
+
+
+def test_import_budgets():
+    print("Test 1: Parsing modules import within budget and without openpyxl or aiogram")
+    ok = True
+    for module, budget in IMPORT_BUDGETS.items():
+        runs = [import_times("-c", f"import {module}") for _ in range(RUNS)]
+        best = min(times.get(module, float("inf")) for _result, times in runs)
+        loaded = heavy(runs[0][1])
+        print(f"  {module}: {best * 1000:.0f} ms (budget {budget * 1000:.0f} ms)")
+        if any(result.returncode for result, _times in runs):
+            print(f"✗ Importing {module} failed: {runs[0][0].stderr}")
+            ok = False
+        elif loaded or best > budget:
+            print(f"✗ {module} is over budget or imports {', '.join(loaded)}")
+            ok = False
+    if ok:
+        print("✓ All modules within budget")
+    return ok
+
+
+def test_openpyxl_on_first_use():
+    print("\nTest 2: openpyxl is imported when a store is first written")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        script = (
+            "import sys\n"
+            "from pathlib import Path\n"
+            "from src.bot.services.excel import append_plavka_records\n"
+            "from src.bot.services.parser import parse_shift_report\n"
+            f"report = parse_shift_report(Path({str(REPORT)!r}).read_text(encoding='utf-8'))\n"
+            "print('openpyxl' in sys.modules)\n"
+            f"print(append_plavka_records(report.plavki, xlsx_path=Path({tmp_dir!r}) / 'plavka.xlsx'))\n"
+            "print('openpyxl' in sys.modules)\n"
+        )
+        result, _times = import_times("-c", script)
+    print(f"  {result.stdout.split()}")
+    if result.returncode or result.stdout.split() != ["False", "3", "True"]:
+        print(f"✗ Unexpected result: {result.stdout} {result.stderr}")
+        return False
+    print("✓ Parsed without openpyxl, written with it")
+    return True
+
+
+def test_check_command():
+    print("\nTest 3: Checking report documents from the command line")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        broken = Path(tmp_dir) / "broken.txt"
+        broken.write_text(REPORT.read_text(encoding="utf-8").replace("Всего плавок: 3", "Всего плавок: 4"), encoding="utf-8")
+        good, good_times = import_times("-m", "src.bot.services.ingest", str(REPORT))
+        bad, _times = import_times("-m", "src.bot.services.ingest", str(REPORT), str(broken))
+
+    print(f"  {good.stdout.strip()}")
+    if good.returncode or "плавок 3" not in good.stdout or heavy(good_times):
+        print(f"✗ Check failed or loaded {heavy(good_times)}: {good.stdout} {good.stderr}")
+        return False
+    if bad.returncode != 1 or "с ошибками 1" not in bad.stdout:
+        print(f"✗ A broken report should fail the check: {bad.stdout}")
+        return False
+    print("✓ Reports checked without loading the bot")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("IMPORT TIME TEST")
+    print("=" * 60)
+
+    tests = [
+        test_import_budgets,
+        test_openpyxl_on_first_use,
+        test_check_command,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Test streamed ingestion of documents with many shift reports."""
+
+import asyncio
+import csv
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.services.ingest import DocumentFormatError, IngestProgress, ingest_document
+
+EXAMPLE_REPORT = (Path(__file__).parent / "example_shift_report.txt").read_text(encoding="utf-8")
+
+
+class Collector:
+    def __init__(self) -> None:
+        self.batches: list[int] = []
+        self.rows: list[list] = []
+        self.progress_calls = 0
+
+    async def commit(self, rows):
+        self.batches.append(len(rows))
+        self.rows.extend(rows)
+        return len(rows)
+
+    async def on_progress(self, progress: IngestProgress):
+        self.progress_calls += 1
+
+
+def _run(path: Path, batch_rows: int):
+    collector = Collector()
+    progress = asyncio.run(
+        ingest_document(path, commit=collector.commit, on_progress=collector.on_progress, batch_rows=batch_rows)
+    )
+    return collector, progress
+
+
+def test_txt_with_many_reports(num_reports: int = 200):
+    print(f"\nTest: .txt document with {num_reports} reports")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "reports.txt"
+        with path.open("w", encoding="utf-8") as handle:
+            for _ in range(num_reports):
+                handle.write(EXAMPLE_REPORT)
+                handle.write("\n")
+        collector, progress = _run(path, batch_rows=100)
+
+    expected_rows = num_reports * 3
+    print(f"  reports={progress.reports}, rows={progress.rows_committed}, batches={len(collector.batches)}")
+    if progress.reports != num_reports or progress.failed_reports:
+        print(f"✗ Expected {num_reports} clean reports, got {progress}")
+        return False
+    if progress.rows_committed != expected_rows or len(collector.rows) != expected_rows:
+        print(f"✗ Expected {expected_rows} rows")
+        return False
+    if max(collector.batches) > 100 + 3:
+        print(f"✗ Batch exceeded the configured size: {max(collector.batches)}")
+        return False
+
+    print(f"✓ Imported {expected_rows} plavki in {len(collector.batches)} batches")
+    return True
+
+
+def test_csv_and_xlsx_documents():
+    print("\nTest: .csv and .xlsx documents")
+    print("-" * 60)
+
+    pairs = []
+    for line in EXAMPLE_REPORT.splitlines():
+        if ":" in line:
+            key, value = line.split(":", 1)
+            pairs.append([key.strip(), value.strip()])
+        else:
+            pairs.append([line.strip()])
+
+    from openpyxl import Workbook
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / "reports.csv"
+        with csv_path.open("w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle, delimiter=";")
+            for _ in range(2):
+                writer.writerows(pairs)
+
+        xlsx_path = Path(tmp_dir) / "reports.xlsx"
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        for _ in range(2):
+            for row in pairs:
+                worksheet.append(row)
+        workbook.save(xlsx_path)
+
+        results = [_run(csv_path, batch_rows=10), _run(xlsx_path, batch_rows=10)]
+
+    for name, (collector, progress) in zip(("csv", "xlsx"), results):
+        print(f"  {name}: reports={progress.reports}, rows={progress.rows_committed}, errors={progress.errors}")
+        if progress.reports != 2 or progress.rows_committed != 6 or progress.failed_reports:
+            print(f"✗ Unexpected {name} result")
+            return False
+
+    print("✓ Spreadsheet documents imported")
+    return True
+
+
+def test_broken_report_is_skipped():
+    print("\nTest: Broken report inside a document")
+    print("-" * 60)
+
+    broken = EXAMPLE_REPORT.replace("Всего плавок: 3", "Всего плавок: 5")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "reports.txt"
+        path.write_text("\n".join([EXAMPLE_REPORT, broken, EXAMPLE_REPORT]), encoding="utf-8")
+        _collector, progress = _run(path, batch_rows=100)
+
+    if progress.reports != 3 or progress.failed_reports != 1 or progress.rows_committed != 6:
+        print(f"✗ Unexpected result: {progress}")
+        return False
+
+    print(f"✓ Broken report skipped: {progress.errors[0]}")
+    return True
+
+
+def test_unreadable_document():
+    print("\nTest: Unreadable .xlsx documents")
+    print("-" * 60)
+
+    from openpyxl import Workbook
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        valid = Path(tmp_dir) / "valid.xlsx"
+        workbook = Workbook()
+        for line in EXAMPLE_REPORT.splitlines():
+            workbook.active.append([line])
+        workbook.save(valid)
+
+        documents = {
+            "not a zip": b"\x00" * 1024,
+            "truncated": valid.read_bytes()[: valid.stat().st_size // 2],
+        }
+        damaged = Path(tmp_dir) / "damaged.xlsx"
+        with zipfile.ZipFile(valid) as source, zipfile.ZipFile(damaged, "w") as target:
+            for item in source.infolist():
+                data = source.read(item)
+                target.writestr(item, b"<worksheet><sheetData><row>" if item.filename.endswith("sheet1.xml") else data)
+        documents["damaged sheet"] = damaged.read_bytes()
+
+        for name, data in documents.items():
+            path = Path(tmp_dir) / "reports.xlsx"
+            path.write_bytes(data)
+            try:
+                collector, progress = _run(path, batch_rows=100)
+            except DocumentFormatError as exc:
+                print(f"  {name}: {exc}")
+                continue
+            except Exception as exc:
+                print(f"✗ {name}: {type(exc).__name__} instead of DocumentFormatError")
+                return False
+            print(f"✗ {name}: read as {progress.reports} reports, {progress.failed_reports} failed")
+            return False
+
+    print("✓ Every damaged document reported as unreadable, nothing committed")
+    return True
+
+
+def test_commit_to_shard():
+    print("\nTest 5: The command line commits to the store named by --shard")
+    from src.bot.services.excel import get_last_rows
+    from src.bot.services.ingest import main as ingest_main
+    from test_shards import _reset_settings, _use_settings
+
+    def exit_code(argv) -> int:
+        try:
+            return ingest_main(argv)
+        except SystemExit as exc:
+            return exc.code
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = Path(tmp_dir) / "reports.txt"
+        report.write_text(EXAMPLE_REPORT, encoding="utf-8")
+        codes = {}
+        try:
+            xlsx_path = _use_settings(tmp_dir, SHARD_BY="plant", PLANTS="ceh1=-1001")
+            codes["plant"] = exit_code([str(report), "--commit", "--shard", "ceh1"])
+            codes["unknown plant"] = exit_code([str(report), "--commit", "--shard", "ceh2"])
+            codes["check only"] = exit_code([str(report), "--shard", "ceh1"])
+            written = (len(get_last_rows(10, xlsx_path=xlsx_path.with_name("plavka.ceh1.xlsx"))), xlsx_path.exists())
+            _use_settings(tmp_dir, SHARD_BY="chat")
+            codes["chat without shard"] = exit_code([str(report), "--commit"])
+            _use_settings(tmp_dir, SHARD_BY="none")
+            codes["not sharded"] = exit_code([str(report), "--commit", "--shard", "ceh1"])
+        finally:
+            _reset_settings()
+
+    print(f"  exit codes: {codes}, rows in plavka.ceh1.xlsx and plavka.xlsx created: {written}")
+    if codes != {"plant": 0, "unknown plant": 2, "check only": 2, "chat without shard": 2, "not sharded": 2}:
+        print("✗ --shard should be required with SHARD_BY=chat and refused where it cannot apply")
+        return False
+    if written != (3, False):
+        print("✗ Plavki should go to the named store only")
+        return False
+    print("✓ Commits follow --shard")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("DOCUMENT INGESTION TEST SUITE")
+    print("=" * 60)
+
+    tests = [
+        test_txt_with_many_reports,
+        test_csv_and_xlsx_documents,
+        test_broken_report_is_skipped,
+        test_unreadable_document,
+        test_commit_to_shard,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Measure memory and file size of repeated crew and casting names on 100k plavki."""
+
+import gc
+import random
+import sys
+import tempfile
+import tracemalloc
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from openpyxl import Workbook, load_workbook
+
+from src.bot.services import parser
+from src.bot.services.excel import PLAVKA_HEADERS
+from src.bot.services.search_index import SearchIndex
+from src.bot.services.shared_strings import encode_shared_strings
+
+CREW = [f"{surname} {name} {patronymic}" for surname, name, patronymic in (
+    ("Иванов", "Иван", "Иванович"), ("Петров", "Пётр", "Петрович"), ("Сидоров", "Сергей", "Сергеевич"),
+    ("Кузнецов", "Алексей", "Павлович"), ("Смирнов", "Олег", "Игоревич"), ("Попов", "Денис", "Юрьевич"),
+    ("Васильев", "Илья", "Андреевич"), ("Новиков", "Максим", "Олегович"), ("Фёдоров", "Антон", "Ильич"),
+    ("Морозов", "Глеб", "Романович"), ("Волков", "Егор", "Сергеевич"), ("Лебедев", "Кирилл", "Викторович"),
+)]
+CASTINGS = [f"{kind} {size}" for kind in ("Держатель ригеля", "Корпус задвижки", "Крышка люка", "Втулка") for size in range(5)]
+COMMENTS = ("Плавка прошла штатно", "Без замечаний", "Перегрев ковша", "Недолив в секторе B")
+
+
+def build_reports(reports: int, plavok: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    texts = []
+    for report in range(reports):
+        lines = [
+            "ОТЧЁТ О СМЕНЕ",
+            f"Дата: {report % 28 + 1:02d}.11.2024",
+            "Смена: Дневная",
+            f"Старший_смены: {rng.choice(CREW)}",
+            f"Всего плавок: {plavok}",
+        ]
+        for index in range(1, plavok + 1):
+            lines.extend([f"Плавка № {index}", f"Номер: {index}", f"Учетный номер: {report}-{index}/24"])
+            lines.append(f"Наименование отливки: {rng.choice(CASTINGS)}")
+            lines.extend(f"Участник {number}: {name}" for number, name in enumerate(rng.sample(CREW, 4), start=1))
+            lines.append(f"Тип эксперимента: {rng.choice(('Серийная', 'Опытная'))}")
+            lines.extend(f"Сектор {sector}: {rng.choice(('Да', 'Нет'))}" for sector in "ABCD")
+            lines.append(f"Температура A: {1500 + index % 100}.5")
+            lines.append(f"Комментарий: {rng.choice(COMMENTS)}")
+        texts.append("\n".join(lines))
+    return texts
+
+
+def _records_bytes(records) -> int:
+    """Size of the records and their field values, each distinct object counted once."""
+    seen = set()
+    total = 0
+    for record in records:
+        for value in (record, *vars(record).values()):
+            if id(value) not in seen:
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+    return total
+
+
+def _retained_bytes(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def test_parsed_records_memory(reports: int = 1000, plavok: int = 100):
+    print(f"Test 1: Memory held by {reports * plavok} parsed plavki")
+    texts = build_reports(reports, plavok)
+
+    def parse_all():
+        return [record for text in texts for record in parser.parse_shift_report(text).plavki]
+
+    interned_records = parse_all()
+    interned = _records_bytes(interned_records)
+    del interned_records
+    with mock.patch.object(parser, "_intern", lambda value: value):
+        plain_records = parse_all()
+        plain = _records_bytes(plain_records)
+        del plain_records
+
+    saving = 1 - interned / plain
+    print(f"  without interning {plain / 2**20:.1f} MiB, with interning {interned / 2**20:.1f} MiB ({saving:.0%} less)")
+    if saving < 0.25:
+        print("✗ Interning did not reduce memory enough")
+        return False
+    print("✓ Repeated names are stored once")
+    return True
+
+
+def test_store_dictionary(reports: int = 1000, plavok: int = 100):
+    print(f"\nTest 2: Repeated strings in a {reports * plavok}-row workbook")
+    texts = build_reports(reports, plavok)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plain_path = Path(tmp_dir) / "plain.xlsx"
+        path = Path(tmp_dir) / "plavka.xlsx"
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet("Records")
+        worksheet.append(list(PLAVKA_HEADERS))
+        expected = []
+        for text in texts:
+            for row_id, record in enumerate(parser.parse_shift_report(text).plavki, start=1):
+                row = record.to_excel_row(row_id)
+                if len(expected) < 5:
+                    expected.append(row)
+                worksheet.append(row)
+        workbook.save(plain_path)
+
+        string_cells, unique_strings = encode_shared_strings(plain_path, path)
+        with zipfile.ZipFile(path) as archive:
+            shared = archive.read("xl/sharedStrings.xml").decode("utf-8")
+            sheet_size = archive.getinfo("xl/worksheets/sheet1.xml").file_size
+        with zipfile.ZipFile(plain_path) as archive:
+            plain_sheet_size = archive.getinfo("xl/worksheets/sheet1.xml").file_size
+
+        reread = load_workbook(path, read_only=True)
+        rows = [list(row) for row in reread.active.iter_rows(min_row=2, max_row=6, values_only=True)]
+        reread.close()
+
+    repeated = [name for name in CREW + CASTINGS if shared.count(f">{name}<") != 1]
+    print(f"  {string_cells} string cells -> {unique_strings} shared strings")
+    print(f"  sheet XML {plain_sheet_size / 2**20:.1f} MiB -> {sheet_size / 2**20:.1f} MiB uncompressed")
+    if repeated:
+        print(f"✗ Names stored more than once: {repeated[:3]}")
+        return False
+    if [row[: len(expected[0])] for row in rows] != expected:
+        print("✗ Encoded workbook reads back different values")
+        return False
+    if sheet_size >= plain_sheet_size:
+        print("✗ Dictionary encoding did not shrink the sheet")
+        return False
+    print("✓ Each crew and casting name is stored once in sharedStrings.xml")
+    return True
+
+
+def test_search_log_memory(documents: int = 100000):
+    print(f"\nTest 3: Memory of a search index reloaded with {documents} entries")
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = SearchIndex(Path(tmp_dir) / "search.jsonl")
+        batch = []
+        for row in range(1, documents + 1):
+            record = [None] * len(PLAVKA_HEADERS)
+            record[1], record[3] = f"{row}-1/24", str(row)
+            record[PLAVKA_HEADERS.index("Комментарий")] = rng.choice(COMMENTS)
+            batch.append(record)
+            if len(batch) == 5000:
+                index.add_rows(batch, "plavka")
+                batch = []
+
+        def reload():
+            reloaded = SearchIndex(index.path)
+            reloaded.load()
+            return reloaded
+
+        interned = _retained_bytes(reload)
+        with mock.patch("src.bot.services.search_index.sys.intern", lambda value: value):
+            plain = _retained_bytes(reload)
+
+    saving = 1 - interned / plain
+    print(f"  without interning {plain / 2**20:.1f} MiB, with interning {interned / 2**20:.1f} MiB ({saving:.0%} less)")
+    if saving < 0.1:
+        print("✗ Interning did not reduce memory enough")
+        return False
+    print("✓ Repeated comments are shared")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("INTERNING TEST")
+    print("=" * 60)
+
+    tests = [
+        test_parsed_records_memory,
+        test_store_dictionary,
+        test_search_log_memory,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Benchmark workbook startup with and without the persisted manifest."""
+
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from openpyxl import Workbook, load_workbook
+
+from src.bot.services.excel import PLAVKA_HEADERS, _prepare_workbook, append_plavka_rows
+from src.bot.services.manifest import current_manifest
+
+
+def build_row(index: int) -> list:
+    row = [None] * len(PLAVKA_HEADERS)
+    row[0] = 202411000 + index
+    row[1] = f"6-{index}/24"
+    row[2] = datetime(2024, 11, 6)
+    row[3] = str(index)
+    row[5] = "Иванов Иван Иванович"
+    row[10] = "Держатель ригеля"
+    row[19] = 1520.5
+    row[-1] = index
+    return row
+
+
+def create_workbook(path: Path, rows: int) -> None:
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Records")
+    worksheet.append(list(PLAVKA_HEADERS))
+    for index in range(1, rows + 1):
+        worksheet.append(build_row(index))
+    workbook.save(path)
+
+
+def test_startup_time(rows: int = 10000):
+    print(f"\nTest: Startup check of a workbook with {rows} rows")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "plavka.xlsx"
+        create_workbook(path, rows)
+
+        start_time = time.perf_counter()
+        _prepare_workbook(path)
+        full_check = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        _prepare_workbook(path)
+        fast_path = time.perf_counter() - start_time
+
+        manifest = current_manifest(path)
+        print(f"  full check: {full_check * 1000:.1f} ms, with manifest: {fast_path * 1000:.3f} ms")
+
+    if manifest is None or manifest.row_count != rows or manifest.last_id != 202411000 + rows:
+        print(f"✗ Unexpected manifest: {manifest}")
+        return False
+    if fast_path * 10 > full_check:
+        print("✗ Startup with a current manifest is not substantially faster")
+        return False
+
+    print(f"✓ Startup is {full_check / fast_path:.0f}x faster with a current manifest")
+    return True
+
+
+def test_manifest_follows_writes():
+    print("\nTest: Manifest stays current across appends and detects manual edits")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "plavka.xlsx"
+        append_plavka_rows([build_row(1), build_row(2)], xlsx_path=path)
+        append_plavka_rows([build_row(3)], xlsx_path=path)
+        manifest = current_manifest(path)
+        if manifest is None or manifest.row_count != 3 or manifest.last_id != 202411003:
+            print(f"✗ Manifest not advanced by appends: {manifest}")
+            return False
+
+        workbook = load_workbook(path)
+        workbook.active.cell(row=2, column=2, value="исправлено вручную")
+        workbook.save(path)
+        if current_manifest(path) is not None:
+            print("✗ Manual edit was not detected")
+            return False
+
+    print("✓ Appends advance the manifest, a manual edit invalidates it")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("STARTUP MANIFEST BENCHMARK")
+    print("=" * 60)
+
+    tests = [
+        test_startup_time,
+        test_manifest_follows_writes,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Test batch normalization of parsed plavka columns."""
+
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.services.normalize import normalize_columns, parse_float_column
+from src.bot.services.ingest import iter_report_rows
+from src.bot.services.parser import _create_plavka_record, parse_shift_report
+
+HEADER = {
+    "Дата": "06.11.2024",
+    "Смена": "Дневная",
+    "Старший_смены": "Иванов Иван Иванович",
+}
+
+
+def build_columns(size: int) -> dict:
+    return {
+        "Номер": [str(index % 999 + 1) for index in range(size)],
+        "Наименование отливки": ["Держатель ригеля" if index % 2 else "Адаптер" for index in range(size)],
+        "Участник 1": ["Петров Петр Петрович"] * size,
+        "Температура A": [f"{1500 + index % 100}.5" for index in range(size)],
+        "Температура B": ["" if index % 3 else "1540" for index in range(size)],
+        "Температура C": ["брак" if index == 5 else "2500" if index == 6 else None for index in range(size)],
+        "Комментарий": [f"Плавка {index}" for index in range(size)],
+    }
+
+
+def test_matches_record_path():
+    print("Test 1: Batch rows match the per-record path")
+    report_text = (Path(__file__).parent / "example_shift_report.txt").read_text(encoding="utf-8")
+    report = parse_shift_report(report_text)
+
+    fields = ["Номер", "Учетный номер", "Наименование отливки", "Участник 1", "Участник 2",
+              "Температура A", "Температура B", "Комментарий"]
+    columns = {field: [] for field in fields}
+    for text_block in report_text.split("Плавка №")[1:]:
+        data = dict(
+            (key.strip(), value.strip())
+            for key, value in (line.split(":", 1) for line in text_block.splitlines() if ":" in line)
+        )
+        for field in fields:
+            columns[field].append(data.get(field))
+
+    batch = normalize_columns(report.header, columns)
+    expected = [plavka.to_excel_row(index) for index, plavka in enumerate(report.plavki, start=1)]
+    actual = list(batch.rows())
+    if actual != expected:
+        print(f"✗ Batch rows differ:\n  {actual[0]}\n  {expected[0]}")
+        return False
+    print(f"✓ {batch.size} rows identical to parse_shift_report output")
+    return True
+
+
+def test_masks():
+    print("\nTest 2: Validity and range masks")
+    batch = normalize_columns(HEADER, build_columns(10))
+    column_c = "Плавка_температура_заливки_C"
+    if batch.valid[column_c][5] or batch.columns[column_c][5] is not None:
+        print("✗ Unparseable temperature was not masked")
+        return False
+    if not batch.valid[column_c][6] or not batch.out_of_range[column_c][6]:
+        print("✗ Out-of-range temperature was not flagged")
+        return False
+    if any(batch.out_of_range["Плавка_температура_заливки_A"]):
+        print("✗ Valid temperatures were flagged")
+        return False
+    values, mask = parse_float_column(["1520", "nan", "", None, "1,5"])
+    if mask != [True, True, False, False, False] or not math.isnan(values[1]):
+        print(f"✗ Unexpected float column: {values}, {mask}")
+        return False
+    print("✓ Masks are correct")
+    return True
+
+
+def test_batch_speed(size: int = 20000):
+    print(f"\nTest 3: Normalize {size} plavki")
+    columns = build_columns(size)
+
+    start_time = time.perf_counter()
+    batch = normalize_columns(HEADER, columns)
+    rows = list(batch.rows())
+    batch_elapsed = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for index in range(size):
+        data = {field: values[index] for field, values in columns.items() if values[index] is not None}
+        _create_plavka_record(data, HEADER).to_excel_row(index + 1)
+    record_elapsed = time.perf_counter() - start_time
+
+    print(f"  batch: {batch_elapsed:.3f}s, per record: {record_elapsed:.3f}s")
+    if len(rows) != size:
+        print(f"✗ Expected {size} rows, got {len(rows)}")
+        return False
+    print(f"✓ Batch normalization is {record_elapsed / batch_elapsed:.1f}x faster")
+    return True
+
+
+def test_document_import_path():
+    print("\nTest 4: Document import normalizes each report as a batch")
+    report_text = (Path(__file__).parent / "example_shift_report.txt").read_text(encoding="utf-8")
+    second = report_text.replace("06.11.2024", "07.11.2024").replace("Плавка № 2\nНомер: 11-2", "Плавка № 2")
+    expected = [
+        [plavka.to_excel_row(index) for index, plavka in enumerate(parse_shift_report(text).plavki, start=1)]
+        for text in (report_text, second)
+    ]
+    actual = list(iter_report_rows((report_text + "\n" + second).splitlines()))
+    if actual != expected:
+        print(f"✗ Import rows differ from parse_shift_report:\n  {actual}\n  {expected}")
+        return False
+    casting = "".join(["Держатель ", "ригеля"])
+    if not all(row[10] is not casting and row[10] is sys.intern(casting) for row in actual[0][:1]):
+        print("✗ Castings of imported rows are not interned")
+        return False
+    print(f"✓ {sum(map(len, actual))} rows of {len(actual)} reports identical to the per-record parser")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("BATCH NORMALIZATION TEST SUITE")
+    print("=" * 60)
+
+    tests = [
+        test_matches_record_path,
+        test_masks,
+        test_batch_speed,
+        test_document_import_path,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Test pacing, priority lanes and Retry-After handling of the outbound scheduler."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from src.bot.services.outbound import OutboundScheduler, bulk_priority
+
+
+def _fake_api(sent, flood_chats=()):
+    flooded = set()
+
+    async def make_request(bot, method):
+        if method.chat_id in flood_chats and method.chat_id not in flooded:
+            flooded.add(method.chat_id)
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1)
+        sent.append((time.perf_counter(), method.chat_id, method.text))
+        return True
+
+    return make_request
+
+
+async def _acks_during_bulk(scheduler: OutboundScheduler, bulk_messages: int, acks: int):
+    sent = []
+    make_request = _fake_api(sent)
+
+    async def send(chat_id, text, bulk):
+        if bulk:
+            with bulk_priority():
+                await scheduler(make_request, None, SendMessage(chat_id=chat_id, text=text))
+        else:
+            await scheduler(make_request, None, SendMessage(chat_id=chat_id, text=text))
+        return time.perf_counter()
+
+    bulk = [asyncio.create_task(send(1000 + i % 20, f"bulk {i}", True)) for i in range(bulk_messages)]
+    await asyncio.sleep(0.1)
+    started = time.perf_counter()
+    ack_done = await asyncio.gather(*(send(i, f"ack {i}", False) for i in range(acks)))
+    await asyncio.gather(*bulk)
+    await scheduler.stop()
+    return sent, max(ack_done) - started
+
+
+def test_acks_overtake_bulk(bulk_messages: int = 100, acks: int = 5):
+    print(f"Test 1: {acks} replies sent while {bulk_messages} notifications are queued")
+    scheduler = OutboundScheduler(global_rate=50, chat_rate=5, chat_burst=1)
+    sent, ack_latency = asyncio.run(_acks_during_bulk(scheduler, bulk_messages, acks))
+    stats = scheduler.stats()
+
+    print(f"  replies delivered within {ack_latency * 1000:.0f} ms")
+    print(f"  ack delay p95 {stats['ack']['delay_p95'] * 1000:.0f} ms, "
+          f"bulk delay p95 {stats['bulk']['delay_p95'] * 1000:.0f} ms")
+
+    if len(sent) != bulk_messages + acks:
+        print("✗ Some messages were not sent")
+        return False
+    if ack_latency > 0.5 or stats["ack"]["delay_p95"] >= stats["bulk"]["delay_p95"]:
+        print("✗ Replies waited behind bulk notifications")
+        return False
+
+    # The global bucket starts full, so only messages beyond its burst are paced.
+    elapsed = sent[-1][0] - sent[0][0]
+    minimum = (len(sent) - 50) / 50
+    print(f"  {len(sent)} messages in {elapsed:.2f}s (at least {minimum:.2f}s at 50 msg/s)")
+    if elapsed < minimum * 0.9:
+        print("✗ Global rate limit was exceeded")
+        return False
+
+    print("✓ Replies went ahead of the bulk lane")
+    return True
+
+
+async def _send_to_one_chat(scheduler: OutboundScheduler, count: int, flood_chats=()):
+    sent = []
+    make_request = _fake_api(sent, flood_chats)
+    await asyncio.gather(
+        *(scheduler(make_request, None, SendMessage(chat_id=1, text=f"m{i}")) for i in range(count))
+    )
+    await scheduler.stop()
+    return sent
+
+
+def test_per_chat_pacing(count: int = 6):
+    print(f"\nTest 2: {count} messages to one chat at 5 msg/s")
+    start_time = time.perf_counter()
+    sent = asyncio.run(_send_to_one_chat(OutboundScheduler(global_rate=100, chat_rate=5, chat_burst=1), count))
+    elapsed = time.perf_counter() - start_time
+
+    if [text for _t, _chat, text in sent] != [f"m{i}" for i in range(count)]:
+        print("✗ Messages to one chat were reordered")
+        return False
+    if elapsed < (count - 1) / 5 * 0.9:
+        print(f"✗ Chat was not paced: {elapsed:.2f}s")
+        return False
+    print(f"✓ Sent in order in {elapsed:.2f}s")
+    return True
+
+
+def test_retry_after():
+    print("\nTest 3: Flood control pauses the chat and retries")
+    scheduler = OutboundScheduler(global_rate=100, chat_rate=10, chat_burst=3)
+    start_time = time.perf_counter()
+    sent = asyncio.run(_send_to_one_chat(scheduler, 3, flood_chats={1}))
+    elapsed = time.perf_counter() - start_time
+
+    if len(sent) != 3 or scheduler.retry_after_count != 1:
+        print(f"✗ Expected 3 deliveries after one retry, got {len(sent)} and {scheduler.retry_after_count} retries")
+        return False
+    if elapsed < 1:
+        print("✗ Retry-After was not honoured")
+        return False
+    print(f"✓ Delivered after the pause in {elapsed:.2f}s")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("OUTBOUND SCHEDULER TEST")
+    print("=" * 60)
+
+    tests = [
+        test_acks_overtake_bulk,
+        test_per_chat_pacing,
+        test_retry_after,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -6,7 +6,12 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.bot.services.parser import parse_shift_report, InvalidReportFormatError
+from src.bot.services.parser import (
+    InvalidReportFormatError,
+    ShiftReportParser,
+    iter_plavka_records,
+    parse_shift_report,
+)
 
 
 def test_valid_report():
@@ -116,6 +121,56 @@ def test_empty_report():
         return False
 
 
+def test_streaming_byte_chunks():
+    print("\nTest 5: Streaming parser over byte chunks")
+    report_bytes = (Path(__file__).parent / "example_shift_report.txt").read_bytes()
+    chunks = [report_bytes[i:i + 7] for i in range(0, len(report_bytes), 7)]
+
+    parser = ShiftReportParser()
+    seen_before_end = []
+    records = []
+    for record in iter_plavka_records(iter(chunks), parser):
+        seen_before_end.append(parser.plavok_found)
+        records.append(record)
+
+    expected = parse_shift_report(report_bytes.decode("utf-8")).plavki
+    if records != expected:
+        print(f"✗ Streamed records differ from parse_shift_report")
+        return False
+    if seen_before_end[0] != 1:
+        print(f"✗ First record was not yielded as soon as its block closed")
+        return False
+    print(f"✓ Streamed {len(records)} plavok, header: {parser.header.get('Дата')}")
+    return True
+
+
+def test_streaming_validates_at_end():
+    print("\nTest 6: Streaming parser validates the count at the end")
+    lines = [
+        "Дата: 06.11.2024",
+        "Смена: Ночная",
+        "Старший_смены: Иванов Иван Иванович",
+        "Всего плавок: 3",
+        "Плавка № 1",
+        "Номер: 11-1",
+        "Плавка № 2",
+        "Номер: 11-2",
+    ]
+
+    records = []
+    try:
+        for record in iter_plavka_records(lines):
+            records.append(record)
+        print(f"✗ Should have failed validation")
+        return False
+    except InvalidReportFormatError as e:
+        if len(records) != 2:
+            print(f"✗ Expected 2 records before the error, got {len(records)}")
+            return False
+        print(f"✓ Yielded {len(records)} records, then: {e}")
+        return True
+
+
 def main():
     print("=" * 60)
     print("SHIFT REPORT PARSER TEST SUITE")
@@ -126,6 +181,8 @@ def main():
         test_mismatch_count,
         test_missing_header,
         test_empty_report,
+        test_streaming_byte_chunks,
+        test_streaming_validates_at_end,
     ]
     
     results = []
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Test the performance counters behind the admin /perf command."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.handlers.perf import format_perf_report
+from src.bot.keyboards.main_menu import MENU_PERF, build_main_menu
+from src.bot.services.excel import append_plavka_rows
+from src.bot.services.perf import LatencySamples, PerfCounters, get_perf_counters
+from src.core.config import get_settings
+from test_manifest import build_row
+
+
+class _User:
+    def __init__(self, user_id: int) -> None:
+        self.id = user_id
+
+
+def test_samples_from_threads(threads: int = 4, records: int = 50000):
+    print(f"Test 1: {threads} threads record {records} samples each while a reader takes percentiles")
+    samples = LatencySamples()
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            try:
+                samples.percentile(0.99)
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+    def write(offset: float):
+        for index in range(records):
+            samples.record(offset + index % 100 / 1000)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    writers = [threading.Thread(target=write, args=(thread,)) for thread in range(threads)]
+    start_time = time.perf_counter()
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    elapsed = time.perf_counter() - start_time
+    stop.set()
+    reader.join()
+
+    single = LatencySamples()
+    for value in range(1, 101):
+        single.record(value / 100)
+    per_record = elapsed / (threads * records) * 1e9
+    print(f"  {per_record:.0f} ns per record with a concurrent reader")
+    if errors or len(samples) != 1000:
+        print(f"✗ Reader failed or window overflowed: {errors[:1]}, {len(samples)} samples")
+        return False
+    if single.percentile(0.5) != 0.51 or single.percentile(0.99) != 1.0 or single.maximum() != 1.0:
+        print("✗ Percentiles are wrong")
+        return False
+    print("✓ Lock-free recording, correct percentiles")
+    return True
+
+
+def test_loop_lag_monitor():
+    print("\nTest 2: Event-loop lag shows a blocking call")
+    counters = PerfCounters()
+
+    async def scenario():
+        counters.start_loop_monitor(interval=0.05)
+        await asyncio.sleep(0.2)
+        time.sleep(0.3)  # blocks the loop
+        await asyncio.sleep(0.2)
+        await counters.stop_loop_monitor()
+
+    asyncio.run(scenario())
+    worst = counters.loop_lag.maximum()
+    print(f"  {len(counters.loop_lag)} samples, worst lag {worst * 1000:.0f} ms")
+    if worst < 0.2:
+        print("✗ The blocked loop was not noticed")
+        return False
+    print("✓ Blocking call recorded as loop lag")
+    return True
+
+
+def test_report_for_admins():
+    print("\nTest 3: /perf report and the admin menu button")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        os.environ.update(XLSX_PATH=str(xlsx_path), JOURNAL_PATH=str(Path(tmp_dir) / "journal.xlsx"), ADMIN_IDS="7, 8")
+        get_settings.cache_clear()
+        try:
+            append_plavka_rows([build_row(index) for index in range(1, 51)])
+            append_plavka_rows([build_row(51)])
+            get_perf_counters().import_latency.record(0.25)
+            report = format_perf_report()
+            admin_buttons = [button.callback_data for row in build_main_menu(_User(7)).inline_keyboard for button in row]
+            user_buttons = [button.callback_data for row in build_main_menu(_User(9)).inline_keyboard for button in row]
+        finally:
+            for name in ("XLSX_PATH", "JOURNAL_PATH", "ADMIN_IDS"):
+                os.environ.pop(name, None)
+            get_settings.cache_clear()
+
+    print("  " + report.replace("\n", "\n  "))
+    if "plavka.xlsx" not in report or "51 строк" not in report or "p99 0.25 с" not in report:
+        print("✗ Report lacks the store or the import latency")
+        return False
+    if "Ожидание блокировки Excel: p50" not in report:
+        print("✗ Lock waits were not recorded")
+        return False
+    if MENU_PERF not in admin_buttons or MENU_PERF in user_buttons:
+        print("✗ Only administrators should see the button")
+        return False
+    print("✓ Report built, button shown to administrators only")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("PERF COUNTERS TEST")
+    print("=" * 60)
+
+    tests = [
+        test_samples_from_threads,
+        test_loop_lag_monitor,
+        test_report_for_admins,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
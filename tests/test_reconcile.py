@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Test incremental reconciliation of workbooks edited outside the bot."""
+
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from openpyxl import load_workbook
+
+from src.bot.services.excel import (
+    _prepare_workbook,
+    add_reconcile_listener,
+    append_plavka_rows,
+    reconcile_workbook,
+    remove_reconcile_listener,
+)
+from src.bot.services.manifest import current_manifest, discard_manifest, load_manifest
+from src.bot.services.search_index import SearchIndex
+from test_manifest import build_row, create_workbook
+from test_search_index import COMMENT_COLUMN, commented_row
+
+
+def edit_cell(path: Path, row_number: int, column: int, value) -> None:
+    """Change one cell the way an engineer would: open, edit, save."""
+    workbook = load_workbook(path)
+    workbook.active.cell(row=row_number + 1, column=column + 1, value=value)
+    workbook.save(path)
+
+
+def test_checksums_match_the_file():
+    print("Test 1: Checksums kept on commit match the ones read back from the file")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        rows = [build_row(index) for index in range(1, 2501)]
+        rows[0][5] = date(2024, 11, 6)
+        rows[1][19] = 1520.0
+        append_plavka_rows(rows[:1200], xlsx_path=xlsx_path)
+        append_plavka_rows(rows[1200:], xlsx_path=xlsx_path)
+        kept = load_manifest(xlsx_path).block_checksums
+
+        discard_manifest(xlsx_path)
+        _prepare_workbook(xlsx_path)
+        recomputed = load_manifest(xlsx_path).block_checksums
+
+    if len(kept) != 3 or kept != recomputed:
+        print(f"✗ Checksums differ: {kept} vs {recomputed}")
+        return False
+    print("✓ 3 blocks, identical checksums")
+    return True
+
+
+def test_reconcile_cost(rows: int = 20000):
+    print(f"\nTest 2: One edited cell in {rows} rows")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        create_workbook(xlsx_path, rows)
+        _prepare_workbook(xlsx_path)
+
+        edit_cell(xlsx_path, 5500, 10, "Держатель ригеля (исправлено)")
+        reported = []
+        add_reconcile_listener(reported.append)
+        try:
+            start_time = time.perf_counter()
+            changes = reconcile_workbook(xlsx_path)
+            reconcile_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            unchanged = reconcile_workbook(xlsx_path)
+            unchanged_time = time.perf_counter() - start_time
+        finally:
+            remove_reconcile_listener(reported.append)
+        manifest = current_manifest(xlsx_path)
+
+    print(f"  reconciled in {reconcile_time:.2f}s, unchanged check in {unchanged_time * 1000:.1f} ms")
+    if list(changes.blocks) != [5] or reported != [changes]:
+        print(f"✗ Expected only block 5 to change, got {list(changes.blocks)}")
+        return False
+    if changes.blocks[5][499][10] != "Держатель ригеля (исправлено)":
+        print("✗ Changed block does not hold the edited row")
+        return False
+    if unchanged.changed or manifest is None or manifest.row_count != rows:
+        print("✗ Manifest was not brought up to date")
+        return False
+    print("✓ Only the edited block was kept and reported")
+    return True
+
+
+def test_search_index_follows_edits(rows: int = 3000):
+    print("\nTest 3: Search index re-indexes edited rows, live and after a restart")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        stores = {"plavka": xlsx_path, "journal": Path(tmp_dir) / "journal.xlsx"}
+        log_path = Path(tmp_dir) / "search.jsonl"
+        append_plavka_rows(
+            [commented_row(index, "брак" if index % 100 == 0 else None) for index in range(1, rows + 1)],
+            xlsx_path=xlsx_path,
+        )
+
+        index = SearchIndex(log_path, stores)
+        index.start()
+        edit_cell(xlsx_path, 1500, COMMENT_COLUMN, "раковина")
+        reconcile_workbook(xlsx_path)
+        live, _ = index.search("раковина")
+        _, live_total = index.search("брак")
+        index.stop()
+
+        edit_cell(xlsx_path, 2200, COMMENT_COLUMN, "пригар")
+        edit_cell(xlsx_path, 2999, COMMENT_COLUMN, "пригар")
+        reconcile_workbook(xlsx_path)
+        append_plavka_rows([commented_row(rows + 1, "брак")], xlsx_path=xlsx_path)
+
+        restarted = SearchIndex(log_path, stores)
+        restarted.start()
+        after_restart, _ = restarted.search("пригар")
+        _, restart_total = restarted.search("брак")
+        restarted.stop()
+
+    if [hit.row for hit in live] != [1500] or live_total != rows // 100 - 1:
+        print(f"✗ Live edit not reflected: {live}, {live_total} matches for the old word")
+        return False
+    # Rows 1500 and 2200 lost «брак», the appended row brought one back.
+    if [hit.row for hit in after_restart] != [2999, 2200] or restart_total != rows // 100 - 1:
+        print(f"✗ Edits made while stopped not reflected: {after_restart}, {restart_total}")
+        return False
+    print("✓ Old text dropped, new text found")
+    return True
+
+
+def test_commit_after_edit():
+    print("\nTest 4: A commit reconciles an edit made since the last one")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        append_plavka_rows([build_row(index) for index in range(1, 11)], xlsx_path=xlsx_path)
+        edit_cell(xlsx_path, 3, 3, "3-исправлено")
+
+        reported = []
+        add_reconcile_listener(reported.append)
+        try:
+            append_plavka_rows([build_row(11)], xlsx_path=xlsx_path)
+        finally:
+            remove_reconcile_listener(reported.append)
+        manifest = current_manifest(xlsx_path)
+
+    if len(reported) != 1 or list(reported[0].blocks) != [0]:
+        print("✗ Edit was not reconciled before the commit")
+        return False
+    if manifest is None or manifest.row_count != 11:
+        print("✗ Manifest was dropped by the commit")
+        return False
+    print("✓ Manifest stays current across the edit")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("RECONCILE TEST")
+    print("=" * 60)
+
+    tests = [
+        test_checksums_match_the_file,
+        test_reconcile_cost,
+        test_search_index_follows_edits,
+        test_commit_after_edit,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
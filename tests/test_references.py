@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Test the reference dictionary of castings and crew."""
+
+import difflib
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.services import reference_store
+from src.bot.services.excel import (
+    _prepare_workbook,
+    add_commit_listener,
+    append_plavka_rows,
+    iter_store_rows,
+    remove_commit_listener,
+)
+from src.bot.services.normalize import normalize_columns
+from src.bot.services.parser import parse_shift_report
+from src.bot.services.references import (
+    CASTING,
+    CREW,
+    RESOLVED_CACHE_SIZE,
+    ReferenceDictionary,
+    get_reference_dictionary,
+    install_reference_dictionary,
+)
+from src.bot.services.workers import _append_to_store
+from test_manifest import build_row, create_workbook
+from test_shards import _reset_settings, _use_settings
+
+CASTINGS = ("Держатель ригеля", "Адаптер", "Вороток", "Корпус клапана")
+CREW_NAMES = (
+    "Иванов Иван Иванович",
+    "Иванов Илья Иванович",
+    "Петров Петр Петрович",
+    "Сидоров Сергей Сергеевич",
+    "Сидоров Семён Сергеевич",
+)
+
+REPORT = (Path(__file__).parent / "example_shift_report.txt").read_text(encoding="utf-8")
+
+
+def history() -> ReferenceDictionary:
+    dictionary = ReferenceDictionary()
+    for name in CASTINGS:
+        dictionary.add(CASTING, name, 10)
+    for name in CREW_NAMES:
+        dictionary.add(CREW, name, 10)
+    dictionary.add(CASTING, "держатель  ригеля", 1)
+    dictionary.add(CASTING, "Держатль ригеля", 1)  # a typo seen once
+    return dictionary
+
+
+def test_resolve_spellings():
+    print("Test 1: Case, ё and spaces resolve to the known spelling, anything else is kept")
+    dictionary = history()
+    for kind, name in ((CASTING, "Корпус 12"), (CASTING, "Крышка КР-210"), (CREW, "Кузнецов")):
+        dictionary.add(kind, name, 3)
+    cases = [
+        (CASTING, "ДЕРЖАТЕЛЬ  РИГЕЛЯ", "Держатель ригеля"),
+        (CREW, "Сидоров Семен Сергеевич", "Сидоров Семён Сергеевич"),
+        (CREW, "Петров Петр Петрович ", "Петров Петр Петрович"),
+        (CASTING, "Держатель ригнля", "Держатель ригеля"),  # a typo, only suggested
+        (CREW, "Иванов Иван Иваныч", "Иванов Иван Иванович"),
+        (CASTING, "Корпус 13", None),
+        (CASTING, "Корпус 112", None),
+        (CASTING, "Крышка КР-211", None),
+        (CREW, "Кузнецова", "Кузнецов"),
+        (CREW, "Смирнов Олег Петрович", None),  # someone new
+        (CASTING, None, None),
+    ]
+    failed = []
+    for kind, value, expected in cases:
+        resolved = dictionary.resolve(kind, value)
+        match = dictionary.closest(kind, value) if value else None
+        suggested = match[0] if match and match[1] >= 0.75 else None
+        known = dictionary.lookup(kind, value) if value else None
+        if resolved != (known or value) or (known is None and suggested != expected):
+            failed.append((value, resolved, suggested))
+    if failed:
+        print(f"✗ Wrong spellings or suggestions: {failed}")
+        return False
+    if dictionary.lookup(CASTING, "держатель ригеля") != "Держатель ригеля" or dictionary.closest(CASTING, "Держатль ригеля")[0] != "Держатель ригеля":
+        print("✗ The most frequent spelling should win, rare ones never be suggested")
+        return False
+
+    counts = ReferenceDictionary()
+    counts.add(CASTING, "Держатель ригеля", 2)
+    counts.add(CASTING, "Держатель Ригеля", 1)
+    before = counts.resolve(CASTING, "держатель ригеля")
+    counts.add(CASTING, "Держатель Ригеля", 5)  # a known spelling overtakes the other
+    after = counts.resolve(CASTING, "держатель ригеля")
+    for index in range(RESOLVED_CACHE_SIZE + 10):
+        counts.resolve(CREW, f"Рабочий {index}")
+    if (before, after) != ("Держатель ригеля", "Держатель Ригеля") or len(counts._resolved) != RESOLVED_CACHE_SIZE:
+        print(f"✗ Stale or unbounded resolutions: {before!r} -> {after!r}, {len(counts._resolved)} cached")
+        return False
+    print("✓ Variants resolved, typos only suggested, different digits never")
+    return True
+
+
+def test_parser_uses_dictionary():
+    print("\nTest 2: Parsing a report resolves castings and crew")
+    text = (
+        REPORT.replace("Держатель ригеля", "держатель ригеля")
+        .replace("Старший_смены: Иванов Иван Иванович", "Старший_смены: ИВАНОВ  Иван Иванович")
+        .replace("Участник 2: Сидоров Сергей Сергеевич", "Участник 2: сидоров сергей сергеевич", 1)
+    )
+    previous = get_reference_dictionary()
+    install_reference_dictionary(history())
+    try:
+        report = parse_shift_report(text)
+        batch = normalize_columns(
+            report.header,
+            {"Наименование отливки": ["держатель ригеля"], "Участник 2": ["Сидоров  Сергей Сергеевич"]},
+        )
+    finally:
+        install_reference_dictionary(previous)
+    plavka = report.plavki[0]
+    values = (plavka.naimenovanie_otlivki, plavka.starshiy_smeny, plavka.vtoroy_uchastnik)
+    print(f"  {values}")
+    if values != ("Держатель ригеля", "Иванов Иван Иванович", "Сидоров Сергей Сергеевич"):
+        print("✗ Parsed values were not resolved")
+        return False
+    if batch.columns["Наименование_отливки"] != ["Держатель ригеля"] or batch.columns["Второй_участник_смены_плавки"] != ["Сидоров Сергей Сергеевич"]:
+        print("✗ Batch normalization resolves differently")
+        return False
+    print("✓ Record and batch paths give the known spellings")
+    return True
+
+
+def test_ngram_index_cost(names: int = 5000, queries: int = 200):
+    print(f"\nTest 3: Fuzzy lookup among {names} castings, n-gram index vs pairwise comparison")
+    syllables = [consonant + vowel for consonant in "бвгдзклмнпрстхш" for vowel in "аеиоу"]
+    generator = random.Random(47)
+    vocabulary = sorted({
+        " ".join("".join(generator.choices(syllables, k=4)) for _ in range(2)).capitalize() for _ in range(names)
+    })
+    dictionary = ReferenceDictionary()
+    for name in vocabulary:
+        dictionary.add(CASTING, name, 5)
+    expected = vocabulary[:: len(vocabulary) // queries]
+    typos = [name[:2] + name[3] + name[2] + name[4:] for name in expected]
+
+    start_time = time.perf_counter()
+    indexed = [dictionary.closest(CASTING, typo) for typo in typos]
+    index_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for typo in typos[:5]:
+        max(vocabulary, key=lambda name: difflib.SequenceMatcher(None, typo, name).ratio())
+    pairwise_time = (time.perf_counter() - start_time) * len(typos) / 5
+
+    start_time = time.perf_counter()
+    for _ in range(100):
+        for typo in typos:
+            dictionary.resolve(CASTING, typo)
+    start_time = time.perf_counter()
+    for _ in range(100):
+        for typo in typos:
+            dictionary.resolve(CASTING, typo)
+    cached = (time.perf_counter() - start_time) / (100 * len(typos)) * 1e6
+
+    print(f"  index: {index_time * 1000:.0f} ms, pairwise: {pairwise_time * 1000:.0f} ms (estimated)")
+    print(f"  repeated resolve: {cached:.2f} µs")
+    found = sum(1 for match, name in zip(indexed, expected) if match and match[0] == name)
+    wrong = sum(1 for match, name in zip(indexed, expected) if match and match[0] != name)
+    print(f"  {found} of {len(typos)} typos found their name, {wrong} a wrong one")
+    if wrong or found < len(typos) * 0.9:
+        print("✗ Typos should find their own name and never another one")
+        return False
+    if index_time * 5 > pairwise_time or cached > 5:
+        print("✗ The index should beat pairwise comparison, repeats should be a dict lookup")
+        return False
+    print("✓ Typos found through the index, repeats served from the memo")
+    return True
+
+
+def test_built_from_history_and_learned():
+    print("\nTest 4: Dictionary built from the stores, then kept up to date")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = _use_settings(tmp_dir)
+        try:
+            create_workbook(xlsx_path, 20)
+            _prepare_workbook(xlsx_path)
+            built = reference_store.load_references().to_dict()
+            saved = reference_store.reference_path().exists()
+            with mock.patch.object(reference_store, "iter_store_rows") as scan:
+                reloaded = reference_store.load_references().to_dict()
+            row = build_row(21)
+            row[6] = "Новиков Николай Николаевич"
+            append_plavka_rows([row], xlsx_path=xlsx_path)
+            add_commit_listener(reference_store.learn_committed_rows)
+            try:
+                append_plavka_rows([row], xlsx_path=xlsx_path)
+            finally:
+                remove_commit_listener(reference_store.learn_committed_rows)
+            # A parse worker forked before the name was learned kept it as typed.
+            shouted = build_row(22)
+            shouted[6] = "НОВИКОВ  николай николаевич"
+            _append_to_store([shouted], xlsx_path=xlsx_path)
+            committed = list(iter_store_rows(xlsx_path))[-1][6]
+            reference_store.save_references()
+            restored = ReferenceDictionary.load(reference_store.reference_path())
+        finally:
+            install_reference_dictionary(ReferenceDictionary())
+            _reset_settings()
+
+    print(f"  built: {built}")
+    if built != {CASTING: {"Держатель ригеля": 20}, CREW: {"Иванов Иван Иванович": 20}} or not saved:
+        print("✗ Dictionary should count the castings and crew of the store")
+        return False
+    if scan.called or reloaded != built:
+        print("✗ A saved dictionary should be read, not rebuilt")
+        return False
+    if restored.to_dict()[CREW] != {"Иванов Иван Иванович": 21, "Новиков Николай Николаевич": 1}:
+        print(f"✗ Committed rows were not learned: {restored.to_dict()}")
+        return False
+    if committed != "Новиков Николай Николаевич":
+        print(f"✗ The committer should resolve against the learned spellings: {committed!r}")
+        return False
+    print("✓ Built once, then learned from commits and applied by the committer")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("REFERENCE DICTIONARY TEST")
+    print("=" * 60)
+
+    tests = [
+        test_resolve_spellings,
+        test_parser_uses_dictionary,
+        test_ngram_index_cost,
+        test_built_from_history_and_learned,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Test the full-text index over plavka comments and journal notes."""
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.services.excel import PLAVKA_HEADERS, append_message_row, append_plavka_rows
+from src.bot.services.search_index import SearchIndex, tokenize
+from test_manifest import build_row
+
+COMMENT_COLUMN = PLAVKA_HEADERS.index("Комментарий")
+WORDS = (
+    "трещина", "трещины", "раковина", "недолив", "пригар", "ковш", "заливка", "опока", "сектор",
+    "температура", "низкая", "высокая", "повтор", "брак", "ригель", "держатель", "шлак", "усадка",
+)
+
+
+def commented_row(index: int, comment: str) -> list:
+    row = build_row(index)
+    row[COMMENT_COLUMN] = comment
+    return row
+
+
+def test_tokenize():
+    print("Test 1: Tokenization and prefix matching")
+    tokens = tokenize("Ещё ТРЕЩИНА в секторе_B, t=1520")
+    if tokens != ["еще", "трещина", "секторе", "1520"]:
+        print(f"✗ Unexpected tokens: {tokens}")
+        return False
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = SearchIndex(Path(tmp_dir) / "search.jsonl")
+        index.add_rows([commented_row(1, "Трещины по краю"), commented_row(2, "Недолив, трещина")], "plavka")
+        index.add_rows([[None, 1, "ivanov", 1, 1, "Ковш остыл, ещё раз прогреть"]], "journal")
+
+        hits, total = index.search("трещ")
+        both, _ = index.search("трещ недол")
+        notes, _ = index.search("ЕЩЁ")
+
+    if total != 2 or [hit.row for hit in hits] != [2, 1]:
+        print(f"✗ Prefix search returned {hits}")
+        return False
+    if [hit.row for hit in both] != [2]:
+        print("✗ Words of a query were not combined")
+        return False
+    if [hit.kind for hit in notes] != ["journal"]:
+        print("✗ Journal notes were not indexed")
+        return False
+
+    print("✓ Newest matches first, prefixes and «ё» handled")
+    return True
+
+
+def test_follows_workbook():
+    print("\nTest 2: Catch-up, live commits and restart over both stores")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        journal_path = Path(tmp_dir) / "journal.xlsx"
+        log_path = Path(tmp_dir) / "plavka.xlsx.search.jsonl"
+        stores = {"plavka": xlsx_path, "journal": journal_path}
+
+        def add_note(message_id, text):
+            append_message_row(
+                user_id=1, username="ivanov", chat_id=1, message_id=message_id, text=text, journal_path=journal_path
+            )
+
+        append_plavka_rows(
+            [commented_row(i, "брак" if i % 10 == 0 else None) for i in range(1, 101)], xlsx_path=xlsx_path
+        )
+        add_note(1, "Брак на второй смене")
+
+        index = SearchIndex(log_path, stores)
+        index.start()
+        append_plavka_rows([commented_row(101, "Брак по сектору A")], xlsx_path=xlsx_path)
+        add_note(2, "Обсудить брак")
+        _, live_total = index.search("брак")
+        index.stop()
+
+        append_plavka_rows([commented_row(102, "брак, повтор")], xlsx_path=xlsx_path)
+        restarted = SearchIndex(log_path, stores)
+        restarted.start()
+        hits, restart_total = restarted.search("брак")
+        restarted.stop()
+
+    print(f"  matches while running: {live_total}, after restart: {restart_total}")
+    if live_total != 13 or restart_total != 14:
+        print("✗ Index missed or duplicated rows")
+        return False
+    if hits[0].row != 102 or restarted.indexed_rows != {"plavka": 102, "journal": 2}:
+        print("✗ Row numbers do not follow the workbook")
+        return False
+
+    print("✓ Index follows commits exactly once")
+    return True
+
+
+def test_search_latency(documents: int = 200000):
+    print(f"\nTest 3: Query latency over {documents} entries")
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = SearchIndex(Path(tmp_dir) / "search.jsonl")
+        start_time = time.perf_counter()
+        batch = []
+        for row in range(1, documents + 1):
+            batch.append(commented_row(row, " ".join(rng.choices(WORDS, k=6))))
+            if len(batch) == 5000:
+                index.add_rows(batch, "plavka")
+                batch = []
+        build_time = time.perf_counter() - start_time
+        index.search("брак")
+
+        timings = []
+        for query in ("ригель", "ригел", "трещ низк", "шлак усадка ковш", "опока", "пригар высок"):
+            start_time = time.perf_counter()
+            _hits, total = index.search(query)
+            timings.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        reloaded = SearchIndex(index.path)
+        reloaded.load()
+        load_time = time.perf_counter() - start_time
+
+    median = statistics.median(timings)
+    print(f"  indexed in {build_time:.1f}s, reloaded from the log in {load_time:.1f}s")
+    print(f"  query median {median * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms")
+
+    if len(reloaded) != documents:
+        print("✗ Reloaded index lost documents")
+        return False
+    if median > 0.25:
+        print("✗ Queries are too slow")
+        return False
+
+    print("✓ Queries answered from the index")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("SEARCH INDEX TEST")
+    print("=" * 60)
+
+    tests = [
+        test_tokenize,
+        test_follows_workbook,
+        test_search_latency,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Test plavka shards: routing, the merged read view and write throughput."""
+
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.services.excel import append_plavka_rows, follow_committed_rows
+from src.bot.services import shards
+from src.bot.services.search_index import SearchIndex
+from src.bot.services.shards import export_merged, iter_merged_rows, shard_for_chat, store_paths
+from src.bot.services.workers import ParseWorkerPool, RecordCommitter
+from src.core.config import get_settings
+from test_manifest import build_row, create_workbook
+from test_search_index import commented_row
+
+
+_SETTINGS_ENV = ("XLSX_PATH", "JOURNAL_PATH", "SHARD_BY", "PLANTS")
+_saved_env = {}
+
+
+def _use_settings(tmp_dir: str, **env: str) -> Path:
+    for name in _SETTINGS_ENV:
+        _saved_env.setdefault(name, os.environ.get(name))
+    xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+    os.environ.update(XLSX_PATH=str(xlsx_path), JOURNAL_PATH=str(Path(tmp_dir) / "journal.xlsx"), **env)
+    get_settings.cache_clear()
+    return xlsx_path
+
+
+def _reset_settings() -> None:
+    """Put back the variables ``_use_settings`` replaced; other test modules set some on import."""
+    for name in _SETTINGS_ENV:
+        value = _saved_env.pop(name, None)
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+    get_settings.cache_clear()
+
+
+def dated_row(index: int, day: int) -> list:
+    row = build_row(index)
+    row[2] = datetime(2024, 11, day)
+    return row
+
+
+def test_merged_view():
+    print("Test 1: Chats are routed to plant stores and read back merged by date")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = _use_settings(tmp_dir, SHARD_BY="plant", PLANTS="ceh1=-1001,-1002;ceh2=-1003")
+        try:
+            routes = [shard_for_chat(chat_id) for chat_id in (-1001, -1003, 42)]
+            append_plavka_rows([dated_row(1, 1), dated_row(2, 5)], xlsx_path=xlsx_path)
+            append_plavka_rows([dated_row(3, 2), dated_row(4, 3)], xlsx_path=xlsx_path.with_name("plavka.ceh1.xlsx"))
+            append_plavka_rows([dated_row(5, 4), dated_row(6, 6)], xlsx_path=xlsx_path.with_name("plavka.ceh2.xlsx"))
+
+            shards = list(store_paths())
+            merged = [row[0] for row in iter_merged_rows(store_paths().values())]
+            exported = export_merged(Path(tmp_dir) / "export.xlsx")
+        finally:
+            _reset_settings()
+
+    if routes != ["ceh1", "ceh2", None] or shards != [None, "ceh1", "ceh2"]:
+        print(f"✗ Unexpected routing {routes} or stores {shards}")
+        return False
+    expected = [build_row(index)[0] for index in (1, 3, 4, 5, 2, 6)]
+    if merged != expected or exported != 6:
+        print(f"✗ Merged view is out of order: {merged}")
+        return False
+
+    print("✓ Stores merged by Плавка_дата")
+    return True
+
+
+def _last_records(chat_id: int) -> list:
+    """Plavka numbers of "Последние записи" in a chat, oldest first."""
+    from src.bot.handlers.menu import menu_last_records
+    from test_document_cache import FakeMessage, make_callback
+
+    message = FakeMessage(chat_id=chat_id)
+    asyncio.run(menu_last_records(make_callback(message)))
+    return re.findall(r"^Плавка (\S+)$", message.texts[0], re.MULTILINE)[::-1]
+
+
+def test_back_filled_reports():
+    print("\nTest 2: Back-filled and undated rows are merged in date order, each chat's last rows stay in commit order")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = _use_settings(tmp_dir, SHARD_BY="plant", PLANTS="ceh1=-1001")
+        shard_path = xlsx_path.with_name("plavka.ceh1.xlsx")
+        try:
+            # Each store gets late reports of earlier days after its own newer ones.
+            undated = dated_row(4, 1)
+            undated[2] = None  # goes with the row before it, 10 November
+            append_plavka_rows([dated_row(1, 10), undated, dated_row(2, 20), dated_row(3, 5)], xlsx_path=xlsx_path)
+            append_plavka_rows([dated_row(5, 15), dated_row(6, 2), dated_row(7, 25), dated_row(8, 1)], xlsx_path=shard_path)
+            merged = [row[0] for row in iter_merged_rows(store_paths().values())]
+            with mock.patch.object(shards, "MAX_OPEN_RUNS", 2):
+                regrouped = [row[0] for row in iter_merged_rows(store_paths().values())]
+            plant_chat, other_chat = _last_records(-1001), _last_records(42)
+        finally:
+            _reset_settings()
+
+    expected = [build_row(index)[0] for index in (8, 6, 3, 1, 4, 5, 2, 7)]
+    print(f"  merged: {merged}")
+    if merged != expected or regrouped != expected:
+        print("✗ Rows should come out in date order, undated ones after the row before them")
+        return False
+    print(f"  last records: plant chat {plant_chat}, other chat {other_chat}")
+    if plant_chat != ["5", "6", "7", "8"] or other_chat != ["1", "4", "2", "3"]:
+        print("✗ A chat should see only its own store, in the order the plavki were committed")
+        return False
+    print("✓ Stores split into sorted runs and merged")
+    return True
+
+
+def test_followers_per_shard():
+    print("\nTest 3: Followers see only their store, the search index finds new shards")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = _use_settings(tmp_dir, SHARD_BY="chat")
+        try:
+            shard_path = xlsx_path.with_name("plavka.ceh1.xlsx")
+            append_plavka_rows([commented_row(1, "брак")], xlsx_path=shard_path)
+
+            seen = []
+            unsubscribe = follow_committed_rows(0, seen.extend, xlsx_path=shard_path)
+            index = SearchIndex(Path(tmp_dir) / "search.jsonl", follow_shards=True)
+            index.start()
+
+            append_plavka_rows([commented_row(2, "брак")], xlsx_path=xlsx_path)
+            append_plavka_rows([commented_row(3, "брак")], xlsx_path=shard_path)
+            append_plavka_rows([commented_row(4, "брак")], xlsx_path=xlsx_path.with_name("plavka.ceh2.xlsx"))
+            append_plavka_rows([commented_row(5, "брак")], xlsx_path=xlsx_path.with_name("plavka.ceh2.xlsx"))
+            unsubscribe()
+            _, total = index.search("брак")
+            index.stop()
+        finally:
+            _reset_settings()
+
+    if [row[-1] for row in seen] != [1, 3]:
+        print(f"✗ Follower of one shard received {[row[-1] for row in seen]}")
+        return False
+    expected_rows = {"plavka": 1, "journal": 0, "plavka@ceh1": 2, "plavka@ceh2": 2}
+    if total != 5 or index.indexed_rows != expected_rows:
+        print(f"✗ Search index saw {total} matches, rows per store {index.indexed_rows}")
+        return False
+
+    print("✓ Every shard followed exactly once")
+    return True
+
+
+async def _commit_from_chats(committers, producers: int, commits: int) -> float:
+    async def produce(producer: int) -> None:
+        committer = committers[producer % len(committers)]
+        for index in range(commits):
+            await committer.commit([build_row(producer * commits + index)])
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(produce(producer) for producer in range(producers)))
+    elapsed = time.perf_counter() - start_time
+    for committer in committers:
+        await committer.stop()
+    return elapsed
+
+
+def test_write_scaling(existing_rows: int = 4000, producers: int = 16, commits: int = 4):
+    """Commit throughput must grow with the number of shards when there are cores to use."""
+    print(f"\nTest 4: {producers} chats x {commits} commits over {existing_rows} existing rows")
+    cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    shard_counts = sorted({1, min(4, cpu_count)})
+
+    pool = ParseWorkerPool(max(shard_counts))
+    pool.start()
+    throughput = {}
+    try:
+        for shards in shard_counts:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                paths = [Path(tmp_dir) / f"plavka.s{shard}.xlsx" for shard in range(shards)]
+                for path in paths:
+                    create_workbook(path, existing_rows // shards)
+                committers = [
+                    RecordCommitter(partial(append_plavka_rows, xlsx_path=path, executor=pool.executor))
+                    for path in paths
+                ]
+                elapsed = asyncio.run(_commit_from_chats(committers, producers, commits))
+                stored = sum(len(list(iter_merged_rows([path]))) for path in paths)
+
+            if stored != existing_rows // shards * shards + producers * commits:
+                print(f"✗ shards={shards}: lost or duplicated rows ({stored})")
+                return False
+            throughput[shards] = producers * commits / elapsed
+            print(f"  shards={shards}: {throughput[shards]:.1f} commits/s")
+    finally:
+        pool.shutdown()
+
+    widest = max(shard_counts)
+    if widest >= 2:
+        speedup = throughput[widest] / throughput[1]
+        print(f"  speedup 1 -> {widest} shards: {speedup:.2f}x")
+        if speedup < 1.3:
+            print("✗ Write throughput does not scale with the number of shards")
+            return False
+    else:
+        print("  Only one CPU available, scaling check skipped")
+
+    print("✓ Every commit stored")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("SHARDS TEST")
+    print("=" * 60)
+
+    tests = [
+        test_merged_view,
+        test_back_filled_reports,
+        test_followers_per_shard,
+        test_write_scaling,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Test that readers are not blocked by a long batch import."""
+
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.services.excel import append_plavka_rows, get_last_rows
+from test_manifest import build_row
+
+
+def _measure_reads(path: Path, stop: threading.Event, samples: list) -> None:
+    while not stop.is_set():
+        start_time = time.perf_counter()
+        rows = get_last_rows(10, xlsx_path=path)
+        samples.append((time.perf_counter() - start_time, len(rows)))
+
+
+def _import_batch(path: Path, first: int, count: int) -> None:
+    append_plavka_rows([build_row(i) for i in range(first, first + count)], xlsx_path=path)
+
+
+def test_reads_during_import(base_rows: int = 500, import_rows: int = 5000):
+    print(f"\nTest: Read latency while importing {import_rows} rows")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "plavka.xlsx"
+        append_plavka_rows([build_row(i) for i in range(1, base_rows + 1)], xlsx_path=path)
+
+        idle = []
+        for _ in range(20):
+            start_time = time.perf_counter()
+            get_last_rows(10, xlsx_path=path)
+            idle.append(time.perf_counter() - start_time)
+
+        stop = threading.Event()
+        samples: list = []
+        reader = threading.Thread(target=_measure_reads, args=(path, stop, samples))
+        writer = multiprocessing.Process(target=_import_batch, args=(path, base_rows + 1, import_rows))
+
+        start_time = time.perf_counter()
+        writer.start()
+        reader.start()
+        writer.join()
+        import_elapsed = time.perf_counter() - start_time
+        time.sleep(0.1)
+        stop.set()
+        reader.join()
+
+        final_rows = get_last_rows(1, xlsx_path=path)
+
+    during = [latency for latency, _count in samples]
+    idle_p50 = statistics.median(idle)
+    print(f"  import took {import_elapsed:.2f}s, {len(samples)} reads completed meanwhile")
+    print(f"  read p50 idle: {idle_p50 * 1000:.1f} ms, during import: {statistics.median(during) * 1000:.1f} ms, "
+          f"max: {max(during) * 1000:.1f} ms")
+
+    if len(samples) < 3:
+        print("✗ Readers were blocked during the import")
+        return False
+    if any(count != 10 for _latency, count in samples):
+        print("✗ A reader saw an incomplete snapshot")
+        return False
+    if max(during) > import_elapsed / 2:
+        print("✗ A read waited for the writer")
+        return False
+    if not final_rows or final_rows[0][0] != 202411000 + base_rows + import_rows:
+        print("✗ Import result is not visible after commit")
+        return False
+
+    print("✓ Reads stayed fast while the import held the writer lock")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("SNAPSHOT READ TEST")
+    print("=" * 60)
+
+    tests = [
+        test_reads_during_import,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
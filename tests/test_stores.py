@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Test that notes and plavki live in separate stores."""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from filelock import FileLock
+from openpyxl import Workbook, load_workbook
+
+from src.bot.services.excel import (
+    EXPECTED_HEADERS,
+    PLAVKA_HEADERS,
+    append_message_row,
+    append_plavka_rows,
+    get_last_rows,
+    migrate_legacy_journal,
+)
+from test_manifest import build_row
+
+
+def _add_note(journal_path: Path, message_id: int) -> None:
+    append_message_row(
+        user_id=1, username="ivanov", chat_id=1, message_id=message_id, text=f"Заметка {message_id}",
+        journal_path=journal_path,
+    )
+
+
+def test_legacy_journal_is_moved():
+    print("Test 1: A journal-mode plavka.xlsx is moved to the journal store")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        journal_path = Path(tmp_dir) / "journal.xlsx"
+
+        workbook = Workbook()
+        workbook.active.append(list(EXPECTED_HEADERS))
+        workbook.active.append(["2024-11-06T08:00:00+03:00", 1, "ivanov", 1, 1, "Старая заметка"])
+        workbook.save(xlsx_path)
+
+        moved = migrate_legacy_journal(xlsx_path=xlsx_path, journal_path=journal_path)
+        moved_again = migrate_legacy_journal(xlsx_path=xlsx_path, journal_path=journal_path)
+        append_plavka_rows([build_row(1)], xlsx_path=xlsx_path)
+        _add_note(journal_path, 2)
+
+        workbook = load_workbook(xlsx_path, read_only=True)
+        plavka_header = next(workbook.active.iter_rows(values_only=True))
+        workbook.close()
+        notes = get_last_rows(10, xlsx_path=journal_path)
+
+    if not moved or moved_again:
+        print("✗ Migration did not run exactly once")
+        return False
+    if list(plavka_header) != list(PLAVKA_HEADERS):
+        print("✗ plavka.xlsx was not recreated with the plavka schema")
+        return False
+    if [note[5] for note in notes] != ["Старая заметка", "Заметка 2"]:
+        print(f"✗ Unexpected notes: {notes}")
+        return False
+
+    print("✓ Old notes kept, plavki imported into a fresh plavka.xlsx")
+    return True
+
+
+def test_notes_do_not_wait_for_imports():
+    print("\nTest 2: Notes are saved while a plavka import holds its lock")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        journal_path = Path(tmp_dir) / "journal.xlsx"
+        append_plavka_rows([build_row(1)], xlsx_path=xlsx_path)
+
+        with FileLock(f"{xlsx_path}.lock"):
+            start_time = time.perf_counter()
+            for message_id in range(1, 4):
+                _add_note(journal_path, message_id)
+            elapsed = time.perf_counter() - start_time
+
+        notes = get_last_rows(10, xlsx_path=journal_path)
+
+    print(f"  3 notes saved in {elapsed * 1000:.0f} ms")
+    if len(notes) != 3 or elapsed > 5:
+        print("✗ Notes waited for the plavka lock")
+        return False
+
+    print("✓ Stores are locked independently")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("SEPARATE STORES TEST")
+    print("=" * 60)
+
+    tests = [
+        test_legacy_journal_is_moved,
+        test_notes_do_not_wait_for_imports,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Test the memory-mapped pour temperature columns."""
+
+import math
+import mmap
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.handlers.temperatures import format_temperature_report
+from src.bot.services.excel import PLAVKA_HEADERS, append_plavka_rows, reconcile_workbook
+from src.bot.services.temperatures import SECTORS, TemperatureHistory, TemperatureSeries, epoch_day
+from test_manifest import build_row
+from test_reconcile import edit_cell
+from test_shards import _reset_settings, _use_settings
+
+SECTOR_COLUMNS = [PLAVKA_HEADERS.index(f"Плавка_температура_заливки_{sector}") for sector in SECTORS]
+
+
+def poured_row(index: int, day: date) -> list:
+    row = build_row(index)
+    row[2] = datetime.combine(day, datetime.min.time())
+    for offset, column in enumerate(SECTOR_COLUMNS):
+        # Sector D is often not poured.
+        row[column] = None if offset == 3 and index % 3 else 1500.0 + (index * 7 + offset * 5) % 80
+    return row
+
+
+def expected_summary(rows: list, first: date, last: date) -> dict:
+    result = {}
+    for sector, column in zip(SECTORS, SECTOR_COLUMNS):
+        values = [row[column] for row in rows if first <= row[2].date() <= last and row[column] is not None]
+        result[sector] = (len(values), sum(values) / len(values), min(values), max(values))
+    return result
+
+
+def summarized(series: TemperatureSeries, first: date, last: date) -> dict:
+    summary = series.summary(epoch_day(first), epoch_day(last))
+    return {sector: (stats.count, stats.mean, stats.minimum, stats.maximum) for sector, stats in summary.items()}
+
+
+def close_enough(actual: dict, expected: dict) -> bool:
+    return all(
+        actual[sector][0] == expected[sector][0]
+        and all(math.isclose(a, b) for a, b in zip(actual[sector][1:], expected[sector][1:]))
+        for sector in SECTORS
+    )
+
+
+def test_follows_store():
+    print("Test 1: Columns follow commits, late reports and a restart")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        directory = Path(tmp_dir) / "plavka.xlsx.temperatures"
+        rows = [poured_row(index, date(2024, 1, 1) + timedelta(days=index // 10)) for index in range(1, 2001)]
+        append_plavka_rows(rows[:1500], xlsx_path=xlsx_path)
+
+        series = TemperatureSeries(directory, xlsx_path)
+        series.start()
+        append_plavka_rows(rows[1500:], xlsx_path=xlsx_path)
+        in_order = series._order is None
+        late = poured_row(2001, date(2024, 2, 3))
+        undated = poured_row(2002, date(2024, 2, 3))
+        undated[2] = None  # belongs to the day of the row before it
+        append_plavka_rows([late, undated], xlsx_path=xlsx_path)
+        rows += [late, undated]
+        undated = list(undated)
+        undated[2] = late[2]
+        everything = rows[:-1] + [undated]
+
+        ranges = [(date(2024, 2, 1), date(2024, 2, 29)), (date(2024, 1, 1), date(2024, 12, 31))]
+        live = [summarized(series, first, last) for first, last in ranges]
+        trend = series.trend()
+        histogram = series.histogram(width=20)
+        report = format_temperature_report(series, date(2024, 1, 1), date(2024, 12, 31))
+        series.stop()
+
+        restarted = TemperatureSeries(directory, xlsx_path)
+        restarted.start()
+        reloaded = summarized(restarted, *ranges[1])
+        restarted.stop()
+
+    expected = [expected_summary(everything, first, last) for first, last in ranges]
+    print(f"  February, sector A: {live[0]['A']}")
+    if not in_order or not all(close_enough(actual, wanted) for actual, wanted in zip(live, expected)):
+        print("✗ Summaries differ from the rows of the store")
+        return False
+    months = [month for month, _means in trend]
+    if months != [date(2024, month, 1) for month in range(1, 8)] or trend[1][1]["D"] is None:
+        print(f"✗ Wrong monthly trend: {months}")
+        return False
+    if sum(histogram.values()) != expected[1]["A"][0] * 3 + expected[1]["D"][0] or min(histogram) != 1500.0:
+        print(f"✗ Histogram does not count every pour: {histogram}")
+        return False
+    if "Сектор D" not in report or "02.2024" not in report or not close_enough(reloaded, expected[1]):
+        print("✗ Report or restarted series is wrong")
+        return False
+    print("✓ Same numbers as the store, live and after a restart")
+    return True
+
+
+def test_follows_edits():
+    print("\nTest 2: Hand edits to temperatures and dates are picked up")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        directory = Path(tmp_dir) / "plavka.xlsx.temperatures"
+        rows = [poured_row(index, date(2024, 3, 1) + timedelta(days=index // 50)) for index in range(1, 3001)]
+        append_plavka_rows(rows, xlsx_path=xlsx_path)
+
+        series = TemperatureSeries(directory, xlsx_path)
+        series.start()
+        edit_cell(xlsx_path, 1200, SECTOR_COLUMNS[0], 1800.0)
+        reconcile_workbook(xlsx_path)
+        live_maximum = series.summary()["A"].maximum
+        series.stop()
+
+        edit_cell(xlsx_path, 2500, 2, datetime(2023, 12, 31))
+        reconcile_workbook(xlsx_path)
+        restarted = TemperatureSeries(directory, xlsx_path)
+        restarted.start()
+        moved = restarted.summary(epoch_day(date(2023, 12, 1)), epoch_day(date(2023, 12, 31)))["B"]
+        first_month = restarted.trend()[0][0]
+        restarted.stop()
+
+    print(f"  maximum of A after the edit: {live_maximum}, December 2023: {moved.count} pour")
+    if live_maximum != 1800.0:
+        print("✗ Edited temperature was not picked up while running")
+        return False
+    if moved.count != 1 or moved.mean != rows[2499][SECTOR_COLUMNS[1]] or first_month != date(2023, 12, 1):
+        print("✗ Date edited while stopped did not move the pour")
+        return False
+    print("✓ Edited blocks rewritten in place")
+    return True
+
+
+def test_all_stores():
+    print("\nTest 3: Every store is covered, including a shard created while running")
+    rows = [poured_row(index, date(2024, 1, 1) + timedelta(days=index // 20)) for index in range(1, 1201)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = _use_settings(tmp_dir, SHARD_BY="plant", PLANTS="ceh1=-1001;ceh2=-1002")
+        try:
+            append_plavka_rows(rows[:400], xlsx_path=xlsx_path)
+            append_plavka_rows(rows[400:700], xlsx_path=xlsx_path.with_name("plavka.ceh1.xlsx"))
+            history = TemperatureHistory()
+            history.start()
+            append_plavka_rows(rows[700:900], xlsx_path=xlsx_path.with_name("plavka.ceh1.xlsx"))
+            append_plavka_rows(rows[900:1000], xlsx_path=xlsx_path.with_name("plavka.ceh2.xlsx"))
+            append_plavka_rows(rows[1000:], xlsx_path=xlsx_path.with_name("plavka.ceh2.xlsx"))
+            live = summarized(history, date(2024, 1, 1), date(2024, 12, 31))
+            trend = history.trend()
+            histogram = history.histogram()
+            stores = sorted(path.name for path in history.series)
+            history.stop()
+
+            restarted = TemperatureHistory()
+            restarted.start()
+            reloaded = summarized(restarted, date(2024, 1, 1), date(2024, 12, 31))
+            restarted.stop()
+        finally:
+            _reset_settings()
+
+    expected = expected_summary(rows, date(2024, 1, 1), date(2024, 12, 31))
+    months = sorted({row[2].date().replace(day=1) for row in rows})
+    january = [row[SECTOR_COLUMNS[0]] for row in rows if row[2].month == 1]
+    print(f"  {stores}: sector A {live['A']}")
+    if stores != ["plavka.ceh1.xlsx", "plavka.ceh2.xlsx", "plavka.xlsx"]:
+        print("✗ Every store should have its own series")
+        return False
+    if not close_enough(live, expected) or not close_enough(reloaded, expected):
+        print("✗ Summaries should cover the rows of every store")
+        return False
+    if [month for month, _means in trend] != months or not math.isclose(trend[0][1]["A"], sum(january) / len(january)):
+        print("✗ Monthly means should be merged over the stores")
+        return False
+    if sum(histogram.values()) != expected["A"][0] * 3 + expected["D"][0]:
+        print("✗ Histogram should count the pours of every store")
+        return False
+    print("✓ Summaries, trend and histogram merged over all stores")
+    return True
+
+
+def test_scan_speed(rows: int = 300000):
+    print(f"\nTest 4: Scanning {rows} rows of history")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        series = TemperatureSeries(Path(tmp_dir) / "temperatures")
+        series.reset()
+        history = [poured_row(index, date(2015, 1, 1) + timedelta(days=index // 100)) for index in range(1, rows + 1)]
+        for start in range(0, rows, 10000):
+            series.add_rows(history[start : start + 10000])
+
+        timings = {}
+        for name, query in (
+            ("summary", lambda: series.summary()),
+            ("one year", lambda: series.summary(epoch_day(date(2020, 1, 1)), epoch_day(date(2020, 12, 31)))),
+            ("trend", lambda: series.trend()),
+            ("histogram", lambda: series.histogram()),
+        ):
+            start_time = time.perf_counter()
+            query()
+            timings[name] = time.perf_counter() - start_time
+        values = series.values("A")
+        zero_copy = isinstance(values, memoryview) and isinstance(values.obj, mmap.mmap)
+        expected = sum(row[SECTOR_COLUMNS[0]] for row in history) / rows
+        summary = series.summary()["A"]
+        series.stop()
+
+    print("  " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+    if not zero_copy or not math.isclose(summary.mean, expected):
+        print("✗ Values should be a slice of the mapped file")
+        return False
+    if max(timings.values()) > 0.5:
+        print("✗ A scan of the whole history should take well under a second")
+        return False
+    print("✓ Whole history scanned in milliseconds")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("TEMPERATURE SERIES TEST")
+    print("=" * 60)
+
+    tests = [
+        test_follows_store,
+        test_follows_edits,
+        test_all_stores,
+        test_scan_speed,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Test per-user and per-shard download watermarks and the "new rows" export."""
+
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from openpyxl import load_workbook
+
+from src.bot.handlers.menu import menu_download, menu_download_delta
+from src.bot.services.excel import append_plavka_rows
+from src.bot.services.shards import store_path
+from src.bot.services.watermarks import DownloadWatermarks, get_watermarks
+from test_document_cache import FakeMessage, make_callback, reset_store, use_store
+from test_manifest import build_row
+
+
+def record_exports(message: FakeMessage) -> list:
+    """Collect ``(filename, plavka ids)`` of every workbook the handlers upload."""
+    exports = []
+
+    def read_export(document) -> None:
+        workbook = load_workbook(document.path, read_only=True)
+        try:
+            ids = [row[0] for row in workbook.worksheets[0].iter_rows(min_row=2, values_only=True)]
+        finally:
+            workbook.close()
+        exports.append((document.filename, ids))
+
+    message.on_upload = read_export
+    return exports
+
+
+def test_keys_and_persistence():
+    print("Test 1: Marks are kept per user and per shard and survive a restart")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "plavka.xlsx.watermarks.json"
+        marks = DownloadWatermarks(path)
+        marks.set(7, 10)
+        marks.set(7, 3, "ceh1")
+        marks.set(8, 5, "ceh1")
+
+        reloaded = DownloadWatermarks(path)
+        values = [reloaded.get(7), reloaded.get(7, "ceh1"), reloaded.get(8, "ceh1"), reloaded.get(8), reloaded.get(7, "ceh2")]
+
+        path.write_text("{not json", encoding="utf-8")
+        damaged = DownloadWatermarks(path).get(7)
+
+    print(f"  marks after reload: {values}, from a damaged file: {damaged}")
+    if values != [10, 3, 5, 0, 0]:
+        print("✗ Marks of different users or shards leaked into each other or were lost")
+        return False
+    if damaged != 0:
+        print("✗ A damaged file should start every user from the first row")
+        return False
+    print("✓ One mark per user and shard, persisted as JSON")
+    return True
+
+
+def test_delta_per_shard():
+    print("\nTest 2: New rows are exported from the chat's own store since the user's mark")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        use_store(tmp_dir, SHARD_BY="plant", PLANTS="ceh1=-1001")
+        try:
+            plant_store = store_path("ceh1")
+            append_plavka_rows([build_row(1), build_row(2)], xlsx_path=plant_store)
+            append_plavka_rows([build_row(10)], xlsx_path=store_path(None))
+            plant_chat, shared_chat = FakeMessage(chat_id=-1001), FakeMessage(chat_id=42)
+            plant_exports, shared_exports = record_exports(plant_chat), record_exports(shared_chat)
+
+            async def scenario():
+                await menu_download_delta(make_callback(plant_chat))
+                await menu_download_delta(make_callback(plant_chat))
+                append_plavka_rows([build_row(3)], xlsx_path=plant_store)
+                await menu_download_delta(make_callback(plant_chat))
+                await menu_download_delta(make_callback(plant_chat, user_id=8))
+                await menu_download_delta(make_callback(shared_chat))
+
+            asyncio.run(scenario())
+            marks = get_watermarks()
+            values = [marks.get(7, "ceh1"), marks.get(8, "ceh1"), marks.get(7)]
+        finally:
+            reset_store()
+
+    print(f"  plant chat: {plant_exports}; shared chat: {shared_exports}; marks: {values}")
+    expected = [
+        ("plavka.ceh1_1-2.xlsx", [202411001, 202411002]),
+        ("plavka.ceh1_3-3.xlsx", [202411003]),
+        ("plavka.ceh1_1-3.xlsx", [202411001, 202411002, 202411003]),
+    ]
+    if plant_exports != expected or len(plant_chat.texts) != 1:
+        print("✗ Each delta should hold exactly the rows the user has not downloaded from this store")
+        return False
+    if shared_exports != [("plavka_1-1.xlsx", [202411010])] or values != [3, 3, 1]:
+        print("✗ The shared store and its marks should be independent of the plant store")
+        return False
+    print("✓ Deltas follow the user's mark in each store")
+    return True
+
+
+def test_full_download_sets_mark_before_upload():
+    print("\nTest 3: Rows committed while a full download is sent are in the next delta")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = use_store(tmp_dir)
+        try:
+            append_plavka_rows([build_row(1), build_row(2)], xlsx_path=xlsx_path)
+            message = FakeMessage()
+            committed_during_upload = []
+
+            def commit_while_sending(document) -> None:
+                if not committed_during_upload:
+                    committed_during_upload.append(build_row(3))
+                    append_plavka_rows(committed_during_upload, xlsx_path=xlsx_path)
+
+            message.on_upload = commit_while_sending
+
+            asyncio.run(menu_download(make_callback(message)))
+            mark = get_watermarks().get(7)
+            exports = record_exports(message)
+            asyncio.run(menu_download_delta(make_callback(message)))
+        finally:
+            reset_store()
+
+    print(f"  mark after the full download: {mark}; next delta: {exports}")
+    if mark != 2:
+        print("✗ The mark should be the row count of the file that was sent")
+        return False
+    if exports != [("plavka_3-3.xlsx", [202411003])]:
+        print("✗ The row committed during the upload was skipped by the next delta")
+        return False
+    print("✓ No row is lost between a full download and the next delta")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("DOWNLOAD WATERMARK TEST")
+    print("=" * 60)
+
+    tests = [
+        test_keys_and_persistence,
+        test_delta_per_shard,
+        test_full_download_sets_mark_before_upload,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Replay recorded Telegram updates against the webhook handler."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.bot.webhook import BoundedRequestHandler
+
+WEBHOOK_PATH = "/webhook"
+SECRET = "test-secret"
+
+
+def recorded_update(update_id: int, text: str = "/start") -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1730880000,
+            "chat": {"id": 1000 + update_id % 7, "type": "private"},
+            "from": {"id": 1000 + update_id % 7, "is_bot": False, "first_name": "Мастер"},
+            "text": text,
+        },
+    }
+
+
+class Recorder:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.seen: list[int] = []
+        self.active = 0
+        self.max_active = 0
+
+    def build_dispatcher(self) -> Dispatcher:
+        router = Router()
+
+        @router.message()
+        async def on_message(message: Message) -> None:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            await asyncio.sleep(self.delay)
+            self.seen.append(message.message_id)
+            self.active -= 1
+
+        dispatcher = Dispatcher()
+        dispatcher.include_router(router)
+        return dispatcher
+
+
+async def _replay(num_updates: int, batch_size: int, max_concurrency: int, delay: float):
+    recorder = Recorder(delay)
+    bot = Bot(token="42:TEST")
+    handler = BoundedRequestHandler(
+        dispatcher=recorder.build_dispatcher(),
+        bot=bot,
+        max_concurrency=max_concurrency,
+        secret_token=SECRET,
+    )
+    handler.max_pending = num_updates
+    app = web.Application()
+    handler.register(app, path=WEBHOOK_PATH)
+
+    updates = [recorded_update(update_id) for update_id in range(1, num_updates + 1)]
+    batches = [updates[i:i + batch_size] for i in range(0, num_updates, batch_size)]
+
+    async with TestClient(TestServer(app)) as client:
+        unauthorized = await client.post(WEBHOOK_PATH, json=updates[0])
+
+        start_time = time.perf_counter()
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    WEBHOOK_PATH,
+                    json=batch if batch_size > 1 else batch[0],
+                    headers={"X-Telegram-Bot-Api-Secret-Token": SECRET},
+                )
+                for batch in batches
+            )
+        )
+        accepted = time.perf_counter() - start_time
+        await handler.drain()
+        processed = time.perf_counter() - start_time
+
+        refused = await client.post(
+            WEBHOOK_PATH, json=updates[0], headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        )
+
+    return recorder, unauthorized.status, [r.status for r in responses], refused.status, accepted, processed
+
+
+def test_replay_single_updates(num_updates: int = 500, max_concurrency: int = 8):
+    print(f"\nTest: Replay {num_updates} single updates, concurrency limit {max_concurrency}")
+    print("-" * 60)
+
+    recorder, unauthorized, statuses, refused, accepted, processed = asyncio.run(
+        _replay(num_updates, batch_size=1, max_concurrency=max_concurrency, delay=0.002)
+    )
+    print(f"  accepted in {accepted:.2f}s ({num_updates / accepted:.0f} req/s), drained in {processed:.2f}s")
+    print(f"  peak concurrent handlers: {recorder.max_active}")
+
+    if unauthorized != 401:
+        print(f"✗ Request without secret returned {unauthorized}")
+        return False
+    if set(statuses) != {200}:
+        print(f"✗ Unexpected statuses: {set(statuses)}")
+        return False
+    if sorted(recorder.seen) != list(range(1, num_updates + 1)):
+        print(f"✗ Processed {len(recorder.seen)} updates, expected {num_updates}")
+        return False
+    if recorder.max_active > max_concurrency:
+        print(f"✗ Concurrency limit exceeded: {recorder.max_active}")
+        return False
+    if refused != 503:
+        print(f"✗ Request after drain returned {refused}")
+        return False
+
+    print("✓ Every update processed once within the concurrency limit")
+    return True
+
+
+def test_replay_batches(num_updates: int = 1000, batch_size: int = 50):
+    print(f"\nTest: Replay {num_updates} updates in batches of {batch_size}")
+    print("-" * 60)
+
+    recorder, _unauthorized, statuses, _refused, accepted, processed = asyncio.run(
+        _replay(num_updates, batch_size=batch_size, max_concurrency=16, delay=0)
+    )
+    print(f"  accepted in {accepted:.2f}s, drained in {processed:.2f}s")
+
+    if set(statuses) != {200}:
+        print(f"✗ Unexpected statuses: {set(statuses)}")
+        return False
+    if sorted(recorder.seen) != list(range(1, num_updates + 1)):
+        print(f"✗ Processed {len(recorder.seen)} updates, expected {num_updates}")
+        return False
+
+    print("✓ Batched updates processed")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("WEBHOOK REPLAY TEST")
+    print("=" * 60)
+
+    tests = [
+        test_replay_single_updates,
+        test_replay_batches,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
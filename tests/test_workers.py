@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Load test for the multi-worker parse pool and the single committer."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bot.services.excel import append_plavka_rows
+from src.bot.services.workers import ParseWorkerPool, RecordCommitter
+
+
+def build_report(report_index: int, plavok: int) -> str:
+    lines = [
+        "ОТЧЁТ О СМЕНЕ",
+        "Дата: 06.11.2024",
+        "Смена: Дневная",
+        "Старший_смены: Иванов Иван Иванович",
+        f"Всего плавок: {plavok}",
+    ]
+    for index in range(1, plavok + 1):
+        lines.extend(
+            [
+                f"Плавка № {index}",
+                f"Номер: {index}",
+                f"Учетный номер: {report_index}-{index}/24",
+                "Наименование отливки: Держатель ригеля",
+                "Участник 1: Петров Петр Петрович",
+                f"Температура A: {1500 + index % 100}.5",
+                f"Комментарий: отчёт {report_index}",
+            ]
+        )
+    return "\n".join(lines)
+
+
+def test_parse_scaling(num_reports: int = 40, plavok: int = 200):
+    """Parse throughput must grow with the number of worker processes."""
+    print(f"\nTest: Parse throughput, {num_reports} reports x {plavok} plavok")
+    print("-" * 60)
+
+    texts = [build_report(i, plavok) for i in range(num_reports)]
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({0, 1, min(2, cpu_count), min(4, cpu_count)})
+
+    throughput = {}
+    for workers in worker_counts:
+        pool = ParseWorkerPool(workers)
+        pool.start()
+        try:
+            start_time = time.perf_counter()
+            reports = pool.parse_many(texts)
+            elapsed = time.perf_counter() - start_time
+        finally:
+            pool.shutdown()
+
+        if sum(len(report.plavki) for report in reports) != num_reports * plavok:
+            print(f"✗ workers={workers}: lost plavki while parsing")
+            return False
+
+        throughput[workers] = num_reports * plavok / elapsed
+        print(f"  workers={workers}: {throughput[workers]:.0f} plavok/s")
+
+    widest = max(worker_counts)
+    if widest >= 2:
+        speedup = throughput[widest] / throughput[1]
+        print(f"  speedup 1 -> {widest} workers: {speedup:.2f}x")
+        if speedup < 0.6 * widest:
+            print("✗ Parse throughput does not scale with worker count")
+            return False
+    else:
+        print("  Only one CPU available, scaling check skipped")
+
+    print("✓ Parse pool produced every plavka")
+    return True
+
+
+async def _commit_concurrently(committer: RecordCommitter, batches):
+    results = await asyncio.gather(*(committer.commit(rows) for rows in batches))
+    await committer.stop()
+    return results
+
+
+def test_single_committer(num_requests: int = 50, rows_per_request: int = 4):
+    """Concurrent imports through the committer must not lose or duplicate rows."""
+    print(f"\nTest: Single committer, {num_requests} requests x {rows_per_request} rows")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = Path(tmp_dir) / "plavka.xlsx"
+        calls = []
+
+        def append(rows):
+            calls.append(len(rows))
+            return append_plavka_rows(rows, xlsx_path=xlsx_path)
+
+        pool = ParseWorkerPool(0)
+        reports = pool.parse_many(build_report(i, rows_per_request) for i in range(num_requests))
+        batches = [
+            [plavka.to_excel_row(index + 1) for index, plavka in enumerate(report.plavki)]
+            for report in reports
+        ]
+
+        start_time = time.perf_counter()
+        results = asyncio.run(_commit_concurrently(RecordCommitter(append=append), batches))
+        elapsed = time.perf_counter() - start_time
+        print(f"  {len(calls)} workbook saves for {num_requests} requests in {elapsed:.2f}s")
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(xlsx_path, read_only=True)
+        stored = [row[1] for row in workbook.active.iter_rows(min_row=2, values_only=True)]
+        workbook.close()
+
+    expected = {row[1] for rows in batches for row in rows}
+    if results != [rows_per_request] * num_requests:
+        print(f"✗ Unexpected commit results: {results}")
+        return False
+    if len(stored) != len(expected) or set(stored) != expected:
+        print(f"✗ Stored {len(stored)} rows ({len(set(stored))} unique), expected {len(expected)}")
+        return False
+
+    print(f"✓ All {len(stored)} rows stored exactly once")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("MULTI-WORKER LOAD TEST")
+    print("=" * 60)
+
+    tests = [
+        test_parse_scaling,
+        test_single_committer,
+    ]
+
+    results = []
+    for test in tests:
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print(f"Results: {sum(results)}/{len(results)} tests passed")
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)